@@ -0,0 +1,471 @@
+"""
+Match analytics for fortnight 8.
+
+An AnalyticsSink collects facts about hits, deaths and wins from the
+matches it is attached to. Each table is kept as a fixed size NumPy column
+per field, and when a table fills up it is written out as a numbered .npz
+chunk and started again. Memory stays bounded however many matches are
+played. Guns and rarities are stored as indexes into GUNS and RARITIES, and
+each chunk keeps the names it was written with.
+
+Run this file to play bot driven headless matches into a directory of
+chunks and summarise win rate and damage share per gun and rarity across
+every chunk in it.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import numpy
+from game import *
+from headless import HeadlessCanvas, HeadlessRoot, HeadlessVariable
+from soak import SoakBot
+
+
+class ColumnChunk:
+    """Rows of one table, stored column by column in fixed size arrays."""
+
+    def __init__(self, columns, rows):
+        """Initiate self variables.
+
+        :param columns: a dict of column name to NumPy dtype
+        :param rows: rows the chunk holds
+        """
+        self._columns = {name: numpy.empty(rows, dtype)
+                         for name, dtype in columns.items()}
+        self._names = list(columns)
+        self._rows = rows
+        self._length = 0
+
+    def append(self, *values):
+        """Append a row, with a value for each column in order.
+
+        :param values:
+        :return:
+        """
+        row = self._length
+        for name, value in zip(self._names, values):
+            self._columns[name][row] = value
+        self._length = row + 1
+
+    def is_full(self):
+        """Return whether every row has been used.
+
+        :return:
+        """
+        return self._length >= self._rows
+
+    def __len__(self):
+        """Return the number of rows appended.
+
+        :return:
+        """
+        return self._length
+
+    def save(self, path, **metadata):
+        """Write the rows appended so far to an .npz file, and empty.
+
+        :param path:
+        :param metadata: extra arrays stored with the columns
+        :return:
+        """
+        numpy.savez(path, **{name: column[:self._length] for name, column
+                             in self._columns.items()}, **metadata)
+        self._length = 0
+
+
+class AnalyticsSink:
+    """Streams per hit, per death and per win facts into .npz chunks.
+
+    The game calls the record methods as things happen. Per match state
+    (first hits for time to kill, and who was last hurt by the zone) only
+    lives until the match ends.
+    """
+
+    DEFAULT_CHUNK_ROWS = 65536
+    # gun and rarity of an unarmed attacker, and fields with no value
+    NO_INDEX = -1
+    # column name -> dtype of each table
+    TABLES = {
+        "hits": {"match": numpy.int32, "tick": numpy.int32,
+                 "gun": numpy.int8, "rarity": numpy.int8,
+                 "damage": numpy.float32, "distance": numpy.float32},
+        "deaths": {"match": numpy.int32, "tick": numpy.int32,
+                   "gun": numpy.int8, "rarity": numpy.int8,
+                   "killer_gun": numpy.int8, "killer_rarity": numpy.int8,
+                   "distance": numpy.float32, "time_to_kill": numpy.int32,
+                   "zone": numpy.bool_, "placement": numpy.int16},
+        "wins": {"match": numpy.int32, "tick": numpy.int32,
+                 "gun": numpy.int8, "rarity": numpy.int8}
+    }
+    _FILE_EXTENSION = ".npz"
+
+    def __init__(self, directory, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 first_match=0):
+        """Initiate self variables.
+
+        :param directory: where chunks are written
+        :param chunk_rows: rows per table kept before a chunk is written
+        :param first_match: number of the first match, so sinks in
+            different processes number their matches apart
+        """
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # chunks of one session share a prefix, so processes never clash
+        self._prefix = time.strftime("%Y%m%d-%H%M%S-") + str(os.getpid())
+        self._chunks = {table: ColumnChunk(columns, chunk_rows)
+                        for table, columns in AnalyticsSink.TABLES.items()}
+        self._chunk_numbers = dict.fromkeys(AnalyticsSink.TABLES, 0)
+        self._paths = []
+        self._match = first_match - 1
+        # victim id -> {shooter id: tick of its first hit}
+        self._first_hits = {}
+        # ids of attackers whose last damage came from the zone
+        self._zone_damaged = set()
+
+    def begin_match(self):
+        """Start numbering facts with the next match.
+
+        :return:
+        """
+        self._match += 1
+        self._first_hits.clear()
+        self._zone_damaged.clear()
+
+    def record_hit(self, tick, victim, shooter, gun, rarity, damage,
+                   distance):
+        """Record a shot that hit.
+
+        :param tick:
+        :param victim: id of the attacker hit
+        :param shooter: id of the shooter
+        :param gun: index of the shooter's gun type
+        :param rarity: index of the shooter's gun rarity
+        :param damage:
+        :param distance: from the shooter to the victim
+        :return:
+        """
+        self._first_hits.setdefault(victim, {}).setdefault(shooter, tick)
+        self._zone_damaged.discard(victim)
+        self._append("hits", self._match, tick, gun, rarity, damage,
+                     distance)
+
+    def record_zone_damage(self, victim):
+        """Record that the zone hurt an attacker.
+
+        :param victim:
+        :return:
+        """
+        self._zone_damaged.add(victim)
+
+    def record_death(self, tick, victim, killer, gun, rarity, killer_gun,
+                     killer_rarity, distance, placement):
+        """Record the death of an attacker.
+
+        Time to kill is counted from the killer's first hit on the victim,
+        and the death is put down to the zone if the zone hurt it last.
+        :param tick:
+        :param victim: id of the attacker that died
+        :param killer: id of its last attacker, or NO_INDEX
+        :param gun: index of the victim's gun type
+        :param rarity: index of the victim's gun rarity
+        :param killer_gun:
+        :param killer_rarity:
+        :param distance: from the killer, or NaN
+        :param placement: attackers alive, counting the victim
+        :return:
+        """
+        first_hit = self._first_hits.pop(victim, {}).get(killer)
+        time_to_kill = tick - first_hit if first_hit is not None \
+            else AnalyticsSink.NO_INDEX
+        zone = victim in self._zone_damaged
+        self._zone_damaged.discard(victim)
+        self._append("deaths", self._match, tick, gun, rarity, killer_gun,
+                     killer_rarity, distance, time_to_kill, zone, placement)
+
+    def record_win(self, tick, gun, rarity):
+        """Record the gun the last attacker alive won with.
+
+        :param tick:
+        :param gun:
+        :param rarity:
+        :return:
+        """
+        self._append("wins", self._match, tick, gun, rarity)
+
+    def _append(self, table, *values):
+        """Append a row to a table, writing the chunk out once it is full.
+
+        :param table:
+        :param values:
+        :return:
+        """
+        chunk = self._chunks[table]
+        chunk.append(*values)
+        if chunk.is_full():
+            self._write_chunk(table)
+
+    def _write_chunk(self, table):
+        """Write the rows of a table to the next numbered chunk file.
+
+        :param table:
+        :return:
+        """
+        path = os.path.join(self._directory,
+                            f"{table}-{self._prefix}-"
+                            f"{self._chunk_numbers[table]:06d}"
+                            f"{AnalyticsSink._FILE_EXTENSION}")
+        self._chunk_numbers[table] += 1
+        self._chunks[table].save(
+            path, gun_names=numpy.array(list(GameController.GUNS)),
+            rarity_names=numpy.array(list(GameController.RARITIES)))
+        self._paths.append(path)
+
+    def flush(self):
+        """Write out every table that has rows waiting.
+
+        :return:
+        """
+        for table, chunk in self._chunks.items():
+            if len(chunk):
+                self._write_chunk(table)
+
+    def get_paths(self):
+        """Return the paths of the chunks written so far.
+
+        :return:
+        """
+        return list(self._paths)
+
+    def close(self):
+        """Write out the last rows.
+
+        :return:
+        """
+        self.flush()
+
+
+class AnalyticsSummary:
+    """Aggregates every chunk in a directory per gun and rarity."""
+
+    _UNARMED = "unarmed"
+
+    def __init__(self, directory):
+        """Load the columns needed from every chunk in a directory.
+
+        :param directory:
+        """
+        self._gun_names = list(GameController.GUNS)
+        self._rarity_names = list(GameController.RARITIES)
+        self._tables = {table: self._load(directory, table, columns)
+                        for table, columns in
+                        (("hits", ("gun", "rarity", "damage", "distance")),
+                         ("deaths", ("gun", "rarity", "killer_gun",
+                                     "killer_rarity", "time_to_kill", "zone")),
+                         ("wins", ("match", "gun", "rarity")))}
+
+    def _load(self, directory, table, columns):
+        """Concatenate some columns of the chunks of one table.
+
+        :param directory:
+        :param table:
+        :param columns:
+        :return:
+        """
+        parts = {column: [] for column in columns}
+        for path in sorted(glob.glob(os.path.join(
+                directory, f"{table}-*{AnalyticsSink._FILE_EXTENSION}"))):
+            with numpy.load(path) as chunk:
+                # chunks from before GUNS or RARITIES changed are skipped
+                if list(chunk["gun_names"]) != self._gun_names or \
+                        list(chunk["rarity_names"]) != self._rarity_names:
+                    continue
+                for column in columns:
+                    parts[column].append(chunk[column])
+        return {column: numpy.concatenate(arrays) if arrays else
+                numpy.empty(0, AnalyticsSink.TABLES[table][column])
+                for column, arrays in parts.items()}
+
+    def _group(self, guns, rarities):
+        """Return the group index of each gun and rarity pair.
+
+        Unarmed rows are group 0.
+        :param guns:
+        :param rarities:
+        :return:
+        """
+        return numpy.where(guns < 0, 0, 1 + guns.astype(numpy.int32) *
+                           len(self._rarity_names) + rarities)
+
+    def _get_group_names(self):
+        """Return the name of each group.
+
+        :return:
+        """
+        return [AnalyticsSummary._UNARMED] + [
+            f"{gun} ({rarity})" for gun in self._gun_names
+            for rarity in self._rarity_names]
+
+    def summarise(self):
+        """Return a summary row for each gun and rarity, and the totals.
+
+        Win rate is the share of attackers finishing a match with a gun that
+        won it. Damage share is the share of all damage dealt by hits. Hits
+        are put down to the gun the shooter holds when they land, so bullets
+        still flying after their shooter died count as unarmed.
+        :return:
+        """
+        names = self._get_group_names()
+        groups = len(names)
+        hits = self._tables["hits"]
+        deaths = self._tables["deaths"]
+        wins = self._tables["wins"]
+        hit_groups = self._group(hits["gun"], hits["rarity"])
+        damage = numpy.bincount(hit_groups, hits["damage"], groups)
+        hit_counts = numpy.bincount(hit_groups, minlength=groups)
+        distance = numpy.bincount(hit_groups, hits["distance"], groups)
+        win_counts = numpy.bincount(self._group(wins["gun"], wins["rarity"]),
+                                    minlength=groups)
+        finishes = win_counts + numpy.bincount(
+            self._group(deaths["gun"], deaths["rarity"]), minlength=groups)
+        killed = (deaths["killer_gun"] != AnalyticsSink.NO_INDEX) & \
+            ~deaths["zone"]
+        kill_groups = self._group(deaths["killer_gun"][killed],
+                                  deaths["killer_rarity"][killed])
+        kill_counts = numpy.bincount(kill_groups, minlength=groups)
+        kill_times = deaths["time_to_kill"][killed]
+        timed = kill_times >= 0
+        time_to_kill = numpy.bincount(kill_groups[timed], kill_times[timed],
+                                      groups)
+        timed_counts = numpy.bincount(kill_groups[timed], minlength=groups)
+        total_damage = damage.sum()
+        rows = []
+        for group, name in enumerate(names):
+            if not finishes[group] and not hit_counts[group]:
+                continue
+            rows.append({
+                "group": name,
+                "finishes": int(finishes[group]),
+                "wins": int(win_counts[group]),
+                "win_rate": float(win_counts[group] / finishes[group])
+                if finishes[group] else math.nan,
+                "hits": int(hit_counts[group]),
+                "damage": float(damage[group]),
+                "damage_share": float(damage[group] / total_damage)
+                if total_damage else math.nan,
+                "mean_hit_distance": float(distance[group] /
+                                           hit_counts[group])
+                if hit_counts[group] else math.nan,
+                "kills": int(kill_counts[group]),
+                "mean_time_to_kill_s": float(
+                    time_to_kill[group] / timed_counts[group] *
+                    GameController.TICK_SECONDS)
+                if timed_counts[group] else math.nan})
+        totals = {"matches_won": int(len(numpy.unique(wins["match"]))),
+                  "hits": int(len(hit_groups)),
+                  "deaths": int(len(deaths["zone"])),
+                  "zone_deaths": int(deaths["zone"].sum()),
+                  "zone_death_share": float(deaths["zone"].mean())
+                  if len(deaths["zone"]) else math.nan}
+        return rows, totals
+
+    @staticmethod
+    def format(rows, totals):
+        """Return summary rows and totals as a text table.
+
+        :param rows:
+        :param totals:
+        :return:
+        """
+        lines = [", ".join(f"{name} {value:.3f}" if isinstance(value, float)
+                           else f"{name} {value}"
+                           for name, value in totals.items()),
+                 f"{'gun (rarity)':<30}{'finishes':>9}{'win rate':>9}"
+                 f"{'damage %':>9}{'hits':>8}{'dist':>7}{'kills':>7}"
+                 f"{'ttk s':>7}"]
+        for row in rows:
+            lines.append(f"{row['group']:<30}{row['finishes']:>9}"
+                         f"{row['win_rate']:>9.3f}"
+                         f"{row['damage_share'] * 100:>9.2f}"
+                         f"{row['hits']:>8}{row['mean_hit_distance']:>7.0f}"
+                         f"{row['kills']:>7}"
+                         f"{row['mean_time_to_kill_s']:>7.2f}")
+        return "\n".join(lines)
+
+
+def _play_matches(directory, matches, first_match, max_ticks, seed,
+                  chunk_rows):
+    """Play bot driven headless matches into an analytics sink.
+
+    The bot player spectates after dying, so every match is played out to
+    a winner unless it hits the tick limit. Runs in worker processes too.
+    :param directory:
+    :param matches:
+    :param first_match: number of the first match, for its seed
+    :param max_ticks: ticks after which a match is ended early
+    :param seed:
+    :param chunk_rows:
+    :return:
+    """
+    sink = AnalyticsSink(directory, chunk_rows, first_match)
+    canvas = HeadlessCanvas(GameController.CANVAS_WIDTH,
+                            GameController.CANVAS_HEIGHT)
+    for match in range(first_match, first_match + matches):
+        random.seed(seed + match)
+        root = HeadlessRoot()
+        game = GameController(root, canvas, HeadlessVariable(), "analytics",
+                              None, spectate=True, analytics=sink)
+        bot = SoakBot(root, game, random.Random(seed + match))
+        for tick in range(max_ticks):
+            if not game.check_game_condition()[0]:
+                break
+            if not game.is_spectating():
+                bot.play(tick)
+            game.handle_tick(render=False)
+        else:
+            game.end_game()
+    sink.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="collect and summarise "
+                                                 "fortnight 8 match analytics")
+    parser.add_argument("directory")
+    parser.add_argument("--matches", type=int, default=0,
+                        help="bot matches to play into the directory first")
+    parser.add_argument("--max-ticks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-rows", type=int,
+                        default=AnalyticsSink.DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--json", help="also write the summary to this file")
+    arguments = parser.parse_args()
+    if arguments.matches:
+        workers = max(1, min(arguments.workers, arguments.matches))
+        shares = [arguments.matches // workers +
+                  (worker < arguments.matches % workers)
+                  for worker in range(workers)]
+        jobs = [(arguments.directory, share, sum(shares[:worker]),
+                 arguments.max_ticks, arguments.seed, arguments.chunk_rows)
+                for worker, share in enumerate(shares)]
+        if workers == 1:
+            _play_matches(*jobs[0])
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                pool.starmap(_play_matches, jobs)
+    summary_start = time.perf_counter()
+    summary_rows, summary_totals = \
+        AnalyticsSummary(arguments.directory).summarise()
+    print(AnalyticsSummary.format(summary_rows, summary_totals))
+    print(f"summarised in {time.perf_counter() - summary_start:.2f}s")
+    if arguments.json:
+        with open(arguments.json, "w") as json_file:
+            json.dump({"totals": summary_totals, "rows": summary_rows},
+                      json_file, indent=2)
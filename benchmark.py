@@ -0,0 +1,268 @@
+"""
+Scaling benchmark for fortnight 8.
+
+Runs headless matches over a grid of entity counts and map sizes, timing
+each phase of handle_tick. A power law is fitted to every phase against
+every setting, so the exponents show which subsystem grows faster than
+linearly as lobbies get bigger. Results are written as json and drawn as a
+log-log chart.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import time
+import numpy
+from PIL import Image, ImageDraw
+from game import *
+from headless import HeadlessCanvas, HeadlessRoot, HeadlessVariable
+
+
+class ScalingBenchmark:
+    """Times handle_tick phases over a grid of game settings."""
+
+    # the handle_tick steps that are timed, in the order they run
+    PHASES = ("_centre_camera", "_handle_zone", "_handle_battle_bus",
+              "_handle_player", "_handle_bullets", "_handle_enemies",
+              "_sync_canvas")
+    DEFAULT_ENEMIES = (50, 100, 200, 400)
+    DEFAULT_GUNS = (50, 100, 200)
+    DEFAULT_HEALS = (15, 30, 60)
+    DEFAULT_MAP_SIZES = (2500, 5000, 10000)
+    DEFAULT_TICKS = 150
+    # the zone starts at the same fraction of the map at every size
+    _ZONE_FRACTION = GameController._ZONE_RADIUS / GameController.CANVAS_WIDTH
+    _CHART_SIZE = (900, 600)
+    _CHART_MARGIN = 70
+    _CHART_COLOURS = ("red", "orange", "gold", "green", "blue", "purple",
+                      "black", "grey")
+
+    def __init__(self, enemies=DEFAULT_ENEMIES, guns=DEFAULT_GUNS,
+                 heals=DEFAULT_HEALS, map_sizes=DEFAULT_MAP_SIZES,
+                 ticks=DEFAULT_TICKS, seed=0):
+        """Initiate self variables.
+
+        :param enemies: enemy counts to try
+        :param guns: gun counts to try
+        :param heals: heal consumable counts to try
+        :param map_sizes: square map side lengths to try
+        :param ticks: ticks timed per combination
+        :param seed:
+        """
+        self._settings = {"enemies": enemies, "guns": guns, "heals": heals,
+                          "map_size": map_sizes}
+        self._ticks = ticks
+        self._seed = seed
+        self._results = []
+
+    def run(self, progress=None):
+        """Time every combination of settings.
+
+        :param progress: called with each result, if given
+        :return:
+        """
+        names = list(self._settings)
+        for values in itertools.product(*self._settings.values()):
+            result = self._time_combination(dict(zip(names, values)))
+            self._results.append(result)
+            if progress is not None:
+                progress(result)
+        return self._results
+
+    def _time_combination(self, settings):
+        """Play one headless match with the given settings and time it.
+
+        :param settings:
+        :return:
+        """
+        saved = (GameController._NUMBER_ENEMIES, GameController._NUMBER_GUNS,
+                 GameController._NUMBER_HEAL_CONSUMABLES,
+                 GameController.CANVAS_WIDTH, GameController.CANVAS_HEIGHT,
+                 GameController._ZONE_RADIUS)
+        GameController._NUMBER_ENEMIES = settings["enemies"]
+        GameController._NUMBER_GUNS = settings["guns"]
+        GameController._NUMBER_HEAL_CONSUMABLES = settings["heals"]
+        GameController.CANVAS_WIDTH = settings["map_size"]
+        GameController.CANVAS_HEIGHT = settings["map_size"]
+        GameController._ZONE_RADIUS = \
+            settings["map_size"] * ScalingBenchmark._ZONE_FRACTION
+        try:
+            random.seed(self._seed)
+            game = GameController(
+                HeadlessRoot(), HeadlessCanvas(settings["map_size"],
+                                               settings["map_size"]),
+                HeadlessVariable(), "benchmark", None)
+            phase_times = self._wrap_phases(game)
+            start = time.perf_counter()
+            for tick in range(self._ticks):
+                game.handle_tick()
+            elapsed = time.perf_counter() - start
+            game.end_game()
+        finally:
+            GameController._NUMBER_ENEMIES, GameController._NUMBER_GUNS, \
+                GameController._NUMBER_HEAL_CONSUMABLES, \
+                GameController.CANVAS_WIDTH, GameController.CANVAS_HEIGHT, \
+                GameController._ZONE_RADIUS = saved
+        return {"settings": settings,
+                "ticks_per_second": self._ticks / elapsed,
+                "tick_ms": elapsed / self._ticks * 1000,
+                "phase_ms": {phase: total / self._ticks * 1000
+                             for phase, total in phase_times.items()}}
+
+    @staticmethod
+    def _wrap_phases(game):
+        """Replace each phase method of a game with a timed wrapper.
+
+        The wrappers are set on the instance, so handle_tick calls them
+        without the game knowing. Returns the dict the totals are kept in.
+        :param game:
+        :return:
+        """
+        phase_times = dict.fromkeys(ScalingBenchmark.PHASES, 0.0)
+
+        def wrap(phase, method):
+            def timed(*args):
+                start = time.perf_counter()
+                result = method(*args)
+                phase_times[phase] += time.perf_counter() - start
+                return result
+            return timed
+
+        for phase in ScalingBenchmark.PHASES:
+            setattr(game, phase, wrap(phase, getattr(game, phase)))
+        return phase_times
+
+    def fit_exponents(self):
+        """Fit cost = c * product(setting ** exponent) for every phase.
+
+        Uses least squares on the logs of the costs and settings, and only
+        fits against settings that were given more than one value.
+        :return:
+        """
+        names = [name for name, values in self._settings.items()
+                 if len(set(values)) > 1]
+        if not names or not self._results:
+            return {}
+        design = numpy.array([[1.0] + [math.log(result["settings"][name])
+                                       for name in names]
+                              for result in self._results])
+        exponents = {}
+        for phase in ScalingBenchmark.PHASES + ("tick",):
+            costs = numpy.array([
+                result["tick_ms"] if phase == "tick"
+                else result["phase_ms"][phase] for result in self._results])
+            # phases that did no work (the bus once it is gone) can be 0
+            costs = numpy.log(numpy.maximum(costs, 1e-6))
+            solution = numpy.linalg.lstsq(design, costs, rcond=None)[0]
+            exponents[phase] = {name: float(exponent)
+                                for name, exponent in
+                                zip(names, solution[1:])}
+        return exponents
+
+    def save_json(self, path):
+        """Write the results and fitted exponents as json.
+
+        :param path:
+        :return:
+        """
+        with open(path, "w") as json_file:
+            json.dump({"ticks": self._ticks, "results": self._results,
+                       "exponents": self.fit_exponents()}, json_file,
+                      indent=2)
+
+    def save_chart(self, path):
+        """Draw per phase cost against total entities on log-log axes.
+
+        :param path:
+        :return:
+        """
+        width, height = ScalingBenchmark._CHART_SIZE
+        margin = ScalingBenchmark._CHART_MARGIN
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        points = []
+        for result in self._results:
+            settings = result["settings"]
+            entities = settings["enemies"] + settings["guns"] + \
+                settings["heals"]
+            for phase, cost in result["phase_ms"].items():
+                if cost > 0:
+                    points.append((phase, math.log10(entities),
+                                   math.log10(cost)))
+        if not points:
+            image.save(path)
+            return
+        low_x = min(point[1] for point in points)
+        high_x = max(point[1] for point in points)
+        low_y = min(point[2] for point in points)
+        high_y = max(point[2] for point in points)
+        span_x = (high_x - low_x) or 1
+        span_y = (high_y - low_y) or 1
+
+        def to_pixel(log_x, log_y):
+            return (margin + (log_x - low_x) / span_x * (width - 2 * margin),
+                    height - margin - (log_y - low_y) / span_y *
+                    (height - 2 * margin))
+
+        draw.rectangle((margin, margin, width - margin, height - margin),
+                       outline="black")
+        draw.text((margin, height - margin + 10),
+                  f"total entities (log) {10 ** low_x:.0f} - "
+                  f"{10 ** high_x:.0f}", fill="black")
+        draw.text((10, 10), f"ms per tick per phase (log) {10 ** low_y:.3f} "
+                            f"- {10 ** high_y:.3f}", fill="black")
+        colours = ScalingBenchmark._CHART_COLOURS
+        for index, phase in enumerate(ScalingBenchmark.PHASES):
+            colour = colours[index % len(colours)]
+            for point_phase, log_x, log_y in points:
+                if point_phase != phase:
+                    continue
+                pixel_x, pixel_y = to_pixel(log_x, log_y)
+                draw.ellipse((pixel_x - 3, pixel_y - 3, pixel_x + 3,
+                              pixel_y + 3), fill=colour)
+            draw.text((width - margin + 5 - 180, margin + 5 + index * 14),
+                      phase, fill=colour)
+        image.save(path)
+
+
+def _parse_counts(text):
+    """Parse a comma separated list of ints.
+
+    :param text:
+    :return:
+    """
+    return tuple(int(value) for value in text.split(","))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark how fortnight 8 "
+                                                 "ticks scale")
+    parser.add_argument("--enemies", type=_parse_counts,
+                        default=ScalingBenchmark.DEFAULT_ENEMIES)
+    parser.add_argument("--guns", type=_parse_counts,
+                        default=ScalingBenchmark.DEFAULT_GUNS)
+    parser.add_argument("--heals", type=_parse_counts,
+                        default=ScalingBenchmark.DEFAULT_HEALS)
+    parser.add_argument("--map-sizes", type=_parse_counts,
+                        default=ScalingBenchmark.DEFAULT_MAP_SIZES)
+    parser.add_argument("--ticks", type=int,
+                        default=ScalingBenchmark.DEFAULT_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="scaling.json")
+    parser.add_argument("--chart", default="scaling.png")
+    arguments = parser.parse_args()
+    benchmark = ScalingBenchmark(arguments.enemies, arguments.guns,
+                                 arguments.heals, arguments.map_sizes,
+                                 arguments.ticks, arguments.seed)
+    benchmark.run(lambda result: print(
+        f"{result['settings']}: {result['ticks_per_second']:.0f} ticks/s"))
+    benchmark.save_json(arguments.json)
+    benchmark.save_chart(arguments.chart)
+    for fitted_phase, fitted_exponents in benchmark.fit_exponents().items():
+        print(fitted_phase, ", ".join(
+            f"{name}^{exponent:.2f}"
+            for name, exponent in fitted_exponents.items()))
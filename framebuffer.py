@@ -0,0 +1,257 @@
+"""
+Software framebuffer renderer for fortnight 8.
+
+Instead of keeping a Tk canvas item per entity, the world is kept on a
+headless canvas and every frame the items inside the camera window are
+composited into one NumPy framebuffer from cached sprite arrays. The display
+canvas only ever holds a single image item, updated once per frame.
+
+Run this file with a saved world state to render it to an image file.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import numpy
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+from game import *
+from headless import HeadlessRoot, HeadlessVariable
+
+
+class FramebufferRenderer:
+    """Composites the camera window of a world canvas into one image.
+
+    Shapes (the zone) are drawn first, then sprites are alpha blended in
+    stacking order, then lines and text (tracers and health) on top, as
+    they are on the Tk canvas.
+    """
+
+    _BACKGROUND = (255, 255, 255)
+    _TEXT_COLOUR = "black"
+    _OUTLINE_COLOUR = "black"
+
+    def __init__(self, width=GameController.CAMERA_WIDTH,
+                 height=GameController.CAMERA_HEIGHT):
+        """Initiate self variables.
+
+        :param width:
+        :param height:
+        """
+        self._display_canvas = None
+        self._width = width
+        self._height = height
+        # (image path, width, height) -> (premultiplied colour, 1 - alpha)
+        self._sprites = {}
+        self._font = ImageFont.load_default()
+        self._image = Image.new("RGB", (width, height),
+                                FramebufferRenderer._BACKGROUND)
+        self._photo_image = None
+        self._display_item = None
+        self._frame_count = 0
+
+    def attach(self, display_canvas):
+        """Show frames on a canvas, or only render off screen when None.
+
+        :param display_canvas:
+        :return:
+        """
+        self.close()
+        self._display_canvas = display_canvas
+        if display_canvas is None or getattr(display_canvas, "HEADLESS",
+                                             False):
+            self._display_canvas = None
+            return
+        display_canvas.config(width=self._width, height=self._height,
+                              scrollregion=(0, 0, self._width, self._height))
+        display_canvas.xview_moveto(0)
+        display_canvas.yview_moveto(0)
+
+    def render(self, world_canvas, left, top):
+        """Draw the window of a world canvas with a top left corner.
+
+        :param world_canvas:
+        :param left:
+        :param top:
+        :return:
+        """
+        left = int(round(left))
+        top = int(round(top))
+        items = world_canvas.find_overlapping(left, top, left + self._width,
+                                              top + self._height)
+        image = Image.new("RGB", (self._width, self._height),
+                          FramebufferRenderer._BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        sprites = []
+        overlays = []
+        for item in items:
+            item_type = world_canvas.type(item)
+            if item_type == "image":
+                sprites.append(item)
+            elif item_type in ("oval", "rectangle"):
+                self._draw_shape(draw, world_canvas, item, item_type, left,
+                                 top)
+            else:
+                overlays.append(item)
+        frame = numpy.array(image)
+        for item in sprites:
+            sprite = self._get_sprite(world_canvas.itemcget(item, "image"))
+            if sprite is not None:
+                x_position, y_position = world_canvas.coords(item)[:2]
+                self._blit(frame, sprite, int(x_position) - left,
+                           int(y_position) - top)
+        image = Image.fromarray(frame)
+        draw = ImageDraw.Draw(image)
+        for item in overlays:
+            self._draw_overlay(draw, world_canvas, item, left, top)
+        self._image = image
+        self._frame_count += 1
+        if self._display_canvas is not None:
+            self._show()
+
+    def _draw_shape(self, draw, world_canvas, item, item_type, left, top):
+        """Draw an oval or rectangle item.
+
+        :param draw:
+        :param world_canvas:
+        :param item:
+        :param item_type:
+        :param left:
+        :param top:
+        :return:
+        """
+        x_1, y_1, x_2, y_2 = world_canvas.coords(item)
+        box = (x_1 - left, y_1 - top, x_2 - left, y_2 - top)
+        if box[2] < box[0] or box[3] < box[1]:
+            return
+        fill = world_canvas.itemcget(item, "fill") or None
+        outline = world_canvas.itemcget(item, "outline")
+        if outline is None:  # tk outlines shapes in black by default
+            outline = FramebufferRenderer._OUTLINE_COLOUR
+        if item_type == "oval":
+            draw.ellipse(box, fill=fill, outline=outline or None)
+        else:
+            draw.rectangle(box, fill=fill, outline=outline or None)
+
+    def _draw_overlay(self, draw, world_canvas, item, left, top):
+        """Draw a line or text item.
+
+        :param draw:
+        :param world_canvas:
+        :param item:
+        :param left:
+        :param top:
+        :return:
+        """
+        coordinates = world_canvas.coords(item)
+        item_type = world_canvas.type(item)
+        if item_type == "line":
+            draw.line([(coordinates[index] - left,
+                        coordinates[index + 1] - top)
+                       for index in range(0, len(coordinates), 2)],
+                      fill=world_canvas.itemcget(item, "fill") or
+                      FramebufferRenderer._TEXT_COLOUR,
+                      width=int(world_canvas.itemcget(item, "width") or 1))
+        elif item_type == "text":
+            text = world_canvas.itemcget(item, "text")
+            # tk centres text on its coordinates
+            text_left, text_top, text_right, text_bottom = \
+                self._font.getbbox(text)
+            draw.text((coordinates[0] - left - (text_right - text_left) / 2,
+                       coordinates[1] - top - (text_bottom - text_top) / 2),
+                      text, font=self._font,
+                      fill=world_canvas.itemcget(item, "fill") or
+                      FramebufferRenderer._TEXT_COLOUR)
+
+    def _get_sprite(self, image):
+        """Return the cached blend arrays of a sprite image, or None.
+
+        :param image: the headless image of a canvas image item
+        :return:
+        """
+        if image is None or image.get_image_path() is None:
+            return None
+        key = (image.get_image_path(), image.width(), image.height())
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            rgba = numpy.asarray(Image.open(key[0]).resize(
+                key[1:], Image.ANTIALIAS).convert("RGBA"), numpy.float32)
+            alpha = rgba[:, :, 3:] / 255
+            sprite = (rgba[:, :, :3] * alpha, 1 - alpha)
+            self._sprites[key] = sprite
+        return sprite
+
+    def _blit(self, frame, sprite, x_position, y_position):
+        """Alpha blend a sprite into the frame, clipped to the frame.
+
+        :param frame:
+        :param sprite:
+        :param x_position: frame column of the sprite's left edge
+        :param y_position: frame row of the sprite's top edge
+        :return:
+        """
+        colour, transparency = sprite
+        height, width = transparency.shape[:2]
+        left = max(x_position, 0)
+        top = max(y_position, 0)
+        right = min(x_position + width, self._width)
+        bottom = min(y_position + height, self._height)
+        if left >= right or top >= bottom:
+            return
+        sprite_rows = slice(top - y_position, bottom - y_position)
+        sprite_columns = slice(left - x_position, right - x_position)
+        target = frame[top:bottom, left:right]
+        target[:] = colour[sprite_rows, sprite_columns] + \
+            target * transparency[sprite_rows, sprite_columns]
+
+    def _show(self):
+        """Show the last frame on the display canvas.
+
+        The photo image is created once and pasted into after that, so the
+        display canvas never gets more than one item.
+        :return:
+        """
+        if self._photo_image is None:
+            self._photo_image = ImageTk.PhotoImage(self._image)
+            self._display_item = self._display_canvas.create_image(
+                0, 0, image=self._photo_image, anchor="nw")
+        else:
+            self._photo_image.paste(self._image)
+
+    def get_frame(self):
+        """Return the last rendered frame as a Pillow image.
+
+        :return:
+        """
+        return self._image
+
+    def get_frame_count(self):
+        """Return the number of frames rendered.
+
+        :return:
+        """
+        return self._frame_count
+
+    def close(self):
+        """Remove the frame from the display canvas.
+
+        :return:
+        """
+        if self._display_item is not None:
+            self._display_canvas.delete(self._display_item)
+            self._display_item = None
+        self._photo_image = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="render a saved fortnight 8 "
+                                                 "world state to an image")
+    parser.add_argument("state")
+    parser.add_argument("image")
+    arguments = parser.parse_args()
+    renderer = FramebufferRenderer()
+    game = GameController(HeadlessRoot(), None, HeadlessVariable(), "render",
+                          None, renderer=renderer)
+    game.load_state(arguments.state)
+    game.render_frame()
+    renderer.get_frame().save(arguments.image)
+    game.end_game()
@@ -13,8 +13,16 @@ from tkinter import *
 import random
 import math
 import time
+import bisect
+import collections
 import pickle
+import re
+import numpy
 from PIL import Image, ImageTk
+from headless import HeadlessCanvas, HeadlessImage
+from telemetry import TelemetryEvent
+from world_state import WorldState, WorldStateError
+from world_view import WorldView
 
 
 class GameController:
@@ -26,6 +34,8 @@ class GameController:
     CANVAS_WIDTH = 5000
     CANVAS_HEIGHT = 5000
     FEATHERING = 30
+    # seconds of game time a tick stands for, the menu's tick speed
+    TICK_SECONDS = 17 / 1000
     # image directories
     PLAYER_DIRECTORY = "sprite_images/player/"
     ENEMY_DIRECTORY = "sprite_images/enemies/"
@@ -43,7 +53,9 @@ class GameController:
                 'height': 50,
                 'damage': 7,
                 'fire_rate': 10,
-                'spray': [-10, 10]
+                'spray': [-10, 10],
+                'range': 1200,
+                'hitscan': False
             },
         "pistol":
             {
@@ -52,7 +64,9 @@ class GameController:
                 'height': 50,
                 'damage': 10,
                 'fire_rate': 3,
-                'spray': [-1, 1]
+                'spray': [-1, 1],
+                'range': 900,
+                'hitscan': False
             },
         "mini_gun":
             {
@@ -61,7 +75,9 @@ class GameController:
                 'height': 50,
                 'damage': 3,
                 'fire_rate': 30,
-                'spray': [-20, 20]
+                'spray': [-20, 20],
+                'range': 600,
+                'hitscan': False
             },
         "sniper_rifle":
             {'image_path': 'sniper_rifle.png',
@@ -69,7 +85,9 @@ class GameController:
              'height': 50,
              'damage': 50,
              'fire_rate': 0.5,
-             'spray': [0, 0]
+             'spray': [0, 0],
+             'range': 3000,
+             'hitscan': True
              }
     }
 
@@ -104,6 +122,14 @@ class GameController:
                     }
     }
 
+    # world view variant numbers for each gun type, rarity and consumable
+    _GUN_VARIANTS = {properties['image_path']: index for index, properties
+                     in enumerate(GUNS.values())}
+    _RARITY_VARIANTS = {rarity: index for index, rarity
+                        in enumerate(RARITIES)}
+    _HEAL_VARIANTS = {name: index for index, name
+                      in enumerate(HEAL_CONSUMABLES)}
+
     # key binds
     _JUMP_BIND = '<space>'
     _UP_BIND = "w"
@@ -111,6 +137,13 @@ class GameController:
     _LEFT_BIND = "a"
     _RIGHT_BIND = "d"
     _DROP_GUN_BIND = "<q>"
+    # spectator binds, follow the next enemy or the leader, and change the
+    # fast forward speed
+    FOLLOW_NEXT_BIND = "e"
+    FOLLOW_LEADER_BIND = "l"
+    SPEED_BIND = "f"
+    # ticks simulated per menu tick while spectating
+    SPECTATOR_SPEEDS = (1, 2, 4, 8)
     # error margins
     _NUMBER_ENEMIES = 100
     _NUMBER_GUNS = 100
@@ -119,21 +152,56 @@ class GameController:
     ID_START = "id"
     # zone radius
     _ZONE_RADIUS = 3000
+    # cell size of the attacker grid used for bullet collisions
+    _ATTACKER_GRID_CELL = 200
+    # number of slots in the timing wheel bullets expire through
+    _BULLET_WHEEL_SLOTS = 256
+    # ticks the tracer of a hitscan shot stays on the canvas
+    _TRACER_TICKS = 3
+    _TRACER_WHEEL_SLOTS = 8
+    _TRACER_COLOUR = "#ffe680"
+    _TRACER_WIDTH = 2
+    # cell size of the index of guns and heal consumables on the ground
+    _GROUND_GRID_CELL = 200
+    # cell size of the flow field idle enemies follow towards the safe zone
+    _FLOW_FIELD_CELL = 250
     # win statements
     _VICTORY_STATEMENT = "victory royale!\nyou won!"
     _DEATH_STATEMENT = "RIP! you died!"
 
     def __init__(self, root, canvas, alive_counter_variable,
-                 player_name, score_file):
+                 player_name, score_file, telemetry=None, renderer=None,
+                 ai_budget=None, spectate=False, analytics=None,
+                 swarm=None):
         """Initialise self variables and set up game scene.
 
         Set up binds, create the canvas, and initialise variables for enemy's,
-        bullets, etc, then spawn a set number of entities.
+        bullets, etc, then spawn a set number of entities. Gameplay events
+        are appended to the telemetry ring buffer if one is passed in. If a
+        framebuffer renderer is passed in, the world is kept on a headless
+        canvas and the passed in canvas only shows the rendered frames. If an
+        ai budget in milliseconds is passed in, enemy decisions each tick are
+        limited to it, which trades determinism for a flat tick time. If
+        spectate is True, the match keeps running after the player dies,
+        with the camera following the leading enemy or a chosen one. Hits,
+        deaths and the win are recorded in the analytics sink if one is
+        passed in. Enemies are moved by the swarm passed in, such as a region
+        swarm stepping them in worker processes, or else by one made here.
         """
         self._player_name = player_name
         self._score_file = score_file
+        self._telemetry = telemetry
+        self._analytics = analytics
+        if analytics is not None:
+            analytics.begin_match()
+        self._renderer = renderer
+        self._tick = 0  # number of ticks handled so far
 
         self._root = root
+        if renderer is not None:
+            renderer.attach(canvas)
+            canvas = HeadlessCanvas(GameController.CANVAS_WIDTH,
+                                    GameController.CANVAS_HEIGHT)
         # create canvas with scroll region of the entire canvas width/height
         self._canvas = canvas
         self._canvas.config(width=GameController.CAMERA_WIDTH,
@@ -154,10 +222,16 @@ class GameController:
         self._root.bind(GameController._DROP_GUN_BIND,
                         self._drop_player_weapon)
 
-        # create zone instance
-        self._zone = Zone(self._canvas, [GameController.CANVAS_WIDTH/2,
-                                         GameController.CANVAS_HEIGHT/2],
-                          GameController._ZONE_RADIUS)
+        # create zone instance, following a schedule made from a seed
+        self._zone_seed = random.getrandbits(32)
+        self._zone = Zone(self._canvas, self._create_zone_schedule(
+            self._zone_seed))
+        # headings towards the safe zone, rebuilt when the zone phase changes
+        self._flow_field = FlowField(GameController._FLOW_FIELD_CELL,
+                                     GameController.CANVAS_WIDTH,
+                                     GameController.CANVAS_HEIGHT)
+        self._flow_field_phase = None
+        self._update_flow_field(0)
         # create player instance
         self._player = Player(self._canvas, 0, 0)
         self._player_score = Score(self._canvas, self._player,
@@ -173,9 +247,39 @@ class GameController:
         self._guns = {}
         self._bullets = {}
         self._heal_consumables = {}
+        # the guns and heal consumables lying on the map, for pick ups and
+        # enemy vision
+        self._ground_guns = GroundItems(GameController._GROUND_GRID_CELL)
+        self._ground_heals = GroundItems(GameController._GROUND_GRID_CELL)
+        # bullets are deleted when the tick their range runs out comes up
+        self._bullet_expiry = TimingWheel(GameController._BULLET_WHEEL_SLOTS)
+        # canvas lines of hitscan shots, deleted a few ticks after firing
+        self._tracers = TimingWheel(GameController._TRACER_WHEEL_SLOTS)
 
         self._player_shoot = False
         self._mouse_target = []
+        # last camera view fractions, and canvas updates issued and skipped
+        # by the last canvas sync
+        self._camera_view = None
+        self._render_stats = (0, 0)
+        # canvas updates of a tick, sent to Tcl together when it ends
+        self._canvas_batch = CanvasBatch(self._canvas)
+        # broad phase index of attacker boxes, rebuilt every tick for bullets
+        self._attacker_grid = SpatialGrid(GameController._ATTACKER_GRID_CELL)
+        self._attacker_grid_tick = None  # tick the grid was last built on
+        # enemies waiting to decide on a new destination and target
+        self._ai_scheduler = AIScheduler(ai_budget)
+        # positions, speeds and destinations of the enemies, moved together
+        self._enemy_swarm = swarm if swarm is not None else \
+            Enemy.create_swarm()
+        # spectating keeps the match running once the player has died
+        self._spectate = spectate
+        self._spectating = False
+        self._spectator_result = None  # player score and end statement
+        self._followed = None  # enemy the camera follows, None for leader
+        self._leader = None
+        self._kills = collections.Counter()  # attacker id -> kills
+        self._speed = 1
 
         for i in range(GameController._NUMBER_ENEMIES):
             self._spawn_enemy()
@@ -195,19 +299,29 @@ class GameController:
         """Centre the canvas scrollable view on the player object.
 
         Centre the scrollable canvas view on the player canvas object to give
-        the effect of a camera following around the player object.
+        the effect of a camera following around the player object. While
+        spectating, the followed enemy is centred instead.
         :return:
         """
-        player_coords = self._player.coordinates()
+        camera_target = self.get_camera_target()
+        if camera_target is None:
+            return
+        player_coords = camera_target.coordinates()
         player_x = player_coords[0]
         player_y = player_coords[1]
         # calculate centre coordinates, as we know the canvas should always
         # be in the centre of the canvas
         centre_x = player_x - (GameController.CAMERA_WIDTH / 2)
         centre_y = player_y - (GameController.CAMERA_HEIGHT / 2)
-        # moves the x and y view of the canvas to caluclated coords.
-        self._canvas.xview_moveto(centre_x / GameController.CANVAS_WIDTH)
-        self._canvas.yview_moveto(centre_y / GameController.CANVAS_HEIGHT)
+        camera_view = (centre_x / GameController.CANVAS_WIDTH,
+                       centre_y / GameController.CANVAS_HEIGHT)
+        if camera_view == self._camera_view:  # the player has not moved
+            return
+        self._camera_view = camera_view
+        # moves the x and y view of the canvas to caluclated coords, sent
+        # with the rest of the tick's canvas updates
+        self._canvas_batch.xview_moveto(camera_view[0])
+        self._canvas_batch.yview_moveto(camera_view[1])
 
     def _spawn_heal_consumable(self):
         """Spawn a heal consumable instance on the canvas.
@@ -227,6 +341,9 @@ class GameController:
         consumable_id = consumable.get_id()
         # add consumable to dictionary
         self._heal_consumables[consumable_id] = consumable
+        self._ground_heals.add(consumable)
+        self._emit_event(TelemetryEvent.SPAWN, consumable_id,
+                         value=WorldView.KIND_HEAL)
 
     def _spawn_gun(self):
         """Spawn a random gun at a random location on the canvas.
@@ -248,6 +365,9 @@ class GameController:
                   gun_properties, random_rarity)
         gun_id = gun.get_id()
         self._guns[gun_id] = gun
+        self._ground_guns.add(gun)
+        self._emit_event(TelemetryEvent.SPAWN, gun_id,
+                         value=WorldView.KIND_GUN)
 
     def _spawn_enemy(self):
         """Spawn an enemy.
@@ -258,9 +378,36 @@ class GameController:
         """
         enemy = Enemy(self._canvas,
                       random.randint(0, GameController.CANVAS_WIDTH),
-                      random.randint(0, GameController.CANVAS_HEIGHT))
+                      random.randint(0, GameController.CANVAS_HEIGHT),
+                      self._enemy_swarm)
         enemy_id = enemy.get_id()
         self._enemies[enemy_id] = enemy
+        self._emit_event(TelemetryEvent.SPAWN, enemy_id,
+                         value=WorldView.KIND_ENEMY)
+
+    def _emit_event(self, kind, subject, other=TelemetryEvent.NO_ENTITY,
+                    value=0.0):
+        """Append a gameplay event to the telemetry buffer, if there is one.
+
+        :param kind:
+        :param subject:
+        :param other:
+        :param value:
+        :return:
+        """
+        if self._telemetry is not None:
+            self._telemetry.emit(self._tick, kind, subject, other, value)
+
+    @staticmethod
+    def _get_entity_id(entity):
+        """Return the id of an entity, or the telemetry no entity id.
+
+        :param entity:
+        :return:
+        """
+        if entity is None:
+            return TelemetryEvent.NO_ENTITY
+        return entity.get_id()
 
     def _kill_enemy(self, enemy):
         """Kill passed in enemy.
@@ -276,6 +423,14 @@ class GameController:
         last_attacker = enemy.get_last_attacker()
         if last_attacker == self._player:
             self._player_score.add_kill_score()
+        self._count_kill(enemy, last_attacker)
+        self._record_death(enemy)
+        self._emit_event(TelemetryEvent.KILL, enemy.get_id(),
+                         self._get_entity_id(last_attacker))
+        # the gun stays on the map for others
+        self._drop_weapon(enemy, leaving=True)
+        self._ai_scheduler.forget(enemy.get_id())
+        enemy.leave_swarm()
         enemy.delete_canvas_object()
         self._enemies.pop(enemy.get_id())  # remove enemy from dict
         self._alive_counter.enemy_killed()  # update alive counter
@@ -284,12 +439,15 @@ class GameController:
         """Add a bullet to the bullet dictionary.
 
         Takes a bullet object, gets its id, then adds to the bullet dictionary
-        using its id as the key.
+        using its id as the key. The bullet is scheduled to expire once it
+        has travelled its range.
         :param bullet:
         :return:
         """
         bullet_id = bullet.get_id()
         self._bullets[bullet_id] = bullet
+        self._bullet_expiry.schedule(bullet_id,
+                                     self._tick + bullet.get_lifetime())
 
     def _delete_bullet(self, bullet_id):
         """Delete a passed in bullet object.
@@ -302,6 +460,7 @@ class GameController:
         bullet = self._bullets.get(bullet_id)
         bullet.delete_canvas_object()
         self._bullets.pop(bullet_id)
+        self._bullet_expiry.cancel(bullet_id)
 
     def _delete_heal_consumable(self, heal_consumable):
         """Delete passed in heal consumable.
@@ -312,6 +471,7 @@ class GameController:
         :return:
         """
         heal_instance = self._heal_consumables.get(heal_consumable)
+        self._ground_heals.remove(heal_instance)
         heal_instance.delete_canvas_object()
         self._heal_consumables.pop(heal_consumable)
 
@@ -323,6 +483,9 @@ class GameController:
         :param event:
         :return:
         """
+        if self._spectating:  # the player is dead, keys control the camera
+            self._spectator_key_pressed(event.keysym)
+            return
         # event.keysym refers to key pressed
         if event.keysym == GameController._UP_BIND:
             self._player.set_y_speed(-Player.DEFAULT_SPEED)
@@ -410,90 +573,260 @@ class GameController:
         :param event:
         :return:
         """
-        if self._player.get_has_gun():  # if the player has the gun
-            player_gun = self._player.get_gun()
-            self._player.remove_gun()  # remove the gun
-            player_gun.delete_canvas_object()  # delete the gun
+        self._drop_weapon(self._player)
+
+    def _drop_weapon(self, attacker, leaving=False):
+        """Put the gun of an attacker back on the ground, if it has one.
+
+        The dropper can not pick the gun up again until it has walked off it,
+        unless it is leaving the game, when the gun is simply put down.
+        :param attacker:
+        :param leaving: the attacker is being removed from the game
+        :return:
+        """
+        if attacker.get_has_gun():  # if the attacker has a gun
+            gun = attacker.get_gun()
+            attacker.remove_gun()  # remove the gun
+            gun.set_position(*attacker.coordinates())
+            if leaving:  # a removed attacker never walks off the gun
+                self._ground_guns.add(gun)
+            else:
+                self._ground_guns.drop(gun, attacker)
 
-    def _find_player_gun(self, overlapping_guns):
+    def _find_player_gun(self, player, overlapping_guns):
         """Attempt to add a gun to the player instance.
 
         Gets the object overlapping with the player, and if it is not None,
         add the gun to the player.
+        :param player:
+        :param overlapping_guns:
         :return:
         """
         # if the list of guns is not empty, add the first gun in the list
         if bool(overlapping_guns):
-            self._player.add_gun(self._guns[overlapping_guns[0]])
+            self._give_gun(player, self._guns[overlapping_guns[0]])
+
+    def _give_gun(self, attacker, gun):
+        """Make an attacker pick up a gun.
+
+        :param attacker:
+        :param gun:
+        :return:
+        """
+        self._ground_guns.remove(gun)
+        attacker.add_gun(gun)
+        self._emit_event(TelemetryEvent.PICKUP, attacker.get_id(),
+                         gun.get_id())
 
-    def _shoot_player_gun(self):
+    def _shoot_player_gun(self, player, mouse_target):
         """Attempt to create a bullet from the player gun.
 
         Attempts to create a bullet, and if None is not returned, append
         bullet object to own bullets list.
+        :param player:
+        :param mouse_target:
         :return:
         """
-        bullet = self._player.shoot_gun(self._mouse_target)
-        # if the returned object is not None (bullet has been created)
-        if bullet is not None:
-            self._add_bullet(bullet)
+        shot = player.shoot_gun(mouse_target, self._tick)
+        # if the returned object is not None (the gun has fired)
+        if shot is not None:
+            self._fire_shot(shot)
+
+    def _fire_shot(self, shot):
+        """Add a fired bullet to the game, or resolve a hitscan shot.
+
+        :param shot: a Bullet or a HitscanShot
+        :return:
+        """
+        if isinstance(shot, HitscanShot):
+            self._resolve_hitscan(shot)
+        else:
+            self._add_bullet(shot)
+
+    def _resolve_hitscan(self, shot):
+        """Damage the first attacker along a hitscan shot and draw a tracer.
+
+        Walks the attacker grid cells along the shot in order, testing the
+        exact ray against each box, and stops as soon as no later cell can
+        hold an earlier hit.
+        :param shot:
+        :return:
+        """
+        if self._attacker_grid_tick != self._tick:  # fired before bullets
+            self._build_attacker_grid()
+        start = shot.get_start()
+        end = shot.get_end()
+        direction = (end[0] - start[0], end[1] - start[1])
+        owner = shot.get_owner()
+        first_hit = None
+        first_hit_time = 1.0
+        for exit_time, entries in self._attacker_grid.walk_segment(start,
+                                                                   end):
+            for attacker, box in entries:
+                # attackers killed earlier this tick are still in the grid
+                if attacker is owner or attacker.get_health() <= 0:
+                    continue
+                hit_time = Bullet.calculate_hit_time(start, direction, box)
+                if hit_time is not None and hit_time < first_hit_time:
+                    first_hit = attacker
+                    first_hit_time = hit_time
+            if first_hit is not None and first_hit_time <= exit_time:
+                break
+        if first_hit is not None:
+            self._damage_attacker(first_hit, owner, shot.get_damage())
+        self._draw_tracer(start, (start[0] + direction[0] * first_hit_time,
+                                  start[1] + direction[1] * first_hit_time))
+
+    def _draw_tracer(self, start, end):
+        """Draw a line for a hitscan shot that is deleted a few ticks later.
+
+        :param start:
+        :param end:
+        :return:
+        """
+        tracer = self._canvas.create_line(
+            *start, *end, fill=GameController._TRACER_COLOUR,
+            width=GameController._TRACER_WIDTH)
+        self._tracers.schedule(tracer,
+                               self._tick + GameController._TRACER_TICKS)
+
+    def _delete_tracers(self, tracers):
+        """Delete tracer lines from the canvas.
+
+        :param tracers:
+        :return:
+        """
+        for tracer in tracers:
+            self._tracers.cancel(tracer)
+            self._canvas.delete(tracer)
 
     def _handle_bullets(self):
         """Handle bullet functions.
 
-        For each bullet in bullets dictionary, check whether inside boundaries.
-        If it is, then move it. Else, delete the bullet.
+        Delete the bullets whose range ran out this tick and build the
+        attacker grid once for the tick, then for each bullet in bullets
+        dictionary, check whether inside boundaries. If it is, test the path
+        it will travel this tick against nearby attackers, and either resolve
+        the first hit or move it. Else, delete the bullet.
         :return:
         """
+        for bullet in self._bullet_expiry.advance(self._tick):
+            self._delete_bullet(bullet)
+        self._delete_tracers(self._tracers.advance(self._tick))
+        self._build_attacker_grid()
         # must loop through a list, else error for changing dict size
         for bullet in list(self._bullets.keys()):
             bullet_instance = self._bullets.get(bullet)  # get bullet instance
             # check if the bullet is inside the boundaries
             if bullet_instance.check_inside_boundaries(0,
                GameController.CANVAS_WIDTH, 0, GameController.CANVAS_HEIGHT):
-                bullet_instance.move()
+                hit_attacker = self._find_bullet_hit(bullet_instance)
+                if hit_attacker is not None:
+                    self._handle_attacker_collided_bullets(hit_attacker,
+                                                           [bullet])
+                else:
+                    bullet_instance.move()
             else:  # if not inside boundaries, delete
                 self._delete_bullet(bullet)
 
+    def _get_attackers(self):
+        """Return a list of every attacker in the game.
+
+        :return:
+        """
+        attackers = list(self._enemies.values())
+        if not self._spectating:  # a spectating player has left the world
+            attackers.append(self._player)
+        return attackers
+
+    def _build_attacker_grid(self):
+        """Insert the box of every living attacker into the attacker grid.
+
+        Done once per tick, so each bullet only needs one grid query.
+        :return:
+        """
+        self._attacker_grid.clear()
+        self._attacker_grid_tick = self._tick
+        for attacker in self._get_attackers():
+            if attacker.get_health() <= 0:  # dead attackers stop no bullets
+                continue
+            x_position, y_position = attacker.get_position()[:2]
+            self._attacker_grid.insert(
+                attacker, (x_position, y_position,
+                           x_position + attacker.get_width(),
+                           y_position + attacker.get_height()))
+
+    def _find_bullet_hit(self, bullet):
+        """Find the first attacker a bullet hits on its path this tick.
+
+        Queries the attacker grid with the box swept by the bullet, then
+        tests the exact path against each candidate box. Returns the attacker
+        hit earliest along the path, ignoring the bullet owner, or None.
+        :param bullet:
+        :return:
+        """
+        start = bullet.get_position()[:2]
+        x_speed = bullet.get_x_speed()
+        y_speed = bullet.get_y_speed()
+        width = bullet.get_width()
+        height = bullet.get_height()
+        swept_box = (min(start[0], start[0] + x_speed),
+                     min(start[1], start[1] + y_speed),
+                     max(start[0], start[0] + x_speed) + width,
+                     max(start[1], start[1] + y_speed) + height)
+        owner = bullet.get_owner()
+        first_hit = None
+        first_hit_time = None
+        for attacker, box in self._attacker_grid.query(swept_box):
+            if attacker is owner:  # bullets never hit their shooter
+                continue
+            # grow the attacker box by the bullet size, so the bullet can be
+            # treated as a point moving from its top left corner
+            hit_time = Bullet.calculate_hit_time(
+                start, (x_speed, y_speed),
+                (box[0] - width, box[1] - height, box[2], box[3]))
+            if hit_time is not None and \
+                    (first_hit_time is None or hit_time < first_hit_time):
+                first_hit = attacker
+                first_hit_time = hit_time
+        return first_hit
+
     def _handle_enemies(self):
         """Handle all enemies in enemies dict.
 
-        Loop through all enemies in the enemy dictionary. Check they are alive,
-        if they are, find overlapping items of interest. Move the enemy
-        if it has a destination, and if not, find a new one. Handle the enemy
+        First the enemy swarm moves every enemy that has not reached its
+        destination, and finds the enemies standing on ground items. Then
+        loop through all enemies in the enemy dictionary. Check they are
+        alive, if they are, find overlapping items of interest. Queue
+        enemies that have arrived for a new destination. Handle the enemy
         health bar and gun (if one is owned). Perform actions on overlapping
-        items of interest if they exist, and attack target if one is had. Kill
-        the enemy if it is not alive.
+        items of interest if they exist, and attack target if one is had.
+        Kill the enemy if it is not alive. Finally, let the ai scheduler
+        serve as many queued decisions as the budget allows.
         :return:
         """
+        self._enemy_swarm.step((self._ground_guns.get_boxes(),
+                                self._ground_heals.get_boxes()))
         for enemy in list(self._enemies.values()):
             if enemy.get_health() > 0:  # if enemy is alive
-                # get the overlapping dictionary of lists of object
-                overlapping_dict = \
-                    enemy.check_overlapping([Gun.GUN_TAG,  Bullet.BULLET_TAG,
-                                             HealConsumable.TAG],
-                                            Gun.OWNED_TAG)
-                # extract the lists from the dictionary
-                overlapping_guns = overlapping_dict[Gun.GUN_TAG]
-                overlapping_bullets = overlapping_dict[Bullet.BULLET_TAG]
-                overlapping_heals = overlapping_dict[HealConsumable.TAG]
-
-                has_destination = enemy.check_destination()
-
-                if has_destination:  # if the enemy has a destination, move
-                    enemy.move()
-                else:  # if enemy does not have destination, find new one
-                    self._get_enemy_destination(enemy, overlapping_guns)
+                # get the ground items the enemy is standing on, only looked
+                # up for enemies on an item or by a gun they dropped
+                overlapping_heals = []
+                if enemy.is_on_ground_items() or \
+                        self._ground_guns.is_dropper(enemy):
+                    # forgets a dropped gun once the enemy walks off it
+                    self._ground_guns.find_pickups(enemy)
+                    overlapping_heals = self._ground_heals.find_pickups(enemy)
+
+                # if enemy does not have destination, queue for one
+                if enemy.has_arrived():
+                    self._ai_scheduler.request(enemy.get_id(), self._tick)
 
                 enemy.handle_health_bar()  # handle enemy health bar instance
 
                 if enemy.get_has_gun():
                     enemy.handle_gun()  # handle enemy gun
 
-                if bool(overlapping_bullets):  # if enemy is collided with
-                    # bullets, handle those collided bullets
-                    self._handle_attacker_collided_bullets(enemy,
-                                                           overlapping_bullets)
                 if bool(overlapping_heals):
                     self._handle_collided_heals(enemy, overlapping_heals)
 
@@ -503,6 +836,20 @@ class GameController:
             else:  # kill enemy if it is dead
                 self._kill_enemy(enemy)
 
+        self._ai_scheduler.serve(self._tick, self._decide_enemy)
+
+    def _decide_enemy(self, enemy_id):
+        """Find a new destination and target for a queued enemy.
+
+        :param enemy_id:
+        :return:
+        """
+        enemy = self._enemies.get(enemy_id)
+        if enemy is None or enemy.get_health() <= 0:
+            return
+        self._get_enemy_destination(enemy,
+                                    self._ground_guns.find_pickups(enemy))
+
     def _get_enemy_destination(self, enemy, overlapping_guns):
         """Generate a new destination for a passed in enemy object.
 
@@ -518,7 +865,7 @@ class GameController:
             self._find_enemy_attacker(enemy)
 
         if not enemy.check_destination():  # if no destination was found
-            enemy.generate_destination()  # gen random destination
+            self._send_enemy_to_zone(enemy)
 
     def _find_enemy_gun(self, enemy, guns):
         """Locate a gun for enemy and checks if enemy is colliding with gun.
@@ -530,9 +877,9 @@ class GameController:
         :param guns:
         :return:
         """
-        nearby_items = enemy.scan_vision(Gun.GUN_TAG)
+        nearby_items = self._ground_guns.query(enemy.get_vision_box())
         if bool(guns):  # if overlapping with a gun
-            enemy.add_gun(self._guns.get(guns[0]))
+            self._give_gun(enemy, self._guns.get(guns[0]))
         elif bool(nearby_items):  # if nearby items is not empty
             enemy.set_destination(self._guns.get(random.choice(
                 nearby_items)))
@@ -546,19 +893,45 @@ class GameController:
         """
         nearby_items = enemy.scan_vision(Attacker.ATTACKER_TAG)
         if bool(nearby_items):  # if nearby items not empty
-            try:  # Try to search enemies dict
-                # pick a random target from the list
-                target = self._enemies.get(random.choice(nearby_items))
-                enemy.set_destination(self._enemies.get(
-                    random.choice(nearby_items)))  # set target destination
-                enemy.add_target(target)
-            except AttributeError:  # must be player
-                target = self._player
-                enemy.set_destination(self._player)
-                enemy.add_target(target)
-        else:  # if nothing is found in scans, move to random location
+            # pick a random target from the list
+            target = self._get_attacker(random.choice(nearby_items))
+            enemy.set_destination(target)  # set target destination
+            enemy.add_target(target)
+        else:  # if nothing is found in scans, head for the safe zone
             enemy.remove_target()
-            enemy.generate_destination()
+            self._send_enemy_to_zone(enemy)
+
+    def _send_enemy_to_zone(self, enemy):
+        """Send an idle enemy along the flow field.
+
+        :param enemy:
+        :return:
+        """
+        enemy.follow_heading(*self._flow_field.get_heading(
+            *enemy.coordinates()))
+
+    def _get_attacker(self, attacker_id):
+        """Return the attacker instance with the given id.
+
+        Searches the enemies dict first, anything else must be the player.
+        :param attacker_id:
+        :return:
+        """
+        enemy = self._enemies.get(attacker_id)
+        if enemy is not None:
+            return enemy
+        return self._player
+
+    @staticmethod
+    def _check_attacker_alive(attacker_id):
+        """Check whether the attacker with a handle is still part of the game.
+
+        Attackers leave the entity table when they are deleted, and a reused
+        table slot gets a new generation, so old handles stay dead.
+        :param attacker_id:
+        :return:
+        """
+        return CanvasSprite.ENTITIES.is_alive(attacker_id)
 
     def _enemy_attack(self, enemy):
         """Ges enemy target, checks if it exists, attacks it.
@@ -571,11 +944,10 @@ class GameController:
         """
         enemy_target = enemy.get_target()
         # must check if target still exists
-        if enemy_target in self._enemies.values() or enemy_target is\
-                self._player:
-            bullet = enemy.attack_target()
-            if bullet is not None:
-                self._add_bullet(bullet)
+        if self._check_attacker_alive(enemy_target):
+            shot = enemy.attack_target(self._tick)
+            if shot is not None:
+                self._fire_shot(shot)
         else:  # if target not exist, remove enemy target
             enemy.remove_target()
 
@@ -593,11 +965,86 @@ class GameController:
             bullet_owner = bullet_instance.get_owner()
             if bullet_owner == attacker:  # if shooter of bullet is self
                 continue
-            # set last attacker to the collided bullet's owner
-            attacker.set_last_attacker(bullet_owner)
-            attacker.damage(bullet_instance.get_damage())  # damage enemy
+            self._damage_attacker(attacker, bullet_owner,
+                                  bullet_instance.get_damage())
             self._delete_bullet(bullet)  # delete bullet
 
+    def _damage_attacker(self, attacker, shooter, damage):
+        """Damage an attacker that was shot.
+
+        :param attacker:
+        :param shooter:
+        :param damage:
+        :return:
+        """
+        # set last attacker to the shooter
+        attacker.set_last_attacker(shooter)
+        attacker.damage(damage)  # damage enemy
+        self._emit_event(TelemetryEvent.DAMAGE, attacker.get_id(),
+                         self._get_entity_id(shooter), damage)
+        if self._analytics is not None:
+            self._analytics.record_hit(
+                self._tick, attacker.get_id(), self._get_entity_id(shooter),
+                *self._get_gun_indices(shooter), damage,
+                self._get_distance(attacker, shooter))
+
+    @staticmethod
+    def _get_gun_indices(attacker):
+        """Return the gun type and rarity indexes of an attacker's gun.
+
+        Both are the no index of world states if there is no gun.
+        :param attacker: an attacker, or None
+        :return:
+        """
+        if attacker is None or not attacker.get_has_gun():
+            return WorldState.NO_INDEX, WorldState.NO_INDEX
+        gun = attacker.get_gun()
+        return (GameController._GUN_VARIANTS[
+                    gun.get_gun_properties()['image_path']],
+                GameController._RARITY_VARIANTS[gun.get_rarity()])
+
+    @staticmethod
+    def _get_distance(attacker, other):
+        """Return the distance between two attackers, or NaN without one.
+
+        :param attacker:
+        :param other: an attacker, or None
+        :return:
+        """
+        if other is None:
+            return math.nan
+        return math.dist(attacker.coordinates(), other.coordinates())
+
+    def _record_death(self, attacker):
+        """Record the death of an attacker in the analytics sink, if any.
+
+        Called before the attacker drops its gun and leaves the alive count.
+        :param attacker:
+        :return:
+        """
+        if self._analytics is None:
+            return
+        killer = attacker.get_last_attacker()
+        self._analytics.record_death(
+            self._tick, attacker.get_id(), self._get_entity_id(killer),
+            *self._get_gun_indices(attacker), *self._get_gun_indices(killer),
+            self._get_distance(attacker, killer),
+            self._alive_counter.get_alive_count())
+
+    def _record_winner(self):
+        """Record the gun of the last attacker alive, if there is one.
+
+        :return:
+        """
+        if self._analytics is None or \
+                self._alive_counter.get_alive_count() != 1:
+            return
+        survivors = [attacker for attacker in self._get_attackers()
+                     if attacker.get_health() > 0]
+        if len(survivors) == 1:
+            self._analytics.record_win(self._tick,
+                                       *self._get_gun_indices(survivors[0]))
+
     def _handle_collided_heals(self, attacker, heals):
         """Handle the collided heals for an attacker.
 
@@ -611,6 +1058,8 @@ class GameController:
             heal_instance = self._heal_consumables.get(heal)
             # heal attacker by the heal consumable amount
             attacker.heal(heal_instance.get_heal_value())
+            self._emit_event(TelemetryEvent.HEAL, attacker.get_id(), heal,
+                             heal_instance.get_heal_value())
             self._delete_heal_consumable(heal)  # delete the consumable
 
     def _handle_battle_bus(self):
@@ -641,51 +1090,114 @@ class GameController:
     def _handle_player(self):
         """Handle the player instance.
 
+        Runs the human player handler for the local player using the mouse
+        state from the root binds.
+        :return:
+        """
+        if self._spectating:
+            return
+        self._handle_human_player(self._player, self._player_shoot,
+                                  self._mouse_target)
+
+    def _handle_human_player(self, player, player_shoot, mouse_target):
+        """Handle a human controlled player instance.
+
         Handle all player functionality, including collisions, pick ups, gun,
         and shooting.
+        :param player:
+        :param player_shoot:
+        :param mouse_target:
         :return:
         """
-        # get the dictionary of overlapping items
-        overlapping_dict = \
-            self._player.check_overlapping([Gun.GUN_TAG, Bullet.BULLET_TAG,
-                                            HealConsumable.TAG], Gun.OWNED_TAG)
-        # create lists of overlapping items
-        overlapping_guns = overlapping_dict[Gun.GUN_TAG]
-        overlapping_bullets = overlapping_dict[Bullet.BULLET_TAG]
-        overlapping_heals = overlapping_dict[HealConsumable.TAG]
+        # get the ground items the player is standing on, bullets are
+        # resolved in _handle_bullets
+        overlapping_guns = self._ground_guns.find_pickups(player)
+        overlapping_heals = self._ground_heals.find_pickups(player)
 
         # check the boundaries
-        self._player.check_boundaries(0, GameController.CANVAS_WIDTH, 0,
-                                      GameController.CANVAS_HEIGHT)
-        self._player.move()
-        self._player.handle_health_bar()
-
-        if bool(overlapping_bullets):  # if bullets list is not empty
-            self._handle_attacker_collided_bullets(self._player,
-                                                   overlapping_bullets)
+        player.check_boundaries(0, GameController.CANVAS_WIDTH, 0,
+                                GameController.CANVAS_HEIGHT)
+        player.move()
+        player.handle_health_bar()
+
         if bool(overlapping_heals):  # if heals list not empty
-            self._handle_collided_heals(self._player, overlapping_heals)
+            self._handle_collided_heals(player, overlapping_heals)
 
         # if the player does not have a gun, run the find gun function
-        if not self._player.get_has_gun():
-            self._find_player_gun(overlapping_guns)
+        if not player.get_has_gun():
+            self._find_player_gun(player, overlapping_guns)
         # if the player does have a gun, run the handle gun function
         else:
-            self._player.handle_gun()
-            if self._player_shoot:  # if the mouse is pressed down, shoot gun
-                self._shoot_player_gun()
+            player.handle_gun()
+            if player_shoot:  # if the mouse is pressed down, shoot gun
+                self._shoot_player_gun(player, mouse_target)
+
+    @staticmethod
+    def _create_zone_schedule(seed):
+        """Create the zone schedule of a match from a seed.
+
+        The zone starts centred on the map.
+        :param seed:
+        :return:
+        """
+        return ZoneSchedule(seed, [GameController.CANVAS_WIDTH/2,
+                                   GameController.CANVAS_HEIGHT/2],
+                            GameController._ZONE_RADIUS,
+                            GameController.CANVAS_WIDTH,
+                            GameController.CANVAS_HEIGHT)
 
     def _handle_zone(self):
         """Handle the zone.
 
         Handler function for the zone instance, check if all attackers are
-        in the zone.
+        in the zone, then move the zone to its state for the next tick.
+        :return:
+        """
+        for attacker in self._zone.check_attackers_inside(
+                self._get_attackers()):
+            self._emit_event(TelemetryEvent.ZONE_DAMAGE, attacker.get_id(),
+                             value=Zone.ZONE_DAMAGE_TICK)
+            if self._analytics is not None:
+                self._analytics.record_zone_damage(attacker.get_id())
+        self._zone.update(self._tick + 1)
+        self._update_flow_field(self._tick + 1)
+
+    def _update_flow_field(self, tick):
+        """Rebuild the flow field if the zone entered a new phase.
+
+        The field points at the circle the zone is closing in on, which only
+        changes between phases.
+        :param tick:
+        :return:
+        """
+        schedule = self._zone.get_schedule()
+        phase = schedule.get_phase_index(tick)
+        if phase == self._flow_field_phase:
+            return
+        self._flow_field_phase = phase
+        self._flow_field.build(*schedule.get_safe_circle(tick))
+
+    def get_player(self):
+        """Return the local player instance.
+
+        :return:
+        """
+        return self._player
+
+    def get_enemies(self):
+        """Return a list of the living enemy instances.
+
+        :return:
+        """
+        return list(self._enemies.values())
+
+    def end_game(self):
+        """Tear down the world without scoring, ending the match early.
+
         :return:
         """
-        attackers = [value for value in self._enemies.values()]
-        attackers.append(self._player)
-        self._zone.check_attackers_inside(attackers)
-        self._zone.shrink_zone()
+        self._remove_binds()
+        self._cleanup()
 
     def _remove_binds(self):
         """Remove all binds.
@@ -709,6 +1221,7 @@ class GameController:
         reducing the risk of a memory leak.
         :return:
         """
+        self._record_winner()
         for enemy in self._enemies.values():  # clean up enemies
             enemy.delete_canvas_object()
             enemy.cleanup()
@@ -720,18 +1233,40 @@ class GameController:
         for bullet in self._bullets.values():  # clean up bullets
             bullet.delete_canvas_object()
             bullet.cleanup()
-        self._player.delete_canvas_object()  # clean up player
-        self._player.cleanup()
+        self._cleanup_players()
+        if self._battle_bus_alive:  # the player never jumped
+            self._delete_battle_bus()
         self._enemies.clear()  # clear enemy references
         self._guns.clear()  # clear gun references
         self._bullets.clear()  # clear bullet references
+        self._bullet_expiry.clear()
+        self._delete_tracers(self._tracers.get_keys())
+        self._ai_scheduler.clear()
+        self._enemy_swarm.clear()
+        self._enemy_swarm.close()
         self._heal_consumables.clear()  # clean heal references
+        self._ground_guns.clear()
+        self._ground_heals.clear()
         self._player_score.cleanup()  # clean up the score instance
+        self._zone.delete_canvas_object()
+        if self._renderer is not None:  # take the last frame off the canvas
+            self._renderer.close()
         # delete remaining references
         del self._player
         del self._zone
         del self._player_score
 
+    def _cleanup_players(self):
+        """Clean up the player instance.
+
+        Deletes the player canvas object and its references.
+        :return:
+        """
+        if self._spectating:  # already removed when the player died
+            return
+        self._player.delete_canvas_object()  # clean up player
+        self._player.cleanup()
+
     def _check_end_type(self):
         """Check whether or not the player has won the game.
 
@@ -751,29 +1286,191 @@ class GameController:
         """Check the game condition.
 
         Check whether game end conditions have been met and return info about
-        the current condition of the game.
+        the current condition of the game. With spectating on, a dead player
+        starts spectating instead, and the game ends when one enemy is left.
         :return:
         """
+        if self._spectate and not self._spectating and \
+                self._player.get_health() <= 0 and \
+                self._alive_counter.get_alive_count() > 2:
+            self._start_spectating()
         # if the game not still running
-        if self._player.get_health() <= 0 or\
-                self._alive_counter.get_alive_count() <= 1:
+        if self._spectating and self._alive_counter.get_alive_count() <= 1:
+            player_score, end_statement = self._spectator_result
+        elif not self._spectating and (
+                self._player.get_health() <= 0 or
+                self._alive_counter.get_alive_count() <= 1):
             self._player_score.write_score()
             player_score = self._player_score.get_score()
             end_statement = self._check_end_type()
-            self._remove_binds()  # remove root binds
-            self._cleanup()  # cleanup instances
-            return False, player_score, end_statement
+            if self._player.get_health() <= 0:
+                self._record_death(self._player)
         else:  # if game is still running
             return True, None, None
+        self._emit_event(TelemetryEvent.MATCH_END, self._player.get_id(),
+                         value=player_score)
+        self._remove_binds()  # remove root binds
+        self._cleanup()  # cleanup instances
+        return False, player_score, end_statement
+
+    def _start_spectating(self):
+        """Take the dead player out of the world and start spectating.
+
+        The score is written now, as the player can not score any more, and
+        kept with the end statement for when the game ends.
+        :return:
+        """
+        self._player_score.write_score()
+        self._spectator_result = (self._player_score.get_score(),
+                                  self._check_end_type())
+        self._emit_event(TelemetryEvent.KILL, self._player.get_id(),
+                         self._get_entity_id(self._player.get_last_attacker()))
+        self._record_death(self._player)
+        # the gun stays on the map
+        self._drop_weapon(self._player, leaving=True)
+        if self._battle_bus_alive:  # the player died before jumping
+            self._delete_battle_bus()
+        self._player.delete_canvas_object()
+        self._player.cleanup()
+        self._alive_counter.enemy_killed()
+        self._attacker_grid_tick = None  # the grid still holds the player
+        self._player_shoot = False
+        self._spectating = True
+
+    def _spectator_key_pressed(self, keysym):
+        """Check a key pressed while spectating against the spectator binds.
+
+        :param keysym:
+        :return:
+        """
+        if keysym == GameController.FOLLOW_NEXT_BIND:
+            self._follow_next_enemy()
+        elif keysym == GameController.FOLLOW_LEADER_BIND:
+            self.follow_enemy(None)
+        elif keysym == GameController.SPEED_BIND:
+            speeds = GameController.SPECTATOR_SPEEDS
+            self.set_speed(speeds[(speeds.index(self._speed) + 1) %
+                                  len(speeds)])
+
+    def _follow_next_enemy(self):
+        """Follow the enemy after the followed one, in spawn order.
+
+        :return:
+        """
+        enemy_ids = list(self._enemies)
+        if not enemy_ids:
+            return
+        followed = self.get_camera_target()
+        if followed is None or followed.get_id() not in self._enemies:
+            self.follow_enemy(self._enemies[enemy_ids[0]])
+            return
+        index = enemy_ids.index(followed.get_id())
+        self.follow_enemy(self._enemies[enemy_ids[(index + 1) %
+                                                  len(enemy_ids)]])
+
+    def _count_kill(self, enemy, last_attacker):
+        """Count a kill by an enemy, updating the leader.
+
+        :param enemy: the enemy that was killed
+        :param last_attacker:
+        :return:
+        """
+        self._kills.pop(enemy.get_id(), None)
+        if enemy is self._leader:
+            self._leader = None  # found again when it is next needed
+        if last_attacker is None or \
+                last_attacker.get_id() not in self._enemies:
+            return
+        killer_id = last_attacker.get_id()
+        self._kills[killer_id] += 1
+        if self._leader is not None and \
+                self._kills[killer_id] > self._kills[self._leader.get_id()]:
+            self._leader = last_attacker
+
+    def _get_leader(self):
+        """Return the enemy with the most kills, or None if none are left.
+
+        Health breaks ties. Only searched for when the last leader died.
+        :return:
+        """
+        if self._leader is None or not self._leader.exists_on_canvas():
+            self._leader = max(self._enemies.values(), default=None,
+                               key=lambda enemy: (self._kills[enemy.get_id()],
+                                                  enemy.get_health()))
+        return self._leader
+
+    def get_camera_target(self):
+        """Return the attacker the camera follows.
+
+        This is the player, or while spectating the followed enemy, or the
+        leader when no enemy is followed or the followed one has died.
+        :return:
+        """
+        if not self._spectating:
+            return self._player
+        if self._followed is not None and self._followed.exists_on_canvas():
+            return self._followed
+        self._followed = None
+        return self._get_leader()
+
+    def follow_enemy(self, enemy):
+        """Follow an enemy with the camera while spectating.
+
+        Passing None follows the leader.
+        :param enemy:
+        :return:
+        """
+        self._followed = enemy
+
+    def is_spectating(self):
+        """Return whether the player has died and is spectating.
+
+        :return:
+        """
+        return self._spectating
+
+    def get_speed(self):
+        """Return the number of ticks to simulate per menu tick.
+
+        :return:
+        """
+        return self._speed
+
+    def set_speed(self, speed):
+        """Set the number of ticks to simulate per menu tick.
+
+        :param speed: one of the spectator speeds
+        :return:
+        """
+        self._speed = speed
 
-    def handle_tick(self):
+    def get_spectator_status(self):
+        """Return a line describing the spectator camera, or an empty one.
+
+        :return:
+        """
+        followed = self.get_camera_target() if self._spectating else None
+        if followed is None:
+            return ""
+        who = "the leader" if self._followed is None else "an enemy"
+        return f"spectating {who} ({self._kills[followed.get_id()]} kills) " \
+               f"at {self._speed}x - {GameController.FOLLOW_NEXT_BIND}: " \
+               f"next enemy, {GameController.FOLLOW_LEADER_BIND}: leader, " \
+               f"{GameController.SPEED_BIND}: speed"
+
+    def handle_tick(self, render=True):
         """Handle tick functions.
 
         Called every tick, handles all things that need to be run every tick,
-        including the camera, zone, and all other instances.
+        including the camera, zone, and all other instances. Fast forwarded
+        ticks pass render as False, so only the canvas items the simulation
+        reads are synced, and the camera and frame wait for the next
+        rendered tick.
+        :param render:
         :return:
         """
-        self._centre_camera()
+        if render:
+            self._centre_camera()
         self._handle_zone()
 
         if self._battle_bus_alive:  # move battle bus if it is still alive
@@ -785,119 +1482,1592 @@ class GameController:
 
         self._handle_enemies()
 
+        self._sync_canvas(render)
 
-class CanvasSprite:
-    """A canvas image with extended functionality."""
+        if render and self._renderer is not None:
+            self.render_frame()
 
-    @staticmethod
-    def calculate_distance_difference(position_1, position_2):
-        """Calculate the distance difference between two points.
+        self._tick += 1
 
-        Takes 2 lists of 2 components, x component and y component,
-        then returns difference.
-        :param position_1:
-        :param position_2:
+    def _get_renderables(self, render=True):
+        """Return every object that keeps a canvas item in sync.
+
+        Health bars and the zone are only drawn, never read back from the
+        canvas, so they are left out when not rendering.
+        :param render:
         :return:
         """
-        x_difference = position_2[0] - position_1[0]
-        y_difference = position_2[1] - position_1[1]
-        return x_difference, y_difference
+        renderables = [self._zone] if render else []
+        for attacker in self._get_attackers():
+            renderables.append(attacker)
+            if render:
+                renderables.append(attacker.get_health_bar())
+        renderables.extend(self._guns.values())
+        renderables.extend(self._bullets.values())
+        renderables.extend(self._heal_consumables.values())
+        if self._battle_bus_alive:
+            renderables.append(self._battle_bus)
+        return renderables
 
-    def __init__(self, canvas, x_position, y_position, width, height,
-                 image_path):
-        """Initiate self variables.
+    def _sync_canvas(self, render=True):
+        """Send the changes of this tick to the canvas.
 
-        Sets self variables and creates the canvas sprite image using a
-        ImageTk photo image.
-        :param canvas:
+        Only objects that changed since the last sync issue canvas updates,
+        and they are collected in the canvas batch, so a Tk canvas gets them
+        all in one Tcl evaluation. Counts the updates issued and the objects
+        skipped for render stats.
+        :param render: whether objects that are only drawn are synced too
+        :return:
+        """
+        issued = 0
+        skipped = 0
+        for renderable in self._get_renderables(render):
+            updates = renderable.sync_canvas(self._canvas_batch)
+            if updates:
+                issued += updates
+            else:
+                skipped += 1
+        self._canvas_batch.flush()
+        self._render_stats = (issued, skipped)
+
+    def render_frame(self):
+        """Draw the camera window with the framebuffer renderer.
+
+        The window is centred on the camera target and kept inside the map,
+        as the Tk canvas view is.
+        :return:
+        """
+        camera_target = self.get_camera_target()
+        if camera_target is None:
+            return
+        self._renderer.render(self._canvas, *self.get_camera_corner(
+            *camera_target.coordinates()))
+
+    @staticmethod
+    def get_camera_corner(x_position, y_position):
+        """Return the top left of a camera window centred on a point.
+
+        The window is kept inside the map.
         :param x_position:
         :param y_position:
-        :param width:
-        :param height:
-        :param image_path:
+        :return:
         """
-        self._id = GameController.ID_START+str(id(self))
-        self._canvas = canvas
-        self._width = width
-        self._height = height
-        image = Image.open(image_path).resize((self._width, self._height),
-                                              Image.ANTIALIAS)
-        # convert to photo image so canvas can read
-        self._photo_image = ImageTk.PhotoImage(image)
-        # create a canvas rectangle object with passed in variables
-        self._canvas_object = \
-            self._canvas.create_image(x_position, y_position,
-                                      image=self._photo_image, anchor="nw")
-        self._add_tag(self._id)
+        return (min(max(x_position - GameController.CAMERA_WIDTH / 2, 0),
+                    GameController.CANVAS_WIDTH -
+                    GameController.CAMERA_WIDTH),
+                min(max(y_position - GameController.CAMERA_HEIGHT / 2, 0),
+                    GameController.CANVAS_HEIGHT -
+                    GameController.CAMERA_HEIGHT))
 
-    def get_id(self):
-        """Get id.
+    def get_render_stats(self):
+        """Return the canvas updates issued and objects skipped last tick.
 
-        Returns the id of self.
         :return:
         """
-        return self._id
+        return self._render_stats
 
-    def _get_ids_from_canvas_objects(self, objects_list):
-        """Create a list of ids of passed in objects.
+    def get_entity_counts(self):
+        """Return the number of live entities of each kind.
 
-        Takes a list of canvas object and gets their object ids from their
-        canvas tags, then returns said list.
-        :param objects_list:
         :return:
         """
-        id_list = []
-        for canvas_object in objects_list:
-            # get the first tag that starts with the ID_START string
-            id_tag = next(tag for tag in self._canvas.gettags(canvas_object)
-                          if tag.startswith(GameController.ID_START))
-            id_list.append(id_tag)
-        return id_list
+        return {"players": len(self._get_attackers()) - len(self._enemies),
+                "enemies": len(self._enemies),
+                "bullets": len(self._bullets),
+                "guns": len(self._guns),
+                "heal_consumables": len(self._heal_consumables)}
 
-    def get_width(self):
-        """Get width.
+    def get_ai_stats(self):
+        """Return how far enemy decisions are falling behind.
 
-        Returns own width.
         :return:
         """
-        return self._width
+        return self._ai_scheduler.get_stats(self._tick)
 
-    def get_height(self):
-        """Get height.
+    def get_canvas_item_count(self):
+        """Return the number of items on the canvas.
 
-        Returns own height.
         :return:
         """
-        return self._height
+        return len(self._canvas.find_all())
 
-    def _add_tag(self, tag):
-        """Add a tag to the canvas object.
+    def get_tick(self):
+        """Return the number of ticks handled so far.
 
-        Adds passed in tag to canvas object.
-        :param tag:
         :return:
         """
-        self._canvas.addtag(tag, 'withtag', self.get_canvas_object())
+        return self._tick
+
+    def capture_state(self):
+        """Capture the whole match as a WorldState.
+
+        Every live entity is flattened to a record, with references between
+        entities (gun owners, targets, last attackers, bullet owners) stored
+        as indexes into the attacker list, where the player is index 0. A
+        spectated match has no player left to capture.
+        :return:
+        """
+        if self._spectating:
+            raise WorldStateError("can not capture a spectated match")
+        attackers = [self._player] + list(self._enemies.values())
+        attacker_indices = {id(attacker): index for index, attacker in
+                            enumerate(attackers)}
+        guns = list(self._guns.values())
+        gun_indices = {id(gun): index for index, gun in enumerate(guns)}
+        gun_types = list(GameController.GUNS)
+        rarities = list(GameController.RARITIES)
+        heal_types = list(GameController.HEAL_CONSUMABLES)
+        index_of = GameController._index_of
+
+        attacker_records = []
+        for attacker in attackers:
+            # only enemies have a destination and a target
+            destination = attacker.get_destination() if \
+                isinstance(attacker, Enemy) else [0, 0]
+            target = CanvasSprite.ENTITIES.get(attacker.get_target()) if \
+                isinstance(attacker, Enemy) else None
+            attacker_records.append((
+                *attacker.get_position()[:2], attacker.get_x_speed(),
+                attacker.get_y_speed(), attacker.get_health(), *destination,
+                index_of(attacker.get_last_attacker(), attacker_indices),
+                index_of(attacker.get_gun(), gun_indices),
+                index_of(target, attacker_indices)))
+        gun_records = [(*gun.get_position()[:2],
+                        gun_types.index(next(
+                            name for name, properties in
+                            GameController.GUNS.items()
+                            if properties is gun.get_gun_properties())),
+                        rarities.index(gun.get_rarity()),
+                        gun.get_cooldown_elapsed(self._tick),
+                        index_of(gun.get_owner(), attacker_indices),
+                        gun.has_owned_tag())
+                       for gun in guns]
+        bullet_records = [(*bullet.get_position()[:2], bullet.get_x_speed(),
+                           bullet.get_y_speed(), bullet.get_damage(),
+                           index_of(bullet.get_owner(), attacker_indices),
+                           self._bullet_expiry.get_deadline(bullet_id) -
+                           self._tick)
+                          for bullet_id, bullet in self._bullets.items()]
+        heal_records = [(*heal.get_position()[:2],
+                         heal_types.index(heal.get_consumable_type()))
+                        for heal in self._heal_consumables.values()]
+        if self._battle_bus_alive:
+            bus = (True, *self._battle_bus.get_position()[:2],
+                   self._battle_bus.get_x_speed(),
+                   self._battle_bus.get_y_speed(),
+                   self._battle_bus.get_has_passenger())
+        else:
+            bus = (False, 0, 0, 0, 0, False)
+        mouse_target = self._mouse_target if self._mouse_target else [0, 0]
+        world = (self._zone_seed, self._alive_counter.get_alive_count(),
+                 self._player_score.get_score(), self._player_shoot,
+                 *mouse_target, *bus)
+        return WorldState(self._tick, random.getstate(), world,
+                          attacker_records, gun_records, bullet_records,
+                          heal_records)
+
+    @staticmethod
+    def _index_of(instance, indices):
+        """Return the record index of an instance, or NO_INDEX.
+
+        :param instance:
+        :param indices:
+        :return:
+        """
+        return indices.get(id(instance), WorldState.NO_INDEX)
+
+    def build_view(self, left, top, right, bottom):
+        """Build the world view of a rectangle of the map.
+
+        Returns a dict of canvas item id to a visual record for every entity
+        overlapping the rectangle.
+        :param left:
+        :param top:
+        :param right:
+        :param bottom:
+        :return:
+        """
+        view = {}
+        for item in self._canvas.find_overlapping(left, top, right, bottom):
+            tags = self._canvas.gettags(item)
+            if not tags:  # health bars and the zone have no tags
+                continue
+            record = self._build_view_record(item, tags)
+            if record is not None:
+                view[item] = record
+        return view
+
+    def build_world_view(self):
+        """Build the world view of the whole map.
+
+        :return:
+        """
+        return self.build_view(0, 0, GameController.CANVAS_WIDTH,
+                               GameController.CANVAS_HEIGHT)
+
+    def get_zone_view(self):
+        """Return the zone as a world view (centre x, centre y, radius).
+
+        :return:
+        """
+        return WorldView.clamp_zone(self._zone.get_centre(),
+                                    self._zone.get_radius())
+
+    def _build_view_record(self, item, tags):
+        """Build the world view record for one tagged canvas item.
+
+        :param item:
+        :param tags:
+        :return:
+        """
+        entity_id = CanvasSprite.get_id_from_tags(tags)
+        coordinates = self._canvas.coords(item)
+        x_position = WorldView.clamp_short(coordinates[0])
+        y_position = WorldView.clamp_short(coordinates[1])
+        if Attacker.ATTACKER_TAG in tags:
+            attacker = self._get_attacker(entity_id)
+            if attacker is None or attacker.get_id() != entity_id:
+                return None
+            kind = WorldView.KIND_ENEMY if entity_id in self._enemies else \
+                WorldView.KIND_PLAYER
+            return (kind, x_position, y_position,
+                    WorldView.clamp_short(round(attacker.get_health())), 0)
+        if Gun.GUN_TAG in tags:
+            gun = self._guns.get(entity_id)
+            if gun is None:
+                return None
+            variant = (GameController._GUN_VARIANTS[
+                gun.get_gun_properties()['image_path']] *
+                WorldView.RARITY_COUNT +
+                GameController._RARITY_VARIANTS[gun.get_rarity()])
+            if Gun.OWNED_TAG in tags:
+                variant |= WorldView.OWNED_VARIANT
+            return WorldView.KIND_GUN, x_position, y_position, 0, variant
+        if Bullet.BULLET_TAG in tags:
+            return WorldView.KIND_BULLET, x_position, y_position, 0, 0
+        if HealConsumable.TAG in tags:
+            heal = self._heal_consumables.get(entity_id)
+            if heal is None:
+                return None
+            return (WorldView.KIND_HEAL, x_position, y_position, 0,
+                    GameController._HEAL_VARIANTS[
+                        heal.get_consumable_type()])
+        return None
+
+    @staticmethod
+    def get_view_sprite(kind, variant):
+        """Return the image path, width and height drawn for a view record.
+
+        :param kind:
+        :param variant:
+        :return:
+        """
+        if kind == WorldView.KIND_ENEMY:
+            return Enemy._IMAGE_PATH, Enemy._WIDTH, Enemy._HEIGHT
+        if kind == WorldView.KIND_PLAYER:
+            return Player._IMAGE_PATH, Player._WIDTH, Player._HEIGHT
+        if kind == WorldView.KIND_GUN:
+            gun_type, rarity = divmod(variant & ~WorldView.OWNED_VARIANT,
+                                      WorldView.RARITY_COUNT)
+            gun_properties = list(GameController.GUNS.values())[gun_type]
+            rarity_properties = list(GameController.RARITIES.values())[rarity]
+            return (GameController.GUN_DIRECTORY +
+                    rarity_properties["file_prefix"] +
+                    gun_properties['image_path'], gun_properties['width'],
+                    gun_properties['height'])
+        if kind == WorldView.KIND_BULLET:
+            return Bullet._IMAGE_PATH, Bullet._WIDTH, Bullet._HEIGHT
+        heal_properties = \
+            list(GameController.HEAL_CONSUMABLES.values())[variant]
+        return (heal_properties["image_path"], HealConsumable.WIDTH,
+                HealConsumable.HEIGHT)
+
+    def _clear_world(self):
+        """Delete every entity from the canvas and the instance dicts.
+
+        Keeps the zone, alive counter and binds, so a captured state can be
+        restored into the same controller.
+        :return:
+        """
+        for enemy in self._enemies.values():
+            enemy.delete_canvas_object()
+            enemy.cleanup()
+        for gun in self._guns.values():
+            gun.delete_canvas_object()
+            gun.cleanup()
+        for heal_consumable in self._heal_consumables.values():
+            heal_consumable.delete_canvas_object()
+        for bullet in self._bullets.values():
+            bullet.delete_canvas_object()
+            bullet.cleanup()
+        if not self._spectating:  # already removed when the player died
+            self._player.delete_canvas_object()
+            self._player.cleanup()
+        if self._battle_bus_alive:
+            self._delete_battle_bus()
+        self._enemies.clear()
+        self._guns.clear()
+        self._bullets.clear()
+        self._bullet_expiry.clear()
+        self._delete_tracers(self._tracers.get_keys())
+        self._ai_scheduler.clear()
+        self._enemy_swarm.clear()
+        self._heal_consumables.clear()
+        self._ground_guns.clear()
+        self._ground_heals.clear()
+
+    def restore_state(self, state):
+        """Replace the running match with a captured WorldState.
+
+        Clears the world, then rebuilds all canvas items from the records in
+        one pass per entity type before linking up references between them.
+        The random state is restored last. Restoring one state always plays
+        out the same way, but it can drift from the captured match itself,
+        as the guns attackers just dropped, the tracers and the order items
+        were created in are not captured.
+        :param state:
+        :return:
+        """
+        self._clear_world()
+        # the restored player is alive again
+        self._spectating = False
+        self._followed = None
+        self._leader = None
+        self._kills.clear()
+        # gun cooldowns and bullet expiry are relative to the tick
+        self._tick = state.tick
+        gun_types = list(GameController.GUNS)
+        rarities = list(GameController.RARITIES)
+        heal_types = list(GameController.HEAL_CONSUMABLES)
+        zone_seed, alive_count, score, player_shoot, \
+            mouse_x, mouse_y, bus_alive, bus_x, bus_y, bus_x_speed, \
+            bus_y_speed, bus_has_passenger = state.world
+
+        # attackers, the first record is always the player
+        attackers = []
+        for index, record in enumerate(state.attackers):
+            if index == 0:
+                attacker = Player(self._canvas, record[0], record[1])
+                self._player = attacker
+            else:
+                attacker = Enemy(self._canvas, record[0], record[1],
+                                 self._enemy_swarm)
+                attacker.set_destination_coordinates(record[5], record[6])
+                self._enemies[attacker.get_id()] = attacker
+            attacker.set_x_speed(record[2])
+            attacker.set_y_speed(record[3])
+            attacker.set_health(record[4])
+            attackers.append(attacker)
+
+        guns = []
+        for x_position, y_position, gun_type, rarity, cooldown, owner, \
+                owned_tag in state.guns:
+            gun = Gun(self._canvas, x_position, y_position,
+                      GameController.GUNS[gun_types[gun_type]],
+                      rarities[rarity])
+            gun.set_cooldown_elapsed(cooldown, self._tick)
+            if owner != WorldState.NO_INDEX:
+                attackers[owner].add_gun(gun)
+            else:
+                self._ground_guns.add(gun)
+            self._guns[gun.get_id()] = gun
+            guns.append(gun)
+
+        # link attackers now every instance exists
+        for attacker, record in zip(attackers, state.attackers):
+            last_attacker, target = record[7], record[9]
+            if last_attacker != WorldState.NO_INDEX:
+                attacker.set_last_attacker(attackers[last_attacker])
+            if target != WorldState.NO_INDEX:
+                attacker.add_target(attackers[target])
+
+        for x_position, y_position, x_speed, y_speed, damage, owner, \
+                lifetime in state.bullets:
+            bullet_owner = attackers[owner] if owner != WorldState.NO_INDEX \
+                else None
+            bullet = Bullet(self._canvas, x_position, y_position, damage,
+                            [x_position + x_speed, y_position + y_speed],
+                            bullet_owner, lifetime)
+            bullet.set_x_speed(x_speed)
+            bullet.set_y_speed(y_speed)
+            self._add_bullet(bullet)
+
+        for x_position, y_position, heal_type in state.heals:
+            heal = HealConsumable(self._canvas, x_position, y_position,
+                                  heal_types[heal_type])
+            self._heal_consumables[heal.get_id()] = heal
+            self._ground_heals.add(heal)
+
+        self._battle_bus_alive = bool(bus_alive)
+        if self._battle_bus_alive:
+            self._battle_bus = BattleBus(self._canvas, bus_x, bus_y, 0, 0,
+                                         self._player)
+            self._battle_bus.set_x_speed(bus_x_speed)
+            self._battle_bus.set_y_speed(bus_y_speed)
+            if not bus_has_passenger:
+                self._battle_bus.remove_passenger()
+
+        # the zone state follows from its seed and the tick
+        self._zone_seed = zone_seed
+        self._zone.set_schedule(self._create_zone_schedule(zone_seed),
+                                state.tick)
+        self._flow_field_phase = None
+        self._update_flow_field(state.tick)
+        self._player_score = Score(self._canvas, self._player,
+                                   self._player_name, self._score_file)
+        self._player_score.set_score(score)
+        self._alive_counter.set_alive_count(alive_count)
+        self._player_shoot = bool(player_shoot)
+        self._mouse_target = [mouse_x, mouse_y]
+        random.setstate(state.rng_state)
+
+    def save_state(self, path):
+        """Capture the match and write it to a file.
+
+        :param path:
+        :return:
+        """
+        self.capture_state().save(path)
+
+    def load_state(self, path):
+        """Restore the match from a file written by save_state.
+
+        :param path:
+        :return:
+        """
+        self.restore_state(WorldState.load(path))
+
+
+class SpriteImageCache:
+    """Loads each sprite image once and shares it between sprites."""
+
+    _images = {}
+
+    @staticmethod
+    def get_image(canvas, image_path, width, height):
+        """Return a photo image for the given path and size.
+
+        Opens and resizes the image the first time it is requested, then
+        returns the same photo image for every later sprite. Headless canvases
+        get a sized placeholder instead, as there is no Tk window to draw to.
+        :param canvas:
+        :param image_path:
+        :param width:
+        :param height:
+        :return:
+        """
+        headless = getattr(canvas, "HEADLESS", False)
+        key = (image_path, width, height, headless)
+        photo_image = SpriteImageCache._images.get(key)
+        if photo_image is None:
+            if headless:
+                photo_image = HeadlessImage(width, height, image_path)
+            else:
+                image = Image.open(image_path).resize((width, height),
+                                                      Image.ANTIALIAS)
+                # convert to photo image so canvas can read
+                photo_image = ImageTk.PhotoImage(image)
+            SpriteImageCache._images[key] = photo_image
+        return photo_image
+
+
+class CanvasBatch:
+    """Collects canvas updates and sends them to Tcl as one script.
+
+    Every Tk canvas method call is a separate round trip into Tcl, with its
+    arguments converted one by one. The batch writes each update as a line
+    of Tcl instead, and evaluates the whole script when flushed. Headless
+    canvases have no Tcl interpreter, so updates go straight to them. A
+    canvas proxy with an eval_script method, such as a counting canvas, is
+    handed the script to evaluate.
+    """
+
+    # characters with a meaning in Tcl words, escaped with a backslash
+    _TCL_SPECIAL = re.compile(r'([\\\[\]{}$";\s])')
+
+    def __init__(self, canvas):
+        """Initiate self variables.
+
+        :param canvas:
+        """
+        self._canvas = canvas
+        self._tk = None if getattr(canvas, "HEADLESS", False) else \
+            getattr(canvas, "tk", None)
+        self._eval_script = None if self._tk is None else \
+            getattr(canvas, "eval_script", self._tk.eval)
+        self._path = str(canvas)  # the Tcl command of the canvas widget
+        self._commands = []
+
+    @staticmethod
+    def _quote(value):
+        """Return a value as a single Tcl word.
+
+        :param value:
+        :return:
+        """
+        if isinstance(value, (int, float)):
+            return repr(value)
+        text = str(value)
+        if not text:
+            return '""'
+        return CanvasBatch._TCL_SPECIAL.sub(
+            lambda match: "\\n" if match.group(1) == "\n"
+            else "\\" + match.group(1), text)
+
+    def coords(self, item, *coordinates):
+        """Set the coordinates of an item.
+
+        :param item:
+        :param coordinates:
+        :return:
+        """
+        if self._tk is None:
+            self._canvas.coords(item, *coordinates)
+            return
+        self._commands.append(f"{self._path} coords {item} " + " ".join(
+            repr(float(coordinate)) for coordinate in coordinates))
+
+    def itemconfigure(self, item, **options):
+        """Set options of an item.
+
+        :param item:
+        :param options:
+        :return:
+        """
+        if self._tk is None:
+            self._canvas.itemconfigure(item, **options)
+            return
+        self._commands.append(f"{self._path} itemconfigure {item} " +
+                              " ".join(f"-{name} {CanvasBatch._quote(value)}"
+                                       for name, value in options.items()))
+
+    def xview_moveto(self, fraction):
+        """Move the x view of the canvas.
+
+        :param fraction:
+        :return:
+        """
+        if self._tk is None:
+            self._canvas.xview_moveto(fraction)
+            return
+        self._commands.append(f"{self._path} xview moveto {fraction!r}")
+
+    def yview_moveto(self, fraction):
+        """Move the y view of the canvas.
+
+        :param fraction:
+        :return:
+        """
+        if self._tk is None:
+            self._canvas.yview_moveto(fraction)
+            return
+        self._commands.append(f"{self._path} yview moveto {fraction!r}")
+
+    def flush(self):
+        """Evaluate the collected updates, returning how many were sent.
+
+        :return:
+        """
+        if not self._commands:
+            return 0
+        count = len(self._commands)
+        script = "\n".join(self._commands)
+        self._commands.clear()
+        self._eval_script(script)
+        return count
+
+
+class SpatialGrid:
+    """A uniform grid broad phase for boxes."""
+
+    def __init__(self, cell_size):
+        """Initiate self variables.
+
+        :param cell_size:
+        """
+        self._cell_size = cell_size
+        self._cells = {}
+
+    def clear(self):
+        """Remove every box from the grid.
+
+        :return:
+        """
+        self._cells.clear()
+
+    def _cell_range(self, box):
+        """Return the cell index range covered by a box.
+
+        :param box:
+        :return:
+        """
+        return (int(box[0] // self._cell_size), int(box[1] // self._cell_size),
+                int(box[2] // self._cell_size), int(box[3] // self._cell_size))
+
+    def insert(self, key, box):
+        """Insert a key with a (left, top, right, bottom) box.
+
+        :param key:
+        :param box:
+        :return:
+        """
+        left, top, right, bottom = self._cell_range(box)
+        entry = (key, box)
+        for cell_x in range(left, right + 1):
+            for cell_y in range(top, bottom + 1):
+                self._cells.setdefault((cell_x, cell_y), []).append(entry)
+
+    def query(self, box):
+        """Return the (key, box) entries whose cells touch a box.
+
+        Each entry is returned once, even if it spans several cells. Entries
+        are candidates only, their boxes still need an exact test.
+        :param box:
+        :return:
+        """
+        left, top, right, bottom = self._cell_range(box)
+        found = {}
+        for cell_x in range(left, right + 1):
+            for cell_y in range(top, bottom + 1):
+                for entry in self._cells.get((cell_x, cell_y), ()):
+                    found[id(entry[0])] = entry
+        return list(found.values())
+
+    def walk_segment(self, start, end):
+        """Yield the entries of each cell a segment crosses, in order.
+
+        Steps from cell to cell along the segment, yielding (exit time,
+        entries) where exit time is the fraction of the segment (0 to 1) at
+        which it leaves the cell. An entry spanning several cells is yielded
+        once per cell.
+        :param start:
+        :param end:
+        :return:
+        """
+        size = self._cell_size
+        cell_x, cell_y = int(start[0] // size), int(start[1] // size)
+        last_cell = (int(end[0] // size), int(end[1] // size))
+        steps = []
+        for axis, cell in ((0, cell_x), (1, cell_y)):
+            delta = end[axis] - start[axis]
+            if delta == 0:  # never crosses a cell line on this axis
+                steps.append((0, math.inf, math.inf))
+                continue
+            step = 1 if delta > 0 else -1
+            # time of the first cell line crossed, then the time per cell
+            steps.append((step, ((cell + (step > 0)) * size - start[axis]) /
+                          delta, size / abs(delta)))
+        (step_x, next_x, time_x), (step_y, next_y, time_y) = steps
+        while True:
+            exit_time = min(next_x, next_y, 1.0)
+            yield exit_time, self._cells.get((cell_x, cell_y), ())
+            if exit_time >= 1.0 or (cell_x, cell_y) == last_cell:
+                return
+            if next_x < next_y:
+                cell_x += step_x
+                next_x += time_x
+            else:
+                cell_y += step_y
+                next_y += time_y
+
+    def remove(self, key, box):
+        """Remove a key that was inserted with a box.
+
+        :param key:
+        :param box:
+        :return:
+        """
+        left, top, right, bottom = self._cell_range(box)
+        for cell_x in range(left, right + 1):
+            for cell_y in range(top, bottom + 1):
+                cell = self._cells.get((cell_x, cell_y))
+                if cell is None:
+                    continue
+                cell[:] = [entry for entry in cell if entry[0] != key]
+                if not cell:
+                    del self._cells[(cell_x, cell_y)]
+
+
+class GroundItems:
+    """The items of one kind lying on the map, in a spatial index.
+
+    Items are added when they spawn or are dropped and removed when they
+    are picked up or deleted, so queries only ever see live ground items
+    and the index never holds more than what is on the map.
+    """
+
+    def __init__(self, cell_size):
+        """Initiate self variables.
+
+        :param cell_size:
+        """
+        self._grid = SpatialGrid(cell_size)
+        self._boxes = {}
+        self._box_array = None  # the boxes as an array, until they change
+        # id of a dropped item to the id of the attacker that dropped it,
+        # and the id of a dropper to the ids of the items it dropped
+        self._dropped_by = {}
+        self._drops = {}
+
+    def add(self, item):
+        """Put an item on the ground at its current position.
+
+        :param item:
+        :return:
+        """
+        item_id = item.get_id()
+        if item_id in self._boxes:
+            return
+        x_position, y_position = item.get_position()[:2]
+        box = (x_position, y_position, x_position + item.get_width(),
+               y_position + item.get_height())
+        self._boxes[item_id] = box
+        self._box_array = None
+        self._grid.insert(item_id, box)
+
+    def drop(self, item, dropper):
+        """Put an item on the ground that an attacker just let go of.
+
+        The dropper is ignored by find_pickups until it stops overlapping
+        the item, so it does not pick it straight back up.
+        :param item:
+        :param dropper:
+        :return:
+        """
+        self.add(item)
+        item_id = item.get_id()
+        dropper_id = dropper.get_id()
+        self._dropped_by[item_id] = dropper_id
+        self._drops.setdefault(dropper_id, set()).add(item_id)
+
+    def _forget_drop(self, item_id):
+        """Stop ignoring an item for the attacker that dropped it.
+
+        :param item_id:
+        :return:
+        """
+        dropper_id = self._dropped_by.pop(item_id, None)
+        if dropper_id is None:
+            return
+        dropped = self._drops[dropper_id]
+        dropped.discard(item_id)
+        if not dropped:
+            del self._drops[dropper_id]
+
+    def remove(self, item):
+        """Take an item off the ground, if it is on it.
+
+        :param item:
+        :return:
+        """
+        item_id = item.get_id()
+        box = self._boxes.pop(item_id, None)
+        if box is not None:
+            self._box_array = None
+            self._grid.remove(item_id, box)
+        self._forget_drop(item_id)
+
+    def clear(self):
+        """Remove every item.
+
+        :return:
+        """
+        self._grid.clear()
+        self._boxes.clear()
+        self._box_array = None
+        self._dropped_by.clear()
+        self._drops.clear()
+
+    def query(self, box):
+        """Return the ids of ground items overlapping a box, in position
+        order.
+
+        Ids are handed out again when a state is restored, so ordering by
+        position keeps random picks from the result the same after a
+        restore.
+        :param box:
+        :return:
+        """
+        left, top, right, bottom = box
+        found = [(item_box, item_id) for item_id, item_box
+                 in self._grid.query(box)
+                 if item_box[0] <= right and item_box[2] >= left and
+                 item_box[1] <= bottom and item_box[3] >= top]
+        found.sort()
+        return [item_id for item_box, item_id in found]
+
+    def get_boxes(self):
+        """Return the (left, top, right, bottom) boxes of the items as an
+        array.
+
+        :return:
+        """
+        if self._box_array is None:
+            self._box_array = numpy.array(list(self._boxes.values()),
+                                          float).reshape(-1, 4)
+        return self._box_array
+
+    def is_dropper(self, attacker):
+        """Return whether an attacker dropped an item it is still ignoring.
+
+        :param attacker:
+        :return:
+        """
+        return attacker.get_id() in self._drops
+
+    def find_pickups(self, attacker):
+        """Return the ids of the ground items an attacker is standing on.
+
+        :param attacker:
+        :return:
+        """
+        x_position, y_position = attacker.get_position()[:2]
+        found = self.query((x_position, y_position,
+                            x_position + attacker.get_width(),
+                            y_position + attacker.get_height()))
+        dropped = self._drops.get(attacker.get_id())
+        if dropped is None:
+            return found
+        for item_id in list(dropped):
+            if item_id in found:  # still standing on what it dropped
+                found.remove(item_id)
+            else:
+                self._forget_drop(item_id)
+        return found
+
+    def __len__(self):
+        """Return the number of items on the ground.
+
+        :return:
+        """
+        return len(self._boxes)
+
+
+class TimingWheel:
+    """A hashed timing wheel of keys that expire on a tick.
+
+    Keys are hashed into the slot of their deadline tick. Advancing to a tick
+    only looks at that one slot, and keys due in a later turn of the wheel
+    are put back. Cancelling just forgets the deadline, and the stale slot
+    entry is skipped when its slot comes up, so every operation is O(1) per
+    key and nothing scans the live keys each tick.
+    """
+
+    def __init__(self, slot_count):
+        """Initiate self variables.
+
+        :param slot_count:
+        """
+        self._slots = [[] for slot in range(slot_count)]
+        self._deadlines = {}
+
+    def schedule(self, key, tick):
+        """Make a key expire on a tick.
+
+        :param key:
+        :param tick:
+        :return:
+        """
+        self._deadlines[key] = tick
+        self._slots[tick % len(self._slots)].append(key)
+
+    def cancel(self, key):
+        """Stop a key from expiring.
+
+        :param key:
+        :return:
+        """
+        self._deadlines.pop(key, None)
+
+    def get_deadline(self, key):
+        """Return the tick a key expires on, or None.
+
+        :param key:
+        :return:
+        """
+        return self._deadlines.get(key)
+
+    def advance(self, tick):
+        """Return the keys that expire on a tick, in scheduling order.
+
+        Must be called for every tick in turn.
+        :param tick:
+        :return:
+        """
+        index = tick % len(self._slots)
+        slot = self._slots[index]
+        if not slot:
+            return []
+        self._slots[index] = []
+        expired = []
+        for key in slot:
+            deadline = self._deadlines.get(key)
+            if deadline is None:  # cancelled
+                continue
+            if deadline <= tick:
+                del self._deadlines[key]
+                expired.append(key)
+            else:  # due on a later turn of the wheel
+                self._slots[index].append(key)
+        return expired
+
+    def get_keys(self):
+        """Return every key waiting to expire.
+
+        :return:
+        """
+        return list(self._deadlines)
+
+    def clear(self):
+        """Forget every key.
+
+        :return:
+        """
+        for slot in self._slots:
+            slot.clear()
+        self._deadlines.clear()
+
+    def __len__(self):
+        """Return the number of keys waiting to expire.
+
+        :return:
+        """
+        return len(self._deadlines)
+
+
+class AIScheduler:
+    """Serves enemy decisions round robin within a time budget per tick.
+
+    Enemies that need a new plan queue up in the order they asked. Each tick
+    the queue is served from the front until the budget runs out, and the
+    rest keep executing their last plan, so the enemies left over are the
+    first served next tick. Without a budget every decision is served.
+    """
+
+    # number of recent decisions the wait statistics are taken over
+    _WINDOW = 600
+
+    def __init__(self, budget=None):
+        """Initiate self variables.
+
+        :param budget: milliseconds of decisions per tick, or None
+        """
+        self._budget = budget / 1000 if budget is not None else None
+        # key -> tick it started waiting on, in the order they asked
+        self._waiting = collections.OrderedDict()
+        self._waits = collections.deque(maxlen=AIScheduler._WINDOW)
+        self._served = 0
+        self._served_total = 0
+
+    def request(self, key, tick):
+        """Queue a key for a decision, if it is not already waiting.
+
+        :param key:
+        :param tick:
+        :return:
+        """
+        if key not in self._waiting:
+            self._waiting[key] = tick
+
+    def forget(self, key):
+        """Stop waiting on a key.
+
+        :param key:
+        :return:
+        """
+        self._waiting.pop(key, None)
+
+    def serve(self, tick, decide):
+        """Call decide for waiting keys, oldest first, within the budget.
+
+        At least one key is served every tick, so the queue always drains.
+        :param tick:
+        :param decide: called with each key served
+        :return:
+        """
+        start = time.perf_counter()
+        served = 0
+        while self._waiting:
+            if self._budget is not None and served and \
+                    time.perf_counter() - start >= self._budget:
+                break
+            key, waiting_since = self._waiting.popitem(last=False)
+            decide(key)
+            self._waits.append(tick - waiting_since)
+            served += 1
+        self._served = served
+        self._served_total += served
+
+    def clear(self):
+        """Forget every waiting key.
+
+        :return:
+        """
+        self._waiting.clear()
+
+    def get_stats(self, tick):
+        """Return the budget, decisions served and how stale they were.
+
+        Wait times are in ticks, from asking for a decision to getting one.
+        :param tick:
+        :return:
+        """
+        oldest = next(iter(self._waiting.values()), tick)
+        return {"budget_ms": self._budget * 1000
+                if self._budget is not None else None,
+                "served": self._served,
+                "served_total": self._served_total,
+                "waiting": len(self._waiting),
+                "oldest_wait_ticks": tick - oldest,
+                "mean_wait_ticks": sum(self._waits) / len(self._waits)
+                if self._waits else 0.0,
+                "max_wait_ticks": max(self._waits, default=0)}
+
+
+class EnemySwarm:
+    """Positions, speeds and destinations of every enemy in NumPy arrays.
+
+    Each enemy owns a row of every column. Every tick the headings of
+    enemies given a new destination, the arrival check, the movement step
+    and a check for ground items under each enemy are done for all rows at
+    once, and only positions that changed are written back to the enemy
+    objects, which marks them for the next canvas sync. Enemy positions must
+    only be changed by the swarm.
+    """
+
+    # name, type and width of each column
+    COLUMNS = (("positions", float, 2),  # top left corners
+               ("offsets", float, 2),  # top left corner to centre
+               ("speeds", float, 2),
+               ("destinations", float, 2),
+               ("active", bool, 1),
+               ("heading_pending", bool, 1),
+               ("arrived", bool, 1),
+               ("touching", bool, 1),  # standing on a ground item
+               ("moved", bool, 1))
+    _INITIAL_CAPACITY = 128
+
+    def __init__(self, speed, arrival_margin):
+        """Initiate self variables.
+
+        :param speed: speed enemies walk towards a destination at
+        :param arrival_margin: distance from a destination that counts as
+            having arrived
+        """
+        self._speed = speed
+        self._margin = arrival_margin
+        self._enemies = []
+        self._free_rows = []
+        # flags of the last step as lists, which are quicker to index
+        self._arrived_flags = []
+        self._touching_flags = []
+        self._grow(EnemySwarm._INITIAL_CAPACITY)
+
+    def _allocate(self, name, dtype, shape):
+        """Return a new zeroed column.
+
+        :param name:
+        :param dtype:
+        :param shape:
+        :return:
+        """
+        return numpy.zeros(shape, dtype)
+
+    def _grow(self, capacity):
+        """Make room for more rows, keeping the rows already in use.
+
+        :param capacity:
+        :return:
+        """
+        old_capacity = len(self._enemies)
+        for name, dtype, width in self.COLUMNS:
+            column = self._allocate(name, dtype, (capacity, width)
+                                    if width > 1 else (capacity,))
+            if old_capacity:
+                column[:old_capacity] = getattr(self, "_" + name)
+            setattr(self, "_" + name, column)
+        added = capacity - old_capacity
+        self._enemies.extend([None] * added)
+        self._arrived_flags.extend([False] * added)
+        self._touching_flags.extend([False] * added)
+        # lowest rows are handed out first
+        self._free_rows = list(range(capacity - 1, old_capacity - 1, -1)) + \
+            self._free_rows
+
+    def get_columns(self):
+        """Return the columns by name.
+
+        :return:
+        """
+        return {name: getattr(self, "_" + name)
+                for name, dtype, width in self.COLUMNS}
+
+    def add(self, enemy):
+        """Give an enemy a row, standing still at its position.
+
+        :param enemy:
+        :return: the row
+        """
+        if not self._free_rows:
+            self._grow(len(self._enemies) * 2)
+        row = self._free_rows.pop()
+        self._positions[row] = enemy.get_position()
+        self._offsets[row] = (enemy.get_width() / 2, enemy.get_height() / 2)
+        self._speeds[row] = 0
+        self._destinations[row] = enemy.coordinates()
+        self._active[row] = True
+        self._heading_pending[row] = False
+        self._moved[row] = False
+        self._enemies[row] = enemy
+        self._arrived_flags[row] = False
+        self._touching_flags[row] = False
+        return row
+
+    def remove(self, row):
+        """Free the row of an enemy that left the game.
+
+        :param row:
+        :return:
+        """
+        self._active[row] = False
+        self._heading_pending[row] = False
+        self._arrived[row] = False
+        self._touching[row] = False
+        self._moved[row] = False
+        self._enemies[row] = None
+        self._free_rows.append(row)
+
+    def clear(self):
+        """Free every row.
+
+        :return:
+        """
+        for row in numpy.flatnonzero(self._active).tolist():
+            self.remove(row)
+
+    def close(self):
+        """Release anything held outside the swarm, once the match is over.
+
+        :return:
+        """
+
+    def get_speed(self, row):
+        """Return the x and y speed of a row.
+
+        :param row:
+        :return:
+        """
+        if self._heading_pending[row]:
+            EnemySwarm.point_rows(self.get_columns(), numpy.flatnonzero(
+                self._heading_pending), self._speed)
+        return self._speeds[row].tolist()
+
+    def set_speed(self, row, x_speed, y_speed):
+        """Set the x and y speed of a row.
+
+        :param row:
+        :param x_speed:
+        :param y_speed:
+        :return:
+        """
+        self._speeds[row] = (x_speed, y_speed)
+        self._heading_pending[row] = False
+
+    def get_destination(self, row):
+        """Return the destination of a row.
+
+        :param row:
+        :return:
+        """
+        return self._destinations[row].tolist()
+
+    def set_destination(self, row, destination_x, destination_y,
+                        steer=False):
+        """Set the destination of a row.
+
+        :param row:
+        :param destination_x:
+        :param destination_y:
+        :param steer: head for the destination at the swarm speed, worked
+            out with every other new heading before the next step
+        :return:
+        """
+        self._destinations[row] = (destination_x, destination_y)
+        if steer:
+            self._heading_pending[row] = True
+
+    def has_arrived(self, row):
+        """Return whether a row was at its destination in the last step.
+
+        :param row:
+        :return:
+        """
+        return self._arrived_flags[row]
+
+    def is_touching_items(self, row):
+        """Return whether a row stood on a ground item after the last step.
+
+        :param row:
+        :return:
+        """
+        return self._touching_flags[row]
+
+    def step(self, item_boxes=()):
+        """Check arrivals, move every row that has not arrived and look for
+        ground items under every row.
+
+        :param item_boxes: arrays of the (left, top, right, bottom) boxes of
+            the items on the ground
+        :return:
+        """
+        columns = self.get_columns()
+        EnemySwarm.step_rows(columns, numpy.flatnonzero(self._active),
+                             EnemySwarm.join_boxes(item_boxes), self._speed,
+                             self._margin)
+        self._write_back()
+
+    def _write_back(self):
+        """Write moved positions to their enemies and keep the step flags.
+
+        :return:
+        """
+        rows = numpy.flatnonzero(self._moved)
+        enemies = self._enemies
+        for row, (x_position, y_position) in zip(
+                rows.tolist(), self._positions[rows].tolist()):
+            enemies[row].set_position(x_position, y_position)
+        self._arrived_flags = self._arrived.tolist()
+        self._touching_flags = self._touching.tolist()
+
+    @staticmethod
+    def join_boxes(item_boxes):
+        """Return boxes from several arrays as one array.
+
+        :param item_boxes:
+        :return:
+        """
+        item_boxes = [boxes for boxes in item_boxes if len(boxes)]
+        if not item_boxes:
+            return numpy.zeros((0, 4))
+        return numpy.concatenate(item_boxes)
+
+    @staticmethod
+    def point_rows(columns, rows, speed):
+        """Point rows straight at their destinations at a speed.
+
+        :param columns: the columns by name
+        :param rows: indices of the rows
+        :param speed:
+        :return:
+        """
+        if not len(rows):
+            return
+        differences = columns["destinations"][rows] - (
+            columns["positions"][rows] + columns["offsets"][rows])
+        angles = numpy.arctan2(differences[:, 1], differences[:, 0])
+        columns["speeds"][rows, 0] = speed * numpy.cos(angles)
+        columns["speeds"][rows, 1] = speed * numpy.sin(angles)
+        columns["heading_pending"][rows] = False
+
+    @staticmethod
+    def step_rows(columns, rows, items, speed, margin):
+        """Step some rows, in place in the columns.
+
+        Points the rows given a new destination at it, checks arrivals,
+        moves the rows that have not arrived and marks the rows standing on
+        an item. Only the given rows are read from or written to, so rows
+        can be stepped in separate processes.
+        :param columns: the columns by name
+        :param rows: indices of the rows
+        :param items: array of (left, top, right, bottom) item boxes
+        :param speed:
+        :param margin:
+        :return:
+        """
+        EnemySwarm.point_rows(columns, rows[columns["heading_pending"][rows]],
+                              speed)
+        positions = columns["positions"][rows]
+        offsets = columns["offsets"][rows]
+        speeds = columns["speeds"][rows]
+        centres = positions + offsets
+        low = columns["destinations"][rows] - margin
+        high = columns["destinations"][rows] + margin
+        # compared as [x, y] lists are, so in practice only x decides
+        above_low = (low[:, 0] < centres[:, 0]) | \
+            ((low[:, 0] == centres[:, 0]) & (low[:, 1] < centres[:, 1]))
+        below_high = (centres[:, 0] < high[:, 0]) | \
+            ((centres[:, 0] == high[:, 0]) & (centres[:, 1] < high[:, 1]))
+        arrived = above_low & below_high
+        moved = ~arrived & (speeds != 0).any(axis=1)
+        positions[moved] += speeds[moved]
+        columns["positions"][rows] = positions
+        columns["arrived"][rows] = arrived
+        columns["moved"][rows] = moved
+        if not len(items):
+            columns["touching"][rows] = False
+            return
+        # the same inclusive box test ground item queries use
+        lefts, tops = positions[:, 0:1], positions[:, 1:2]
+        rights, bottoms = lefts + 2 * offsets[:, 0:1], \
+            tops + 2 * offsets[:, 1:2]
+        columns["touching"][rows] = (
+            (items[:, 0] <= rights) & (items[:, 2] >= lefts) &
+            (items[:, 1] <= bottoms) & (items[:, 3] >= tops)).any(axis=1)
+
+
+class EntityTable:
+    """Hands out generational integer handles for live entities.
+
+    A handle packs a slot index with the generation of that slot. Removing
+    an entity frees its slot and bumps the generation, so a handle kept by
+    someone else stops resolving even after the slot is reused, and
+    looking an entity up is a couple of list reads.
+    """
+
+    _INDEX_BITS = 24
+    _INDEX_MASK = (1 << _INDEX_BITS) - 1
+
+    def __init__(self):
+        """Initiate self variables."""
+        self._entities = []
+        self._generations = []
+        self._free_slots = []
+
+    def add(self, entity):
+        """Store an entity and return its handle.
+
+        :param entity:
+        :return:
+        """
+        if self._free_slots:
+            index = self._free_slots.pop()
+            self._entities[index] = entity
+        else:
+            index = len(self._entities)
+            self._entities.append(entity)
+            self._generations.append(0)
+        return (self._generations[index] << EntityTable._INDEX_BITS) | index
+
+    def remove(self, handle):
+        """Free the slot of a handle. Stale handles are ignored.
+
+        :param handle:
+        :return:
+        """
+        if not self.is_alive(handle):
+            return
+        index = handle & EntityTable._INDEX_MASK
+        self._entities[index] = None
+        self._generations[index] += 1
+        self._free_slots.append(index)
+
+    def is_alive(self, handle):
+        """Return whether a handle still refers to a stored entity.
+
+        :param handle:
+        :return:
+        """
+        if handle is None:
+            return False
+        index = handle & EntityTable._INDEX_MASK
+        return index < len(self._entities) and \
+            self._generations[index] == handle >> EntityTable._INDEX_BITS \
+            and self._entities[index] is not None
+
+    def get(self, handle):
+        """Return the entity of a handle, or None if it has been removed.
+
+        :param handle:
+        :return:
+        """
+        if not self.is_alive(handle):
+            return None
+        return self._entities[handle & EntityTable._INDEX_MASK]
+
+    def __len__(self):
+        """Return the number of live entities.
+
+        :return:
+        """
+        return len(self._entities) - len(self._free_slots)
+
+
+class CanvasSprite:
+    """A canvas image with extended functionality."""
+
+    # every live sprite, their ids are handles into this table
+    ENTITIES = EntityTable()
+
+    @staticmethod
+    def calculate_distance_difference(position_1, position_2):
+        """Calculate the distance difference between two points.
+
+        Takes 2 lists of 2 components, x component and y component,
+        then returns difference.
+        :param position_1:
+        :param position_2:
+        :return:
+        """
+        x_difference = position_2[0] - position_1[0]
+        y_difference = position_2[1] - position_1[1]
+        return x_difference, y_difference
+
+    def __init__(self, canvas, x_position, y_position, width, height,
+                 image_path):
+        """Initiate self variables.
+
+        Sets self variables and creates the canvas sprite image using a
+        ImageTk photo image.
+        :param canvas:
+        :param x_position:
+        :param y_position:
+        :param width:
+        :param height:
+        :param image_path:
+        """
+        self._id = CanvasSprite.ENTITIES.add(self)
+        self._canvas = canvas
+        self._width = width
+        self._height = height
+        # photo images are shared between sprites with the same image
+        self._photo_image = SpriteImageCache.get_image(
+            self._canvas, image_path, self._width, self._height)
+        # create a canvas rectangle object with passed in variables
+        self._canvas_object = \
+            self._canvas.create_image(x_position, y_position,
+                                      image=self._photo_image, anchor="nw")
+        self._add_tag(GameController.ID_START+str(self._id))
+        # own top left position, the canvas is only told when it changes
+        self._x_position = x_position
+        self._y_position = y_position
+        self._position_dirty = False
+        self._deleted = False
+
+    def get_id(self):
+        """Get id.
+
+        Returns the id of self, a handle into the entity table.
+        :return:
+        """
+        return self._id
+
+    def _get_ids_from_canvas_objects(self, objects_list):
+        """Create a list of ids of passed in objects.
+
+        Takes a list of canvas object and gets their object ids from their
+        canvas tags, then returns said list.
+        :param objects_list:
+        :return:
+        """
+        return [CanvasSprite.get_id_from_tags(self._canvas.gettags(
+            canvas_object)) for canvas_object in objects_list]
+
+    @staticmethod
+    def get_id_from_tags(tags):
+        """Return the entity id held in a canvas tag list, or None.
+
+        :param tags:
+        :return:
+        """
+        # get the first tag that starts with the ID_START string
+        id_tag = next((tag for tag in tags
+                       if tag.startswith(GameController.ID_START)), None)
+        if id_tag is None:
+            return None
+        return int(id_tag[len(GameController.ID_START):])
+
+    def get_width(self):
+        """Get width.
+
+        Returns own width.
+        :return:
+        """
+        return self._width
+
+    def get_height(self):
+        """Get height.
+
+        Returns own height.
+        :return:
+        """
+        return self._height
+
+    def _add_tag(self, tag):
+        """Add a tag to the canvas object.
+
+        Adds passed in tag to canvas object.
+        :param tag:
+        :return:
+        """
+        self._canvas.addtag(tag, 'withtag', self.get_canvas_object())
+
+    def _remove_tag(self, tag):
+        """Remove a tag from the canvas object.
+
+        :param tag:
+        :return:
+        """
+        self._canvas.dtag(self.get_canvas_object(), tag)
+
+    def get_canvas_object(self):
+        """Return the canvas object.
+
+        Returns the canvas object.
+        :return:
+        """
+        return self._canvas_object
+
+    def coordinates(self):
+        """Get and return the object coordinates.
+
+        Returns the centre coordinates of the object.
+        :return:
+        """
+        # add width and height to x and y coords to get centre coords
+        return [self._x_position + self._width/2,
+                self._y_position + self._height/2]
+
+    def get_position(self):
+        """Return the top left coordinates of the object.
+
+        :return:
+        """
+        return [self._x_position, self._y_position]
+
+    def set_position(self, x_position, y_position):
+        """Set the top left coordinates of the object.
+
+        Marks the object dirty only if the position actually changed, so the
+        next canvas sync can skip objects that did not move.
+        :param x_position:
+        :param y_position:
+        :return:
+        """
+        if x_position != self._x_position or y_position != self._y_position:
+            self._x_position = x_position
+            self._y_position = y_position
+            self._position_dirty = True
 
-    def get_canvas_object(self):
-        """Return the canvas object.
+    def sync_canvas(self, canvas):
+        """Send own position to the canvas if it changed since the last sync.
 
-        Returns the canvas object.
+        Returns the number of canvas updates issued.
+        :param canvas: own canvas, or a batch collecting its updates
         :return:
         """
-        return self._canvas_object
+        if not self._position_dirty or self._deleted:
+            return 0
+        canvas.coords(self._canvas_object, self._x_position,
+                      self._y_position)
+        self._position_dirty = False
+        return 1
 
-    def coordinates(self):
-        """Get and return the canvas object coordinates.
+    def exists_on_canvas(self):
+        """Return whether own canvas object has not been deleted.
 
-        Returns the centre coordinates of the canvas object.
         :return:
         """
-        coordinates = self._canvas.coords(self._canvas_object)
-        # add width and height to x and y coords to get centre coords
-        coordinates[0] += self._width/2
-        coordinates[1] += self._height/2
-        return coordinates
+        return not self._deleted
 
     def get_overlapping(self):
         """Get overlapping canvas objects.
@@ -921,6 +3091,8 @@ class CanvasSprite:
         :return:
         """
         self._canvas.delete(self.get_canvas_object())
+        self._deleted = True
+        CanvasSprite.ENTITIES.remove(self._id)
 
 
 class MovingObject(CanvasSprite):
@@ -950,8 +3122,22 @@ class MovingObject(CanvasSprite):
         Moves the canvas object by the x and y speed of self.
         :return:
         """
-        self._canvas.move(self.get_canvas_object(), self._x_speed,
-                          self._y_speed)
+        self.set_position(self._x_position + self._x_speed,
+                          self._y_position + self._y_speed)
+
+    def get_x_speed(self):
+        """Get own x speed.
+
+        :return:
+        """
+        return self._x_speed
+
+    def get_y_speed(self):
+        """Get own y speed.
+
+        :return:
+        """
+        return self._y_speed
 
     def set_x_speed(self, new_x_speed):
         """Set own x speed.
@@ -1072,8 +3258,15 @@ class Attacker(MovingObject):
         Sets the coordinates of the health bar to own coordinates.
         :return:
         """
-        self._canvas.coords(self._health_bar.get_text_object(),
-                            *self._health_bar.calculate_owner_coordinates())
+        self._health_bar.set_position(
+            *self._health_bar.calculate_owner_coordinates())
+
+    def get_health_bar(self):
+        """Return own health bar instance.
+
+        :return:
+        """
+        return self._health_bar
 
     def add_gun(self, gun):
         """Add a gun.
@@ -1139,14 +3332,15 @@ class Attacker(MovingObject):
         # returns dictionary containing lists of overlapping items
         return overlapping_dictionary
 
-    def shoot_gun(self, destination_coordinates):
+    def shoot_gun(self, destination_coordinates, tick):
         """Shoot own gun.
 
-        Returns a bullet object from shooting gun.
+        Returns a bullet object, or a hitscan shot, from shooting gun.
         :param destination_coordinates:
+        :param tick: the current tick
         :return:
         """
-        return self._gun.shoot(destination_coordinates)
+        return self._gun.shoot(destination_coordinates, tick)
 
     def handle_gun(self):
         """Handle own gun.
@@ -1154,8 +3348,7 @@ class Attacker(MovingObject):
         Moves the gun to own coordinates.
         :return:
         """
-        self._canvas.coords(self.get_gun().get_canvas_object(),
-                            *self.coordinates())
+        self.get_gun().set_position(*self.coordinates())
 
     def damage(self, damage_value):
         """Damage self.
@@ -1189,6 +3382,15 @@ class Attacker(MovingObject):
         """
         return self._health
 
+    def set_health(self, health):
+        """Set health to a passed in value and update the health bar.
+
+        :param health:
+        :return:
+        """
+        self._health = health
+        self._health_bar.update_health_text()
+
     def delete_canvas_object(self):
         """Delete own canvas object.
 
@@ -1249,17 +3451,17 @@ class Player(Attacker):
         :return:
         """
         if self.coordinates()[0] < left_boundary:
-            self._canvas.move(self.get_canvas_object(),
-                              Player.DEFAULT_SPEED, 0)
+            self.set_position(self._x_position + Player.DEFAULT_SPEED,
+                              self._y_position)
         elif self.coordinates()[0] > right_boundary:
-            self._canvas.move(self.get_canvas_object(),
-                              -Player.DEFAULT_SPEED, 0)
+            self.set_position(self._x_position - Player.DEFAULT_SPEED,
+                              self._y_position)
         if self.coordinates()[1] < top_boundary:
-            self._canvas.move(self.get_canvas_object(),
-                              0, Player.DEFAULT_SPEED)
+            self.set_position(self._x_position,
+                              self._y_position + Player.DEFAULT_SPEED)
         elif self.coordinates()[1] > bottom_boundary:
-            self._canvas.move(self.get_canvas_object(),
-                              0, -Player.DEFAULT_SPEED)
+            self.set_position(self._x_position,
+                              self._y_position - Player.DEFAULT_SPEED)
 
 
 class Enemy(Attacker):
@@ -1271,77 +3473,150 @@ class Enemy(Attacker):
     _DEFAULT_SPEED = 2
     _STARTING_HEALTH = 100
     _DETECTION_RADIUS = 500
-    # how far a random destination can be from own coordinates
-    _RANDOM_DESTINATION_VARIANCE = 100
+    # how far an idle enemy walks along a heading before looking again
+    _IDLE_STEP = 100
     _ERROR_MARGIN = 1  # margin for which coordinates can be between
     # spawn numbers
 
-    def __init__(self, canvas, x_position, y_position):
+    def __init__(self, canvas, x_position, y_position, swarm):
         """Initiate self variables.
 
         Declare self variables and Super parent class init to run its code.
+        Own position, speed and destination are kept in a row of the swarm,
+        which moves every enemy at once.
         :param canvas:
         :param x_position:
         :param y_position:
+        :param swarm: an EnemySwarm made by create_swarm
         """
         super().__init__(canvas, x_position, y_position, Enemy._WIDTH,
                          Enemy._HEIGHT, Enemy._IMAGE_PATH,
                          Enemy._STARTING_HEALTH)
-        self._destination = []
-        self.generate_destination()
+        # start without a destination, one is found on the first tick
+        self._swarm = swarm
+        self._row = swarm.add(self)
         self._detection_radius = Enemy._DETECTION_RADIUS
         self._target = None
         self._has_target = False
 
+    @staticmethod
+    def create_swarm(swarm_type=EnemySwarm, **options):
+        """Return a swarm moving enemies at the enemy speed.
+
+        :param swarm_type: EnemySwarm or a subclass of it
+        :param options: passed on to the swarm
+        :return:
+        """
+        return swarm_type(Enemy._DEFAULT_SPEED, Enemy._ERROR_MARGIN,
+                          **options)
+
     def check_destination(self):
         """Check if reached destination.
 
         Checks if destination has been reached, within a small margin.
         :return:
         """
-        # create a low and high margin of error for which the coordinates
-        # can be between to trigger the if statement
-        lowest_margin = [coordinate - Enemy._ERROR_MARGIN for
-                         coordinate in self._destination]
-        highest_margin = [coordinate + Enemy._ERROR_MARGIN for
-                          coordinate in self._destination]
-        if lowest_margin < self.coordinates() < highest_margin:
-            return False
-        else:
-            return True
+        destination_x, destination_y = self.get_destination()
+        own_x, own_y = self.coordinates()
+        # the coordinates are compared as lists against a low and high
+        # margin of error, so x decides unless it is exactly on a margin
+        above_lowest = (destination_x - Enemy._ERROR_MARGIN, destination_y -
+                        Enemy._ERROR_MARGIN) < (own_x, own_y)
+        below_highest = (own_x, own_y) < (destination_x + Enemy._ERROR_MARGIN,
+                                          destination_y + Enemy._ERROR_MARGIN)
+        return not (above_lowest and below_highest)
+
+    def has_arrived(self):
+        """Return whether the last swarm step found own destination reached.
+
+        :return:
+        """
+        return self._swarm.has_arrived(self._row)
 
-    def generate_destination(self):
-        """Generate semi random destination.
+    def is_on_ground_items(self):
+        """Return whether the last swarm step found self on a ground item.
 
-        Generates a random destination based off the centre of the zone.
         :return:
         """
-        centre_x = GameController.CANVAS_WIDTH/2
-        centre_y = GameController.CANVAS_HEIGHT/2
-        own_x = self.coordinates()[0]
-        own_y = self.coordinates()[1]
+        return self._swarm.is_touching_items(self._row)
 
-        # if the centre x of the zone is greater than own x, choose an x
-        # to the right of current position
-        if centre_x > own_x:
-            new_x = random.uniform(own_x,
-                                   own_x + Enemy._RANDOM_DESTINATION_VARIANCE)
-        else:
-            new_x = random.uniform(own_x,
-                                   own_x - Enemy._RANDOM_DESTINATION_VARIANCE)
-        # if the centre y of the zone is greater than own y, choose a y
-        # below the current position
-        if centre_y > own_y:
-            new_y = random.uniform(own_y,
-                                   own_y + Enemy._RANDOM_DESTINATION_VARIANCE)
-        else:
-            new_y = random.uniform(own_y,
-                                   own_y - Enemy._RANDOM_DESTINATION_VARIANCE)
+    def leave_swarm(self):
+        """Free own swarm row, once removed from the game.
+
+        :return:
+        """
+        self._swarm.remove(self._row)
+
+    def get_x_speed(self):
+        """Get own x speed.
+
+        :return:
+        """
+        return self._swarm.get_speed(self._row)[0]
+
+    def get_y_speed(self):
+        """Get own y speed.
+
+        :return:
+        """
+        return self._swarm.get_speed(self._row)[1]
+
+    def set_x_speed(self, new_x_speed):
+        """Set own x speed.
+
+        :param new_x_speed:
+        :return:
+        """
+        self._swarm.set_speed(self._row, new_x_speed, self.get_y_speed())
+
+    def set_y_speed(self, new_y_speed):
+        """Set own y speed.
 
-        self._destination = [new_x, new_y]
+        :param new_y_speed:
+        :return:
+        """
+        self._swarm.set_speed(self._row, self.get_x_speed(), new_y_speed)
+
+    def follow_heading(self, x_heading, y_heading):
+        """Walk a short step along a unit heading.
+
+        :param x_heading:
+        :param y_heading:
+        :return:
+        """
+        own_x, own_y = self.coordinates()
+        self._swarm.set_destination(self._row,
+                                    own_x + x_heading * Enemy._IDLE_STEP,
+                                    own_y + y_heading * Enemy._IDLE_STEP)
+        self._swarm.set_speed(self._row, x_heading * Enemy._DEFAULT_SPEED,
+                              y_heading * Enemy._DEFAULT_SPEED)
+
+    def get_destination(self):
+        """Return own destination coordinates.
+
+        :return:
+        """
+        return self._swarm.get_destination(self._row)
+
+    def set_destination_coordinates(self, destination_x, destination_y):
+        """Set own destination to passed in coordinates.
+
+        :param destination_x:
+        :param destination_y:
+        :return:
+        """
+        self._swarm.set_destination(self._row, destination_x, destination_y)
+
+    def get_vision_box(self):
+        """Return the (left, top, right, bottom) box own vision covers.
 
-        self._set_speed_to_point(*self._destination, Enemy._DEFAULT_SPEED,
-                                 Enemy._DEFAULT_SPEED)
+        :return:
+        """
+        own_x, own_y = self.coordinates()
+        return (own_x - self._detection_radius,
+                own_y - self._detection_radius,
+                own_x + self._detection_radius,
+                own_y + self._detection_radius)
 
     def scan_vision(self, tag):
         """Find enemies within the vision radius.
@@ -1374,21 +3649,21 @@ class Enemy(Attacker):
         """Set own destination.
 
         Sets coordinates of passed in instance, then sets as destination.
+        The swarm works out the heading towards it with the rest.
         :param item:
         :return:
         """
-        self._destination = item.coordinates()
-        self._set_speed_to_point(*self._destination, Enemy._DEFAULT_SPEED,
-                                 Enemy._DEFAULT_SPEED)
+        self._swarm.set_destination(self._row, *item.coordinates(),
+                                    steer=True)
 
     def add_target(self, target):
         """Add passed in target.
 
-        Sets own target to passed in variable and condition to true.
+        Keeps the id of the passed in target and sets condition to true.
         :param target:
         :return:
         """
-        self._target = target
+        self._target = target.get_id()
         self._has_target = True
 
     def remove_target(self):
@@ -1411,20 +3686,22 @@ class Enemy(Attacker):
     def get_target(self):
         """Return own target.
 
-        Returns own target, an instance.
+        Returns the id of own target, which may no longer be alive.
         :return:
         """
         return self._target
 
-    def attack_target(self):
+    def attack_target(self, tick):
         """Attack own target.
 
         Get target coordinates and returns a shot to that location.
+        :param tick: the current tick
         :return:
         """
-        target_coordinates = self._target.coordinates()
+        target_coordinates = \
+            CanvasSprite.ENTITIES.get(self._target).coordinates()
         # return a bullet created
-        return self.shoot_gun(target_coordinates)
+        return self.shoot_gun(target_coordinates, tick)
 
     def cleanup(self):
         """Cleanup references.
@@ -1466,15 +3743,38 @@ class Gun(CanvasSprite):
                         GameController.RARITIES[rarity]["damage_multiplier"])
         self._fire_rate = gun_properties['fire_rate']
         self._spray = gun_properties['spray']
+        # ticks a bullet flies before it has covered the gun's range
+        self._bullet_lifetime = Bullet.calculate_lifetime(
+            gun_properties['range'])
+        self._range = gun_properties['range']
+        self._hitscan = gun_properties['hitscan']
 
         super().__init__(canvas, x_position, y_position, width, height,
                          image_path)
 
         self._add_tag(Gun.GUN_TAG)
-        self._time_since_last_shot = time.time()
+        self._gun_properties = gun_properties
+        self._rarity = rarity
+        # tick of the last shot, guns fire on game time so that fast
+        # forwarded ticks keep the same fire rate
+        self._last_shot_tick = -math.inf
         self._owner = None
         self._has_owner = False
 
+    def get_gun_properties(self):
+        """Return the gun properties dict this gun was made from.
+
+        :return:
+        """
+        return self._gun_properties
+
+    def get_rarity(self):
+        """Return own rarity name.
+
+        :return:
+        """
+        return self._rarity
+
     def add_owner(self, owner):
         """Add passed in owner.
 
@@ -1484,16 +3784,32 @@ class Gun(CanvasSprite):
         """
         self._owner = owner
         self._has_owner = True
+        self.add_owned_tag()
+
+    def add_owned_tag(self):
+        """Add the owned tag, which hides the gun from pick ups and scans.
+
+        :return:
+        """
         self._add_tag(Gun.OWNED_TAG)  # add the gun owned tag
 
+    def has_owned_tag(self):
+        """Return whether own canvas object has the owned tag.
+
+        :return:
+        """
+        return Gun.OWNED_TAG in self._canvas.gettags(self._canvas_object)
+
     def remove_owner(self):
         """Remove own owner.
 
-        Sets own owner to None, and changes bool has_owner to False.
+        Sets own owner to None, and changes bool has_owner to False. The
+        owned tag is removed too, as the gun is back on the ground.
         :return:
         """
         self._owner = None
         self._has_owner = False
+        self._remove_tag(Gun.OWNED_TAG)
 
     def cleanup(self):
         """Cleanup references.
@@ -1503,25 +3819,55 @@ class Gun(CanvasSprite):
         """
         self._owner = None
 
-    def shoot(self, destination_coordinates):
+    def get_owner(self):
+        """Return own owner, or None.
+
+        :return:
+        """
+        return self._owner
+
+    def get_cooldown_elapsed(self, tick):
+        """Return the seconds of game time passed since the last shot.
+
+        :param tick: the current tick
+        :return:
+        """
+        return (tick - self._last_shot_tick) * GameController.TICK_SECONDS
+
+    def set_cooldown_elapsed(self, elapsed, tick):
+        """Set the last shot to a passed in number of seconds ago.
+
+        :param elapsed:
+        :param tick: the current tick
+        :return:
+        """
+        self._last_shot_tick = tick - elapsed / GameController.TICK_SECONDS
+
+    def shoot(self, destination_coordinates, tick):
         """Return a bullet object based on passed in coordinates.
 
         Check whether the fire rate time has passed. If it has, add spray to
-        destination and return a created bullet.
+        destination and return a created bullet, or for a hitscan gun a
+        HitscanShot reaching the gun's range towards the destination.
         :param destination_coordinates:
+        :param tick: the current tick
         :return:
         """
-        current_time = time.time()
         # check if fire rate time has passed since last shot
-        if current_time - self._time_since_last_shot > 1/self._fire_rate:
-            self._time_since_last_shot = current_time
+        if (tick - self._last_shot_tick) * GameController.TICK_SECONDS > \
+                1/self._fire_rate:
+            self._last_shot_tick = tick
             # add a random spray value to each coordinate in destination coords
             destination_with_spray = [coordinate + random.randint(
                 self._spray[0], self._spray[1]) for coordinate in
                                       destination_coordinates]
 
+            if self._hitscan:
+                return HitscanShot(self.coordinates(), destination_with_spray,
+                                   self._range, self._damage, self._owner)
             return Bullet(self._canvas, *self.coordinates(), self._damage,
-                          destination_with_spray, self._owner)
+                          destination_with_spray, self._owner,
+                          self._bullet_lifetime)
 
 
 class Bullet(MovingObject):
@@ -1534,7 +3880,7 @@ class Bullet(MovingObject):
     BULLET_TAG = "bullet"
 
     def __init__(self, canvas, x_position, y_position, damage, destination,
-                 owner):
+                 owner, lifetime):
         """
         Set up self variables and set the speed to destination.
 
@@ -1545,6 +3891,8 @@ class Bullet(MovingObject):
         :param y_position:
         :param damage:
         :param destination:
+        :param owner:
+        :param lifetime: ticks until the bullet expires
         """
         super().__init__(canvas, x_position, y_position, Bullet._WIDTH,
                          Bullet._HEIGHT, Bullet._IMAGE_PATH)
@@ -1552,9 +3900,59 @@ class Bullet(MovingObject):
         self._add_tag(Bullet.BULLET_TAG)
         self._damage = damage
         self._destination = destination
+        self._lifetime = lifetime
         self._set_speed_to_point(*destination, Bullet._DEFAULT_SPEED,
                                  Bullet._DEFAULT_SPEED)
 
+    @staticmethod
+    def calculate_lifetime(bullet_range):
+        """Return the ticks a bullet needs to travel a range.
+
+        :param bullet_range:
+        :return:
+        """
+        return math.ceil(bullet_range / Bullet._DEFAULT_SPEED)
+
+    def get_lifetime(self):
+        """Return the ticks the bullet lives for.
+
+        :return:
+        """
+        return self._lifetime
+
+    @staticmethod
+    def calculate_hit_time(start, velocity, box):
+        """Calculate when a moving point first enters a box.
+
+        Uses the slab method on a point moving from start by velocity over
+        one tick. Returns the fraction of the tick (0 to 1) at which the
+        point enters the (left, top, right, bottom) box, or None if it does
+        not touch the box during the tick.
+        :param start:
+        :param velocity:
+        :param box:
+        :return:
+        """
+        entry_time = 0.0
+        exit_time = 1.0
+        for axis in range(2):
+            low = box[axis]
+            high = box[axis + 2]
+            if velocity[axis] == 0:
+                # not moving on this axis, must already be inside the slab
+                if not low <= start[axis] <= high:
+                    return None
+                continue
+            low_time = (low - start[axis]) / velocity[axis]
+            high_time = (high - start[axis]) / velocity[axis]
+            if low_time > high_time:
+                low_time, high_time = high_time, low_time
+            entry_time = max(entry_time, low_time)
+            exit_time = min(exit_time, high_time)
+            if entry_time > exit_time:
+                return None
+        return entry_time
+
     def cleanup(self):
         """Cleanup references.
 
@@ -1580,6 +3978,60 @@ class Bullet(MovingObject):
         return self._owner
 
 
+class HitscanShot:
+    """A shot that hits instantly along a ray instead of flying."""
+
+    def __init__(self, start, destination, shot_range, damage, owner):
+        """Initiate self variables.
+
+        The ray starts at start and runs for the range towards destination.
+        :param start:
+        :param destination:
+        :param shot_range:
+        :param damage:
+        :param owner:
+        """
+        x_distance = destination[0] - start[0]
+        y_distance = destination[1] - start[1]
+        # a shot at its own start goes right, as the distance can not be 0
+        distance = math.hypot(x_distance, y_distance) or 1
+        if x_distance == y_distance == 0:
+            x_distance = 1
+        self._start = tuple(start)
+        self._end = (start[0] + x_distance / distance * shot_range,
+                     start[1] + y_distance / distance * shot_range)
+        self._damage = damage
+        self._owner = owner
+
+    def get_start(self):
+        """Return the point the shot is fired from.
+
+        :return:
+        """
+        return self._start
+
+    def get_end(self):
+        """Return the point the shot reaches if it hits nothing.
+
+        :return:
+        """
+        return self._end
+
+    def get_damage(self):
+        """Return the shot damage.
+
+        :return:
+        """
+        return self._damage
+
+    def get_owner(self):
+        """Return the attacker that fired the shot.
+
+        :return:
+        """
+        return self._owner
+
+
 class BattleBus(MovingObject):
     """A battle bus - moves from a point to a point carrying a passenger."""
 
@@ -1618,6 +4070,13 @@ class BattleBus(MovingObject):
         self._passenger = None
         self._has_passenger = False
 
+    def get_has_passenger(self):
+        """Return whether the bus still carries its passenger.
+
+        :return:
+        """
+        return self._has_passenger
+
     def move(self):
         """Move the battle bus and its passenger.
 
@@ -1628,8 +4087,7 @@ class BattleBus(MovingObject):
         super().move()  # runs the moving object move function, then extend
         if self._has_passenger:
             # move passenger to own coordinates
-            self._canvas.coords(self._passenger.get_canvas_object(),
-                                *self.coordinates())
+            self._passenger.set_position(*self.coordinates())
 
 
 class HealthBar:
@@ -1644,9 +4102,13 @@ class HealthBar:
         """
         self._owner = owner
         self._canvas = canvas
-        self._text_object = self._canvas.create_text(
-            *self.calculate_owner_coordinates(),
-            text=f"{self._owner.get_health()}")
+        self._position = self.calculate_owner_coordinates()
+        self._text = f"{self._owner.get_health()}"
+        self._text_object = self._canvas.create_text(*self._position,
+                                                     text=self._text)
+        # what changed since the last canvas sync
+        self._position_dirty = False
+        self._text_dirty = False
 
     def cleanup(self):
         """Cleanup references.
@@ -1670,11 +4132,43 @@ class HealthBar:
     def update_health_text(self):
         """Update the health text.
 
-        Sets the text of text object to the owner's health.
+        Sets the text of text object to the owner's health, if the shown
+        text would change.
+        :return:
+        """
+        text = f"{self._owner.get_health():.0f}"
+        if text != self._text:
+            self._text = text
+            self._text_dirty = True
+
+    def set_position(self, x_position, y_position):
+        """Set the position of the text, if it changed.
+
+        :param x_position:
+        :param y_position:
+        :return:
+        """
+        if [x_position, y_position] != self._position:
+            self._position = [x_position, y_position]
+            self._position_dirty = True
+
+    def sync_canvas(self, canvas):
+        """Send changed position and text to the canvas.
+
+        Returns the number of canvas updates issued.
+        :param canvas: own canvas, or a batch collecting its updates
         :return:
         """
-        self._canvas.itemconfigure(self._text_object,
-                                   text=f"{self._owner.get_health():.0f}")
+        updates = 0
+        if self._position_dirty:
+            canvas.coords(self._text_object, *self._position)
+            self._position_dirty = False
+            updates += 1
+        if self._text_dirty:
+            canvas.itemconfigure(self._text_object, text=self._text)
+            self._text_dirty = False
+            updates += 1
+        return updates
 
     def get_text_object(self):
         """Return own text object.
@@ -1694,76 +4188,332 @@ class HealthBar:
 
 
 class Zone:
-    """A zone - shrinks and damages entities outside radius."""
+    """A zone - follows its schedule and damages entities outside radius."""
 
     # damage the zone will do per tick
-    _ZONE_DAMAGE_TICK = 0.5
-    # rate at which the zone will shrink per tick
-    _ZONE_SHRINK_RATE = 1
+    ZONE_DAMAGE_TICK = 0.5
     _ZONE_MINIMUM_RADIUS = 500
     _ZONE_COLOUR = "pink"
 
-    def __init__(self, canvas, centre, radius):
+    def __init__(self, canvas, schedule, tick=0):
         """Initiate self variables.
 
         Sets up self variables and zone canvas object.
         :param canvas:
-        :param centre:
-        :param radius:
+        :param schedule:
+        :param tick:
         """
         self._canvas = canvas
-        self._radius = radius
-        self._centre = centre
+        self._schedule = schedule
+        self._centre, self._radius = self._schedule.state_at(tick)
         self._zone = self._canvas.create_oval(self._centre[0] - self._radius,
                                               self._centre[1] - self._radius,
                                               self._centre[0] + self._radius,
                                               self._centre[1] + self._radius,
                                               fill=Zone._ZONE_COLOUR)
+        self._dirty = False
+        # phase of the last tick the schedule was evaluated for
+        self._phase_index = self._schedule.get_phase_index(tick)
+
+    def update(self, tick):
+        """Move the zone to its scheduled state for a tick.
+
+        The state is evaluated directly from the schedule, only while a
+        phase is animating or on the first tick of a phase, which brings
+        the zone to where the phase before left it. During the rest of a
+        hold phase nothing changes, so the zone stays clean and the canvas
+        oval is left alone.
+        :param tick:
+        :return:
+        """
+        phase_index = self._schedule.get_phase_index(tick)
+        if phase_index == self._phase_index and \
+                not self._schedule.is_animating(tick):
+            return
+        self._phase_index = phase_index
+        centre, radius = self._schedule.state_at(tick)
+        if radius != self._radius or centre != self._centre:
+            self._centre = centre
+            self._radius = radius
+            self._dirty = True
+
+    def set_schedule(self, schedule, tick):
+        """Replace own schedule and jump to its state for a tick.
+
+        :param schedule:
+        :param tick:
+        :return:
+        """
+        self._schedule = schedule
+        self._phase_index = None
+        self.update(tick)
+
+    def get_schedule(self):
+        """Return own zone schedule.
+
+        :return:
+        """
+        return self._schedule
 
-    def shrink_zone(self):
-        """Shrink the zone by a set amount.
+    def sync_canvas(self, canvas):
+        """Resize the canvas oval if the zone changed since the last sync.
 
-        Subtracts the zone shrink rate from the radius then sets the
-        coordinates of the zone to new calculated coords from the new radius
+        Returns the number of canvas updates issued.
+        :param canvas: own canvas, or a batch collecting its updates
         :return:
         """
-        self._radius -= Zone._ZONE_SHRINK_RATE
-        if self._radius < Zone._ZONE_MINIMUM_RADIUS:
-            self._radius = Zone._ZONE_MINIMUM_RADIUS
+        if not self._dirty:
+            return 0
         # set zone coords to new calculated coords to shrink it
-        self._canvas.coords(self._zone, self._centre[0]-self._radius,
-                            self._centre[1]-self._radius,
-                            self._centre[0]+self._radius,
-                            self._centre[1]+self._radius)
+        canvas.coords(self._zone, self._centre[0]-self._radius,
+                      self._centre[1]-self._radius,
+                      self._centre[0]+self._radius,
+                      self._centre[1]+self._radius)
+        self._dirty = False
+        return 1
 
-    def _find_distance_to_attacker(self, attacker):
-        """Find the distance to given attacker.
+    def delete_canvas_object(self):
+        """Delete own canvas oval.
+
+        :return:
+        """
+        self._canvas.delete(self._zone)
+
+    def get_radius(self):
+        """Return own radius.
+
+        :return:
+        """
+        return self._radius
+
+    def get_centre(self):
+        """Return own centre coordinates.
 
-        Calculate distance from centre of zone to a given attacker.
-        :param attacker:
         :return:
         """
-        attacker_coordinates = attacker.coordinates()
-        own_coordinates = self._centre
-        # calculate distance from centre to attacker
-        distance = math.hypot(attacker_coordinates[0] - own_coordinates[0],
-                              attacker_coordinates[1] - own_coordinates[1])
-        return distance
+        return self._centre
 
     def check_attackers_inside(self, attackers):
         """Check if all attackers passed in are inside.
 
-        Check if distance to attacker is less than the radius.
+        Compares squared distances from the centre against the squared
+        radius, so no square roots are needed. Returns the attackers that
+        were outside and took damage.
         :param attackers:
         :return:
         """
+        damaged = []
+        centre_x, centre_y = self._centre
+        radius_squared = self._radius * self._radius
         for attacker in attackers:
-            distance_to_attacker = self._find_distance_to_attacker(attacker)
-            if distance_to_attacker < self._radius:  # if attacker in zone
-                continue  # continue (move to next iteration)
-            else:
-                # damage the attacker by set rate
-                attacker.damage(Zone._ZONE_DAMAGE_TICK)
+            attacker_x, attacker_y = attacker.coordinates()
+            x_distance = attacker_x - centre_x
+            y_distance = attacker_y - centre_y
+            # if attacker not in zone, damage the attacker by set rate
+            if x_distance * x_distance + y_distance * y_distance >= \
+                    radius_squared:
+                attacker.damage(Zone.ZONE_DAMAGE_TICK)
+                damaged.append(attacker)
+        return damaged
+
+
+class ZoneSchedule:
+    """A precomputed list of zone phases made from a seed.
+
+    The zone repeats a hold phase, a shrink phase and a move phase until it
+    reaches its minimum radius, then holds forever. Every phase has a closed
+    form centre and radius, so the zone state of any tick is found without
+    stepping through the ticks before it.
+    """
+
+    HOLD = "hold"
+    SHRINK = "shrink"
+    MOVE = "move"
+    _HOLD_TICKS = 300
+    _SHRINK_TICKS = 450
+    _MOVE_TICKS = 150
+    # each shrink phase multiplies the radius by this
+    _SHRINK_FACTOR = 0.6
+
+    def __init__(self, seed, centre, radius, map_width, map_height,
+                 minimum_radius=Zone._ZONE_MINIMUM_RADIUS):
+        """Build the phases.
+
+        :param seed:
+        :param centre:
+        :param radius:
+        :param map_width:
+        :param map_height:
+        :param minimum_radius:
+        """
+        # (start tick, end tick, kind, start centre, end centre,
+        # start radius, end radius)
+        self._phases = []
+        rng = random.Random(seed)
+        tick = 0
+        centre = list(centre)
+        while radius > minimum_radius:
+            self._add_phase(tick, ZoneSchedule._HOLD_TICKS, ZoneSchedule.HOLD,
+                            centre, centre, radius, radius)
+            tick += ZoneSchedule._HOLD_TICKS
+            new_radius = max(minimum_radius,
+                             radius * ZoneSchedule._SHRINK_FACTOR)
+            self._add_phase(tick, ZoneSchedule._SHRINK_TICKS,
+                            ZoneSchedule.SHRINK, centre, centre, radius,
+                            new_radius)
+            tick += ZoneSchedule._SHRINK_TICKS
+            # move somewhere that keeps the new circle inside the old one
+            # and the centre on the map
+            angle = rng.uniform(0, 2 * math.pi)
+            distance = (radius - new_radius) * math.sqrt(rng.random())
+            new_centre = [
+                min(max(centre[0] + distance * math.cos(angle), 0),
+                    map_width),
+                min(max(centre[1] + distance * math.sin(angle), 0),
+                    map_height)]
+            self._add_phase(tick, ZoneSchedule._MOVE_TICKS, ZoneSchedule.MOVE,
+                            centre, new_centre, new_radius, new_radius)
+            tick += ZoneSchedule._MOVE_TICKS
+            centre = new_centre
+            radius = new_radius
+        # the final phase holds for the rest of the match
+        self._phases.append((tick, math.inf, ZoneSchedule.HOLD, centre,
+                             centre, radius, radius))
+        self._start_ticks = [phase[0] for phase in self._phases]
+
+    def _add_phase(self, start_tick, length, kind, start_centre, end_centre,
+                   start_radius, end_radius):
+        """Append a phase.
+
+        :param start_tick:
+        :param length:
+        :param kind:
+        :param start_centre:
+        :param end_centre:
+        :param start_radius:
+        :param end_radius:
+        :return:
+        """
+        self._phases.append((start_tick, start_tick + length, kind,
+                             list(start_centre), list(end_centre),
+                             start_radius, end_radius))
+
+    def get_phase_index(self, tick):
+        """Return the index of the phase a tick falls in.
+
+        :param tick:
+        :return:
+        """
+        return max(0, bisect.bisect_right(self._start_ticks, tick) - 1)
+
+    def get_phase(self, tick):
+        """Return the phase tuple a tick falls in.
+
+        :param tick:
+        :return:
+        """
+        return self._phases[self.get_phase_index(tick)]
+
+    def is_animating(self, tick):
+        """Return whether the zone is changing at a tick.
+
+        :param tick:
+        :return:
+        """
+        start_tick, end_tick, kind = self.get_phase(tick)[:3]
+        return kind != ZoneSchedule.HOLD and tick < end_tick
+
+    def state_at(self, tick):
+        """Return the zone centre and radius at a tick.
+
+        Linearly interpolates between the start and end of the phase.
+        :param tick:
+        :return:
+        """
+        start_tick, end_tick, kind, start_centre, end_centre, start_radius, \
+            end_radius = self.get_phase(tick)
+        if kind == ZoneSchedule.HOLD:
+            return list(start_centre), start_radius
+        fraction = min(1.0, (tick - start_tick) / (end_tick - start_tick))
+        centre = [start_centre[0] + (end_centre[0] - start_centre[0]) *
+                  fraction,
+                  start_centre[1] + (end_centre[1] - start_centre[1]) *
+                  fraction]
+        radius = start_radius + (end_radius - start_radius) * fraction
+        return centre, radius
+
+    def get_safe_circle(self, tick):
+        """Return the centre and radius the zone is closing in on.
+
+        That is the end state of the first phase at or after the tick that
+        changes the zone, or the final circle if none are left.
+        :param tick:
+        :return:
+        """
+        for phase in self._phases[self.get_phase_index(tick):]:
+            if phase[2] != ZoneSchedule.HOLD:
+                return list(phase[4]), phase[6]
+        return list(self._phases[-1][4]), self._phases[-1][6]
+
+
+class FlowField:
+    """A coarse grid of unit headings leading into a circle.
+
+    Every cell stores the heading from its centre towards the circle centre,
+    or, for cells already well inside the circle, a heading that circles
+    around the centre so bots keep moving without bunching up. Building the
+    field costs one atan2 per cell, after which any position looks up its
+    heading in constant time.
+    """
+
+    # cells closer to the centre than this fraction of the radius circle
+    _ORBIT_FRACTION = 0.5
+
+    def __init__(self, cell_size, width, height):
+        """Initiate self variables.
+
+        :param cell_size:
+        :param width:
+        :param height:
+        """
+        self._cell_size = cell_size
+        self._columns = int(math.ceil(width / cell_size))
+        self._rows = int(math.ceil(height / cell_size))
+        self._headings = [(0.0, 0.0)] * (self._columns * self._rows)
+
+    def build(self, centre, radius):
+        """Point every cell into a circle.
+
+        :param centre:
+        :param radius:
+        :return:
+        """
+        orbit_radius = radius * FlowField._ORBIT_FRACTION
+        half_cell = self._cell_size / 2
+        headings = []
+        for row in range(self._rows):
+            y_distance = centre[1] - (row * self._cell_size + half_cell)
+            for column in range(self._columns):
+                x_distance = centre[0] - (column * self._cell_size +
+                                          half_cell)
+                angle = math.atan2(y_distance, x_distance)
+                if math.hypot(x_distance, y_distance) < orbit_radius:
+                    angle += math.pi / 2  # turn to circle the centre
+                headings.append((math.cos(angle), math.sin(angle)))
+        self._headings = headings
+
+    def get_heading(self, x_position, y_position):
+        """Return the unit heading of the cell a position lies in.
+
+        Positions off the map use the nearest edge cell.
+        :param x_position:
+        :param y_position:
+        :return:
+        """
+        column = min(max(int(x_position // self._cell_size), 0),
+                     self._columns - 1)
+        row = min(max(int(y_position // self._cell_size), 0), self._rows - 1)
+        return self._headings[row * self._columns + column]
 
 
 class HealConsumable(CanvasSprite):
@@ -1788,8 +4538,16 @@ class HealConsumable(CanvasSprite):
         super().__init__(canvas, x_position, y_position, HealConsumable.WIDTH,
                          HealConsumable.HEIGHT, image_path)
         self._heal_value = heal_value
+        self._consumable_type = consumable_type
         self._add_tag(HealConsumable.TAG)
 
+    def get_consumable_type(self):
+        """Return own consumable type name.
+
+        :return:
+        """
+        return self._consumable_type
+
     def get_heal_value(self):
         """Return own heal value.
 
@@ -1819,6 +4577,23 @@ class AliveCounter:
         self._alive_count -= 1
         self._text_variable.set(f"{self._alive_count} alive")
 
+    def set_alive_count(self, alive_count):
+        """
+        Sets the alive count to a passed in value and updates StringVar.
+        :param alive_count:
+        :return:
+        """
+        self._alive_count = alive_count
+        self._text_variable.set(f"{self._alive_count} alive")
+
+    def player_joined(self):
+        """
+        Adds one to the alive count and updates StringVar.
+        :return:
+        """
+        self._alive_count += 1
+        self._text_variable.set(f"{self._alive_count} alive")
+
     def get_alive_count(self):
         """
         Return own alive count int.
@@ -1856,6 +4631,14 @@ class Score:
         """
         self._score += Score._WIN_SCORE
 
+    def set_score(self, score):
+        """Set own score to a passed in value.
+
+        :param score:
+        :return:
+        """
+        self._score = score
+
     def get_score(self):
         """Return own score.
 
@@ -1881,6 +4664,8 @@ class Score:
         check the old value and if higher, append current value to dict
         :return:
         """
+        if self._score_file is None:  # headless matches keep no score file
+            return
         # load the score file (contains a dict)
         scores = pickle.load(open(self._score_file, "rb"))
         if self._player_name not in scores:  # if player not exist already
@@ -0,0 +1,519 @@
+"""
+Headless stand-ins for the Tk objects used by fortnight 8.
+
+Lets the game world run without a window (servers, tools, benchmarks) by
+providing a canvas that keeps item coordinates and tags in plain Python and
+answers overlap queries through a uniform grid.
+
+Last modified: 19/10/2026
+"""
+
+
+class HeadlessImage:
+    """A sized placeholder for a photo image when there is no Tk window."""
+
+    def __init__(self, width, height, image_path=None):
+        """Initiate self variables.
+
+        :param width:
+        :param height:
+        :param image_path: file the image would be loaded from, if any
+        """
+        self._width = width
+        self._height = height
+        self._image_path = image_path
+
+    def width(self):
+        """Return own width, mirrors PhotoImage.width().
+
+        :return:
+        """
+        return self._width
+
+    def height(self):
+        """Return own height, mirrors PhotoImage.height().
+
+        :return:
+        """
+        return self._height
+
+    def get_image_path(self):
+        """Return the file the image would be loaded from, or None.
+
+        :return:
+        """
+        return self._image_path
+
+
+class HeadlessVariable:
+    """A StringVar replacement that just stores its value."""
+
+    def __init__(self, value=""):
+        """Initiate self variables.
+
+        :param value:
+        """
+        self._value = value
+
+    def set(self, value):
+        """Set own value.
+
+        :param value:
+        :return:
+        """
+        self._value = value
+
+    def get(self):
+        """Return own value.
+
+        :return:
+        """
+        return self._value
+
+
+class HeadlessRoot:
+    """A Tk root replacement - accepts binds but never fires them."""
+
+    def __init__(self):
+        """Initiate self variables.
+
+        Keeps the bound callbacks so callers can inspect or fire them.
+        """
+        self._binds = {}
+
+    def bind(self, sequence, callback):
+        """Store a bind.
+
+        :param sequence:
+        :param callback:
+        :return:
+        """
+        self._binds[sequence] = callback
+
+    def unbind(self, sequence):
+        """Remove a bind if it exists.
+
+        :param sequence:
+        :return:
+        """
+        self._binds.pop(sequence, None)
+
+    def get_bind(self, sequence):
+        """Return the callback bound to a sequence, or None.
+
+        :param sequence:
+        :return:
+        """
+        return self._binds.get(sequence)
+
+
+class HeadlessCanvas:
+    """A canvas that tracks items without drawing them.
+
+    Implements the subset of the Tk canvas api used by the game. Items are
+    bucketed into a uniform grid so find_overlapping only looks at nearby
+    items, which keeps queries flat as the number of entities grows. Items
+    that span many cells (the zone) are kept in a separate list.
+    """
+
+    HEADLESS = True
+    _CELL_SIZE = 100
+    # items covering more cells than this are checked linearly instead
+    _LARGE_ITEM_CELLS = 64
+    # rough text extents, used for health bar text bounding boxes
+    _TEXT_CHARACTER_WIDTH = 7
+    _TEXT_HEIGHT = 14
+
+    def __init__(self, width=0, height=0):
+        """Initiate self variables.
+
+        :param width:
+        :param height:
+        """
+        self._options = {"width": width, "height": height,
+                         "scrollregion": (0, 0, width, height)}
+        self._view = [0, 0]
+        self._next_item = 1
+        self._types = {}
+        self._coords = {}
+        self._sizes = {}
+        self._tags = {}
+        self._options_by_item = {}
+        self._cells = {}
+        self._item_cells = {}
+        self._large_items = set()
+
+    def config(self, **options):
+        """Store canvas options.
+
+        :param options:
+        :return:
+        """
+        self._options.update(options)
+
+    configure = config
+
+    def cget(self, option):
+        """Return a stored canvas option.
+
+        :param option:
+        :return:
+        """
+        return self._options.get(option)
+
+    def xview_moveto(self, fraction):
+        """Store the x view fraction.
+
+        :param fraction:
+        :return:
+        """
+        self._view[0] = fraction
+
+    def yview_moveto(self, fraction):
+        """Store the y view fraction.
+
+        :param fraction:
+        :return:
+        """
+        self._view[1] = fraction
+
+    def get_view(self):
+        """Return the stored view fractions.
+
+        :return:
+        """
+        return tuple(self._view)
+
+    def _create_item(self, item_type, coordinates, size, options):
+        """Create an item and add it to the grid.
+
+        :param item_type:
+        :param coordinates:
+        :param size:
+        :param options:
+        :return:
+        """
+        item = self._next_item
+        self._next_item += 1
+        self._types[item] = item_type
+        self._coords[item] = [float(value) for value in coordinates]
+        self._sizes[item] = size
+        self._tags[item] = []
+        self._options_by_item[item] = options
+        self._item_cells[item] = ()
+        self._update_cells(item)
+        return item
+
+    def create_image(self, x_position, y_position, image=None, anchor="nw",
+                     **options):
+        """Create an image item. Only the nw anchor is supported.
+
+        :param x_position:
+        :param y_position:
+        :param image:
+        :param anchor:
+        :return:
+        """
+        size = (image.width(), image.height()) if image is not None \
+            else (0, 0)
+        options["image"] = image
+        return self._create_item("image", (x_position, y_position), size,
+                                 options)
+
+    def create_text(self, x_position, y_position, text="", **options):
+        """Create a text item.
+
+        :param x_position:
+        :param y_position:
+        :param text:
+        :return:
+        """
+        options["text"] = str(text)
+        return self._create_item("text", (x_position, y_position),
+                                 self._text_size(options["text"]), options)
+
+    def create_oval(self, x_1, y_1, x_2, y_2, **options):
+        """Create an oval item.
+
+        :param x_1:
+        :param y_1:
+        :param x_2:
+        :param y_2:
+        :return:
+        """
+        return self._create_item("oval", (x_1, y_1, x_2, y_2), None, options)
+
+    def create_rectangle(self, x_1, y_1, x_2, y_2, **options):
+        """Create a rectangle item.
+
+        :param x_1:
+        :param y_1:
+        :param x_2:
+        :param y_2:
+        :return:
+        """
+        return self._create_item("rectangle", (x_1, y_1, x_2, y_2), None,
+                                 options)
+
+    def create_line(self, x_1, y_1, x_2, y_2, **options):
+        """Create a line item.
+
+        :param x_1:
+        :param y_1:
+        :param x_2:
+        :param y_2:
+        :return:
+        """
+        return self._create_item("line", (x_1, y_1, x_2, y_2), None, options)
+
+    def _text_size(self, text):
+        """Approximate the size of a text item.
+
+        :param text:
+        :return:
+        """
+        return (len(text) * HeadlessCanvas._TEXT_CHARACTER_WIDTH,
+                HeadlessCanvas._TEXT_HEIGHT)
+
+    def bbox(self, item):
+        """Return the bounding box of an item.
+
+        :param item:
+        :return:
+        """
+        coordinates = self._coords[item]
+        item_type = self._types[item]
+        if item_type == "image":
+            width, height = self._sizes[item]
+            return (coordinates[0], coordinates[1],
+                    coordinates[0] + width, coordinates[1] + height)
+        if item_type == "text":
+            width, height = self._sizes[item]
+            return (coordinates[0] - width / 2, coordinates[1] - height / 2,
+                    coordinates[0] + width / 2, coordinates[1] + height / 2)
+        return (min(coordinates[0], coordinates[2]),
+                min(coordinates[1], coordinates[3]),
+                max(coordinates[0], coordinates[2]),
+                max(coordinates[1], coordinates[3]))
+
+    def _cell_range(self, x_1, y_1, x_2, y_2):
+        """Return the inclusive cell index range covering a rectangle.
+
+        :param x_1:
+        :param y_1:
+        :param x_2:
+        :param y_2:
+        :return:
+        """
+        cell_size = HeadlessCanvas._CELL_SIZE
+        return (int(x_1 // cell_size), int(y_1 // cell_size),
+                int(x_2 // cell_size), int(y_2 // cell_size))
+
+    def _update_cells(self, item):
+        """Move an item into the grid cells that match its bounding box.
+
+        :param item:
+        :return:
+        """
+        left, top, right, bottom = self._cell_range(*self.bbox(item))
+        if (right - left + 1) * (bottom - top + 1) > \
+                HeadlessCanvas._LARGE_ITEM_CELLS:
+            new_cells = None
+        else:
+            new_cells = tuple((cell_x, cell_y)
+                              for cell_x in range(left, right + 1)
+                              for cell_y in range(top, bottom + 1))
+        old_cells = self._item_cells[item]
+        if new_cells == old_cells:  # still in the same cells, nothing to do
+            return
+        self._remove_from_cells(item)
+        if new_cells is None:
+            self._large_items.add(item)
+        else:
+            for cell in new_cells:
+                self._cells.setdefault(cell, set()).add(item)
+        self._item_cells[item] = new_cells
+
+    def _remove_from_cells(self, item):
+        """Remove an item from the grid.
+
+        :param item:
+        :return:
+        """
+        old_cells = self._item_cells.get(item)
+        if old_cells is None:
+            self._large_items.discard(item)
+            return
+        for cell in old_cells:
+            cell_items = self._cells.get(cell)
+            cell_items.discard(item)
+            if not cell_items:
+                del self._cells[cell]
+
+    def coords(self, item, *coordinates):
+        """Get or set the coordinates of an item.
+
+        :param item:
+        :param coordinates:
+        :return:
+        """
+        if item not in self._coords:
+            return []
+        if not coordinates:
+            return list(self._coords[item])
+        # tk accepts either flat values or a single sequence
+        if len(coordinates) == 1:
+            coordinates = coordinates[0]
+        self._coords[item] = [float(value) for value in coordinates]
+        self._update_cells(item)
+
+    def move(self, item, x_amount, y_amount):
+        """Move an item by an x and y amount.
+
+        :param item:
+        :param x_amount:
+        :param y_amount:
+        :return:
+        """
+        coordinates = self._coords.get(item)
+        if coordinates is None:
+            return
+        for index in range(0, len(coordinates), 2):
+            coordinates[index] += x_amount
+            coordinates[index + 1] += y_amount
+        self._update_cells(item)
+
+    def addtag(self, tag, search_type, item):
+        """Add a tag to an item. Only the 'withtag' search is supported.
+
+        :param tag:
+        :param search_type:
+        :param item:
+        :return:
+        """
+        tags = self._tags.get(item)
+        if tags is not None and tag not in tags:
+            tags.append(tag)
+
+    def dtag(self, item, tag):
+        """Remove a tag from an item.
+
+        :param item:
+        :param tag:
+        :return:
+        """
+        tags = self._tags.get(item)
+        if tags is not None and tag in tags:
+            tags.remove(tag)
+
+    def gettags(self, item):
+        """Return the tags of an item.
+
+        :param item:
+        :return:
+        """
+        return tuple(self._tags.get(item, ()))
+
+    def type(self, item):
+        """Return the type of an item.
+
+        :param item:
+        :return:
+        """
+        return self._types.get(item)
+
+    def itemconfigure(self, item, **options):
+        """Update the options of an item.
+
+        :param item:
+        :param options:
+        :return:
+        """
+        item_options = self._options_by_item.get(item)
+        if item_options is None:
+            return
+        item_options.update(options)
+        if "text" in options:
+            item_options["text"] = str(options["text"])
+            self._sizes[item] = self._text_size(item_options["text"])
+            self._update_cells(item)
+        if "image" in options and options["image"] is not None:
+            self._sizes[item] = (options["image"].width(),
+                                 options["image"].height())
+            self._update_cells(item)
+
+    itemconfig = itemconfigure
+
+    def itemcget(self, item, option):
+        """Return an option of an item.
+
+        :param item:
+        :param option:
+        :return:
+        """
+        return self._options_by_item.get(item, {}).get(option)
+
+    def find_all(self):
+        """Return every item in stacking (creation) order.
+
+        :return:
+        """
+        return tuple(self._coords)
+
+    def find_withtag(self, tag):
+        """Return all items with a tag.
+
+        :param tag:
+        :return:
+        """
+        return tuple(item for item, tags in self._tags.items()
+                     if tag in tags)
+
+    def find_overlapping(self, x_1, y_1, x_2, y_2):
+        """Return the items whose bounding box overlaps a rectangle.
+
+        Only grid cells touched by the rectangle are inspected, plus the
+        large items list.
+        :param x_1:
+        :param y_1:
+        :param x_2:
+        :param y_2:
+        :return:
+        """
+        left, top, right, bottom = self._cell_range(x_1, y_1, x_2, y_2)
+        candidates = set(self._large_items)
+        cells = self._cells
+        for cell_x in range(left, right + 1):
+            for cell_y in range(top, bottom + 1):
+                cell_items = cells.get((cell_x, cell_y))
+                if cell_items:
+                    candidates.update(cell_items)
+        overlapping = []
+        for item in candidates:
+            item_left, item_top, item_right, item_bottom = self.bbox(item)
+            if item_left <= x_2 and item_right >= x_1 and \
+                    item_top <= y_2 and item_bottom >= y_1:
+                overlapping.append(item)
+        overlapping.sort()  # stacking order is creation order
+        return tuple(overlapping)
+
+    def delete(self, item):
+        """Delete an item, or every item when passed "all".
+
+        :param item:
+        :return:
+        """
+        if item == "all":
+            items = list(self._coords)
+        else:
+            items = [item]
+        for canvas_item in items:
+            if canvas_item not in self._coords:
+                continue
+            self._remove_from_cells(canvas_item)
+            del self._types[canvas_item]
+            del self._coords[canvas_item]
+            del self._sizes[canvas_item]
+            del self._tags[canvas_item]
+            del self._options_by_item[canvas_item]
+            del self._item_cells[canvas_item]
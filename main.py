@@ -5,9 +5,16 @@ Developed by Flynn Teh.
 
 Last modified: 05/05/2021
 """
+import argparse
 import pickle
+import time
 from tkinter import *
 from game import *
+from framebuffer import FramebufferRenderer
+from metrics import MetricsServer, TickMetrics
+from profiler import CountingCanvas, TickProfiler
+from regions import RegionSwarm
+from replay import ReplayWriter
 
 
 class Menu:
@@ -16,6 +23,8 @@ class Menu:
     _SCORE_FILE = "score.dat"
     _ROOT_GEOMETRY = "500x500"
     _TICK_SPEED = 17
+    _PROFILE_BIND = "<F9>"
+    _PROFILE_FONT = ("Courier", 9)
     _INSTRUCTION_TEXT = "INSTRUCTIONS:\nenter your name into the entry box" \
                         "then click start game....\n you will be transported" \
                         "to the fortnight 8 map!!\n" \
@@ -26,10 +35,12 @@ class Menu:
                         "drop your weapon with the Q key!!!\n" \
                         "STay inside the zone or you will take damage\n" \
                         "Avoid dying.\n" \
+                        "When spectating, follow the next enemy with E,\n" \
+                        "the leader with L, and fast forward with F\n" \
                         "You are awarded score for killing enemies and" \
                         "being the last alive.."
     MAX_NAME_LENGTH = 15
-    _GAME_NAME = "fortnight 8"
+    GAME_NAME = "fortnight 8"
 
     @staticmethod
     def _get_top_score():
@@ -65,15 +76,49 @@ class Menu:
         """
         frame.pack()
 
-    def __init__(self):
+    def __init__(self, metrics_port=None, framebuffer=False, ai_budget=None,
+                 profile_ticks=None, count_canvas_calls=False,
+                 spectate=False, region_workers=0, record_path=None):
         """Initiate instance.
 
-        Initiate self variables and set up the main window.
+        Initiate self variables and set up the main window. Live metrics are
+        served on the given localhost port if one is passed in. Pressing the
+        profile key profiles the next ticks of a game, and passing in a
+        number of ticks also profiles the start of every game.
+        :param metrics_port:
+        :param framebuffer: draw games with the software framebuffer renderer
+        :param ai_budget: milliseconds of enemy decisions per tick, or None
+        :param profile_ticks: ticks to profile from the start of each game
+        :param count_canvas_calls: count the canvas calls of each game and
+            show them after it
+        :param spectate: keep games running after the player dies
+        :param region_workers: worker processes that move the enemies, each
+            in a strip of the map, or 0 to move them in this process
+        :param record_path: record each game to this replay file, replacing
+            the one before
         """
+        self._spectate = spectate
+        self._region_workers = region_workers
+        self._record_path = record_path
+        self._replay_writer = None
+        self._count_canvas_calls = count_canvas_calls
+        self._counting_canvas = None
+        self._framebuffer = framebuffer
+        self._ai_budget = ai_budget
+        self._profile_at_start = profile_ticks is not None
+        self._profiler = TickProfiler(profile_ticks or
+                                      TickProfiler.DEFAULT_TICKS)
+        self._tick_metrics = None
+        self._metrics_server = None
+        if metrics_port is not None:
+            self._tick_metrics = TickMetrics()
+            self._metrics_server = MetricsServer(self._tick_metrics,
+                                                 metrics_port)
         self._root = Tk()
-        self._root.title(Menu._GAME_NAME)  # title the window
+        self._root.title(Menu.GAME_NAME)  # title the window
         self._root.geometry(Menu._ROOT_GEOMETRY)  # set window geometry
         self._root.resizable(False, False)  # disable window resizing
+        self._root.bind(Menu._PROFILE_BIND, self._arm_profiler)
 
         self._menu_frame = Frame(self._root)
         self._menu_frame.pack()
@@ -127,6 +172,10 @@ class Menu:
         self._alive_counter_label = \
             Label(self._game_frame, textvariable=self._alive_counter_variable)
         self._alive_counter_label.pack()
+        self._spectator_variable = StringVar()
+        self._spectator_label = \
+            Label(self._game_frame, textvariable=self._spectator_variable)
+        self._spectator_label.pack()
         self._canvas = Canvas(self._game_frame)
         self._canvas.pack()
         self._game = None
@@ -142,6 +191,12 @@ class Menu:
             Label(self._game_summary_frame,
                   textvariable=self._player_score_string)
         self._player_score_label.pack()
+        self._profile_summary_string = StringVar()
+        self._profile_summary_label = \
+            Label(self._game_summary_frame,
+                  textvariable=self._profile_summary_string,
+                  font=Menu._PROFILE_FONT, justify=LEFT)
+        self._profile_summary_label.pack()
         self._close_summary_button = Button(self._game_summary_frame,
                                             text="CLOSE",
                                             command=self._close_game_summary)
@@ -149,6 +204,9 @@ class Menu:
 
         self._update_max_score_label()
         self._root.mainloop()
+        if self._metrics_server is not None:
+            self._metrics_server.close()
+            self._tick_metrics.close()
 
     def _update_max_score_label(self):
         """Update the max score label.
@@ -183,9 +241,24 @@ class Menu:
         self._show_frame(self._game_frame)
         self._game_frame.focus()
         self._root.geometry("")  # set dynamic root geometry
-        self._game = GameController(self._root, self._canvas,
+        renderer = FramebufferRenderer() if self._framebuffer else None
+        game_canvas = self._canvas
+        if self._count_canvas_calls:
+            self._counting_canvas = CountingCanvas(self._canvas)
+            game_canvas = self._counting_canvas
+        swarm = Enemy.create_swarm(RegionSwarm,
+                                   workers=self._region_workers) \
+            if self._region_workers else None
+        self._game = GameController(self._root, game_canvas,
                                     self._alive_counter_variable,
-                                    self._player_name.get(), Menu._SCORE_FILE)
+                                    self._player_name.get(), Menu._SCORE_FILE,
+                                    renderer=renderer,
+                                    ai_budget=self._ai_budget,
+                                    spectate=self._spectate, swarm=swarm)
+        if self._record_path is not None:
+            self._replay_writer = ReplayWriter(self._record_path)
+        if self._profile_at_start:
+            self._profiler.arm()
         self._run_game_tick()  # initiate game tick
 
     def _run_game_tick(self):
@@ -193,17 +266,42 @@ class Menu:
 
         Check whether or not the game should still be running. If so, run
         the game tick handler. If not, end the game by calling the necessary
-        functiion.
+        functiion. When spectating fast forwards, several ticks are run and
+        only the last one is rendered.
+        :return:
+        """
+        speed = self._game.get_speed()
+        for step in range(speed):
+            game_running, player_score, end_statement = \
+                (self._game.check_game_condition())
+            if not game_running:
+                self._player_score = player_score
+                self._end_game(end_statement)
+                return
+            self._handle_game_tick(step == speed - 1)
+        spectator_status = self._game.get_spectator_status()
+        if spectator_status != self._spectator_variable.get():
+            self._spectator_variable.set(spectator_status)
+        self._root.after(Menu._TICK_SPEED, self._run_game_tick)
+
+    def _handle_game_tick(self, render):
+        """Run one tick of the game, recording it for profiles, metrics and
+        the replay.
+
+        :param render:
         :return:
         """
-        game_running, player_score, end_statement = \
-            (self._game.check_game_condition())
-        if game_running:  # if the game is running, continue ticking
-            self._game.handle_tick()  # run the game tick handler
-            self._root.after(Menu._TICK_SPEED, self._run_game_tick)
-        else:
-            self._player_score = player_score
-            self._end_game(end_statement)
+        tick_start = time.perf_counter()
+        # run the game tick handler, profiled if the profiler is armed
+        self._profiler.run_tick(self._game.handle_tick, render)
+        if self._counting_canvas is not None:
+            self._counting_canvas.end_tick(
+                sum(self._game.get_entity_counts().values()))
+        if self._tick_metrics is not None:
+            self._tick_metrics.record_tick(
+                time.perf_counter() - tick_start, self._game)
+        if self._replay_writer is not None:
+            self._replay_writer.record(self._game)
 
     def _end_game(self, end_statement):
         """End the current game.
@@ -216,6 +314,17 @@ class Menu:
         """
         del self._game  # delete game instance
         self._game = None
+        if self._replay_writer is not None:  # finish the replay file
+            self._replay_writer.close()
+            self._replay_writer = None
+        self._profiler.finish()  # the game ended before the capture did
+        summaries = [self._profiler.take_summary()]
+        if self._counting_canvas is not None:
+            summaries.append(self._counting_canvas.get_report())
+            self._counting_canvas = None
+        self._profile_summary_string.set(
+            "\n\n".join(summary for summary in summaries if summary))
+        self._spectator_variable.set("")
         self._canvas.delete("all")  # clear the game canvas
         self._hide_frame(self._game_frame)
         self._set_end_statement(end_statement)
@@ -223,6 +332,15 @@ class Menu:
         self._show_frame(self._game_summary_frame)
         self._root.geometry(Menu._ROOT_GEOMETRY)  # reset root geometry
 
+    def _arm_profiler(self, event):
+        """Profile the next ticks of the running game.
+
+        :param event:
+        :return:
+        """
+        if self._game is not None:
+            self._profiler.arm()
+
     def _close_game_summary(self):
         """Closes the game summary menu.
 
@@ -284,4 +402,28 @@ class Menu:
 
 
 if __name__ == '__main__':
-    Menu()
+    parser = argparse.ArgumentParser(description=Menu.GAME_NAME)
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve live metrics on this localhost port")
+    parser.add_argument("--framebuffer", action="store_true",
+                        help="composite each frame into one image instead "
+                             "of a canvas item per sprite")
+    parser.add_argument("--ai-budget", type=float, metavar="MILLISECONDS",
+                        help="limit enemy decisions per tick to this time")
+    parser.add_argument("--profile-ticks", type=int, metavar="TICKS",
+                        help="profile this many ticks from the start of each "
+                             f"game, and after pressing {Menu._PROFILE_BIND}")
+    parser.add_argument("--count-canvas-calls", action="store_true",
+                        help="count and time every canvas call of each game")
+    parser.add_argument("--spectate", action="store_true",
+                        help="keep watching, and fast forward, the match "
+                             "after dying")
+    parser.add_argument("--regions", type=int, default=0, metavar="WORKERS",
+                        help="move the enemies in this many worker "
+                             "processes, one per strip of the map")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record each game to this replay file")
+    arguments = parser.parse_args()
+    Menu(arguments.metrics_port, arguments.framebuffer, arguments.ai_budget,
+         arguments.profile_ticks, arguments.count_canvas_calls,
+         arguments.spectate, arguments.regions, arguments.record)
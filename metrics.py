@@ -0,0 +1,266 @@
+"""
+Live match metrics for fortnight 8.
+
+The tick loop records how long each tick took, and every so often publishes
+a snapshot of tick, entity and process statistics. An optional localhost
+http endpoint serves the latest snapshot in the Prometheus text format from
+its own thread, so scraping never waits on or slows down the game.
+
+Last modified: 19/10/2026
+"""
+
+import collections
+import gc
+import http.server
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+
+class TickMetrics:
+    """Collects tick timings and publishes snapshots of match statistics."""
+
+    _QUANTILES = (0.5, 0.9, 0.99, 1.0)
+    # number of recent ticks the duration quantiles are taken over
+    _WINDOW = 600
+    _PUBLISH_INTERVAL = 1.0  # seconds between snapshots
+
+    def __init__(self, window=_WINDOW, publish_interval=_PUBLISH_INTERVAL):
+        """Initiate self variables and start timing garbage collection.
+
+        :param window:
+        :param publish_interval:
+        """
+        self._durations = collections.deque(maxlen=window)
+        self._publish_interval = publish_interval
+        self._tick_count = 0
+        self._duration_total = 0.0
+        self._published_tick_count = 0
+        self._published_time = time.perf_counter()
+        self._gc_started = None
+        self._gc_pause_count = 0
+        self._gc_pause_total = 0.0
+        self._gc_pause_max = 0.0
+        self._snapshot = {}
+        gc.callbacks.append(self._time_gc)
+
+    def _time_gc(self, phase, info):
+        """Time each garbage collection, called by the gc module.
+
+        :param phase:
+        :param info:
+        :return:
+        """
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            pause = time.perf_counter() - self._gc_started
+            self._gc_started = None
+            self._gc_pause_count += 1
+            self._gc_pause_total += pause
+            self._gc_pause_max = max(self._gc_pause_max, pause)
+
+    def record_tick(self, duration, game):
+        """Record the duration of a tick of a game.
+
+        Publishes a new snapshot once the publish interval has passed, so
+        the game is only inspected about once a second.
+        :param duration: seconds the tick took
+        :param game:
+        :return:
+        """
+        self._durations.append(duration)
+        self._tick_count += 1
+        self._duration_total += duration
+        now = time.perf_counter()
+        if now - self._published_time >= self._publish_interval:
+            self._publish(game, now)
+
+    def _publish(self, game, now):
+        """Build and publish a snapshot.
+
+        :param game:
+        :param now:
+        :return:
+        """
+        durations = sorted(self._durations)
+        last_index = len(durations) - 1
+        quantiles = {quantile: durations[round(quantile * last_index)]
+                     for quantile in TickMetrics._QUANTILES}
+        tick_rate = (self._tick_count - self._published_tick_count) / \
+            (now - self._published_time)
+        self._published_tick_count = self._tick_count
+        self._published_time = now
+        # replacing the dict is atomic, readers see an old or new snapshot
+        self._snapshot = {
+            "tick_duration_quantiles": quantiles,
+            "tick_duration_total": self._duration_total,
+            "ticks_total": self._tick_count,
+            "tick_rate": tick_rate,
+            "entities": game.get_entity_counts(),
+            "canvas_items": game.get_canvas_item_count(),
+            "ai": game.get_ai_stats(),
+            "resident_memory_bytes": TickMetrics.get_resident_memory(),
+            "gc_pause_count": self._gc_pause_count,
+            "gc_pause_total": self._gc_pause_total,
+            "gc_pause_max": self._gc_pause_max}
+
+    def get_snapshot(self):
+        """Return the last published snapshot.
+
+        :return:
+        """
+        return self._snapshot
+
+    def close(self):
+        """Stop timing garbage collection.
+
+        :return:
+        """
+        if self._time_gc in gc.callbacks:
+            gc.callbacks.remove(self._time_gc)
+
+    @staticmethod
+    def get_resident_memory():
+        """Return the resident memory of the process in bytes.
+
+        Reads /proc where it exists, otherwise falls back to the peak
+        resident size, or 0 if neither is available.
+        :return:
+        """
+        try:
+            with open("/proc/self/statm") as statm_file:
+                return int(statm_file.read().split()[1]) * \
+                    os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            pass
+        if resource is None:
+            return 0
+        # peak resident size is in kilobytes on linux but bytes on macos
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    @staticmethod
+    def format_snapshot(snapshot):
+        """Render a snapshot in the Prometheus text exposition format.
+
+        :param snapshot:
+        :return:
+        """
+        if not snapshot:
+            return ""
+        lines = [
+            "# TYPE fortnight8_tick_duration_seconds summary"]
+        for quantile, duration in \
+                snapshot["tick_duration_quantiles"].items():
+            lines.append(f'fortnight8_tick_duration_seconds'
+                         f'{{quantile="{quantile}"}} {duration:.6f}')
+        lines.extend([
+            f"fortnight8_tick_duration_seconds_sum "
+            f"{snapshot['tick_duration_total']:.6f}",
+            f"fortnight8_tick_duration_seconds_count "
+            f"{snapshot['ticks_total']}",
+            "# TYPE fortnight8_tick_rate gauge",
+            f"fortnight8_tick_rate {snapshot['tick_rate']:.3f}",
+            "# TYPE fortnight8_entities gauge"])
+        for kind, count in snapshot["entities"].items():
+            lines.append(f'fortnight8_entities{{kind="{kind}"}} {count}')
+        ai_stats = snapshot["ai"]
+        lines.extend([
+            "# TYPE fortnight8_ai_decisions counter",
+            f"fortnight8_ai_decisions_total {ai_stats['served_total']}",
+            "# TYPE fortnight8_ai_waiting gauge",
+            f"fortnight8_ai_waiting {ai_stats['waiting']}",
+            "# TYPE fortnight8_ai_wait_ticks gauge",
+            f'fortnight8_ai_wait_ticks{{stat="oldest"}} '
+            f"{ai_stats['oldest_wait_ticks']}",
+            f'fortnight8_ai_wait_ticks{{stat="mean"}} '
+            f"{ai_stats['mean_wait_ticks']:.3f}",
+            f'fortnight8_ai_wait_ticks{{stat="max"}} '
+            f"{ai_stats['max_wait_ticks']}",
+            "# TYPE fortnight8_canvas_items gauge",
+            f"fortnight8_canvas_items {snapshot['canvas_items']}",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes "
+            f"{snapshot['resident_memory_bytes']}",
+            "# TYPE fortnight8_gc_pause_seconds summary",
+            f"fortnight8_gc_pause_seconds_sum "
+            f"{snapshot['gc_pause_total']:.6f}",
+            f"fortnight8_gc_pause_seconds_count "
+            f"{snapshot['gc_pause_count']}",
+            "# TYPE fortnight8_gc_pause_max_seconds gauge",
+            f"fortnight8_gc_pause_max_seconds "
+            f"{snapshot['gc_pause_max']:.6f}"])
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the latest snapshot of the server's tick metrics."""
+
+    def do_GET(self):
+        """Answer a scrape.
+
+        :return:
+        """
+        if self.path != MetricsServer.PATH:
+            self.send_error(404)
+            return
+        body = TickMetrics.format_snapshot(
+            self.server.metrics.get_snapshot()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Do not print a line per scrape.
+
+        :param format:
+        :param args:
+        :return:
+        """
+
+
+class MetricsServer:
+    """A read-only localhost http endpoint for tick metrics."""
+
+    HOST = "127.0.0.1"
+    DEFAULT_PORT = 9108
+    PATH = "/metrics"
+
+    def __init__(self, metrics, port=DEFAULT_PORT):
+        """Start serving on a background thread.
+
+        :param metrics: the TickMetrics to serve snapshots of
+        :param port: 0 picks a free port
+        """
+        self._server = http.server.ThreadingHTTPServer(
+            (MetricsServer.HOST, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.metrics = metrics
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="metrics server", daemon=True)
+        self._thread.start()
+
+    def get_address(self):
+        """Return the address being served on.
+
+        :return:
+        """
+        return self._server.server_address
+
+    def close(self):
+        """Stop serving.
+
+        :return:
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
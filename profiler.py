@@ -0,0 +1,261 @@
+"""
+On demand tick profiling for fortnight 8.
+
+A TickProfiler is armed for a number of ticks, then runs each of the next
+ticks under cProfile. Once they have run, the combined profile is written
+to a timestamped .prof file and a short text summary of the functions with
+the most cumulative time is kept to show after the match.
+
+A CountingCanvas wraps the game canvas and counts and times every call
+made through it, per canvas method and calling function, as every call on
+a Tk canvas is a round trip into Tcl.
+
+Run this file with a .prof path to print its summary.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+
+class TickProfiler:
+    """Profiles the next N ticks of a game when armed."""
+
+    DEFAULT_TICKS = 300
+    DEFAULT_DIRECTORY = "profiles"
+    _TOP_FUNCTIONS = 15
+
+    def __init__(self, ticks=DEFAULT_TICKS, directory=DEFAULT_DIRECTORY):
+        """Initiate self variables.
+
+        :param ticks: ticks profiled each time the profiler is armed
+        :param directory: where .prof files are written
+        """
+        self._ticks = ticks
+        self._directory = directory
+        self._profile = None
+        self._remaining = 0
+        self._profiled = 0
+        self._last_path = None
+        self._last_summary = ""
+
+    def arm(self, event=None):
+        """Profile the next ticks, unless a capture is already running.
+
+        Can be bound to a key directly.
+        :param event:
+        :return:
+        """
+        if self._profile is not None:
+            return
+        self._profile = cProfile.Profile()
+        self._remaining = self._ticks
+        self._profiled = 0
+
+    def is_armed(self):
+        """Return whether ticks are being profiled.
+
+        :return:
+        """
+        return self._profile is not None
+
+    def run_tick(self, tick_function, *args):
+        """Run a tick, under the profiler if it is armed.
+
+        :param tick_function:
+        :param args: passed on to the tick function
+        :return:
+        """
+        if self._profile is None:
+            return tick_function(*args)
+        result = self._profile.runcall(tick_function, *args)
+        self._profiled += 1
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self.finish()
+        return result
+
+    def finish(self):
+        """Write out the ticks profiled so far and disarm.
+
+        Called on its own after the last tick, or when the match ends first.
+        :return:
+        """
+        if self._profile is None:
+            return
+        profile = self._profile
+        self._profile = None
+        if self._profiled == 0:
+            return
+        os.makedirs(self._directory, exist_ok=True)
+        self._last_path = os.path.join(
+            self._directory, time.strftime("ticks-%Y%m%d-%H%M%S") +
+            f"-{self._profiled}.prof")
+        profile.dump_stats(self._last_path)
+        self._last_summary = f"profiled {self._profiled} ticks " \
+                             f"({self._last_path})\n" + \
+            TickProfiler.summarise(pstats.Stats(profile),
+                                   self._profiled)
+
+    def take_summary(self):
+        """Return the summary of the last capture once, then forget it.
+
+        :return:
+        """
+        summary = self._last_summary
+        self._last_summary = ""
+        return summary
+
+    def get_last_path(self):
+        """Return the path of the last .prof file written, or None.
+
+        :return:
+        """
+        return self._last_path
+
+    @staticmethod
+    def summarise(stats, ticks=1, top=_TOP_FUNCTIONS):
+        """Return the functions with the most cumulative time as text.
+
+        Times are shown per tick.
+        :param stats: a pstats.Stats
+        :param ticks: ticks the stats cover
+        :param top:
+        :return:
+        """
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])
+        lines = ["cum ms/tick  calls/tick  function"]
+        for (path, line, name), (primitive_calls, calls, total_time,
+                                 cumulative_time, callers) in rows[:top]:
+            location = f"{os.path.basename(path)}:{line}" if path != "~" \
+                else "built-in"
+            lines.append(f"{cumulative_time / ticks * 1000:11.3f}  "
+                         f"{calls / ticks:10.1f}  {name} ({location})")
+        return "\n".join(lines)
+
+
+class CountingCanvas:
+    """A canvas proxy that counts and times every call made through it.
+
+    Calls are keyed by the canvas method and the function that called it.
+    Wrappers are made once per method, so after the first call a method
+    costs one extra Python call and two clock reads. Scripts of batched
+    canvas updates are evaluated through eval_script, so each batch shows
+    up as one counted call with its Tcl time.
+    """
+
+    _TOP_CALLS = 15
+
+    def __init__(self, canvas):
+        """Initiate self variables.
+
+        :param canvas: the canvas to forward calls to
+        """
+        self._canvas = canvas
+        # (method, caller) -> [calls, seconds]
+        self._totals = {}
+        self._ticks = 0
+        self._entity_ticks = 0
+        tk = getattr(canvas, "tk", None)
+        if tk is not None:
+            self.eval_script = self._count("eval_script", tk.eval)
+
+    def __getattr__(self, name):
+        """Return a canvas attribute, wrapping methods in a counter.
+
+        Only called for names not already set on the proxy.
+        :param name:
+        :return:
+        """
+        attribute = getattr(self._canvas, name)
+        if not callable(attribute):
+            return attribute
+        counted = self._count(name, attribute)
+        self.__dict__[name] = counted
+        return counted
+
+    def _count(self, name, function):
+        """Return a wrapper of a function that counts and times its calls.
+
+        :param name: the name calls are kept under
+        :param function:
+        :return:
+        """
+        totals = self._totals
+
+        def counted(*args, **kwargs):
+            code = sys._getframe(1).f_code
+            key = (name, getattr(code, "co_qualname", code.co_name))
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            total = totals.get(key)
+            if total is None:
+                totals[key] = [1, elapsed]
+            else:
+                total[0] += 1
+                total[1] += elapsed
+            return result
+        return counted
+
+    def __str__(self):
+        """Return the Tk path of the canvas, as Tk widgets do.
+
+        :return:
+        """
+        return str(self._canvas)
+
+    def end_tick(self, entity_count):
+        """Mark the end of a tick with the number of live entities.
+
+        :param entity_count:
+        :return:
+        """
+        self._ticks += 1
+        self._entity_ticks += entity_count
+
+    def get_totals(self):
+        """Return the calls and seconds of each (method, caller) so far.
+
+        :return:
+        """
+        return {key: tuple(total) for key, total in self._totals.items()}
+
+    def get_report(self, top=_TOP_CALLS):
+        """Return the most expensive calls per tick as text.
+
+        :param top:
+        :return:
+        """
+        ticks = max(self._ticks, 1)
+        entity_ticks = max(self._entity_ticks, 1)
+        calls = sum(total[0] for total in self._totals.values())
+        seconds = sum(total[1] for total in self._totals.values())
+        lines = [f"canvas calls over {self._ticks} ticks: "
+                 f"{calls / ticks:.1f} calls/tick, "
+                 f"{calls / entity_ticks:.2f} calls/entity/tick, "
+                 f"{seconds / ticks * 1000:.3f} ms/tick",
+                 "calls/tick  calls/entity   us/tick  method <- caller"]
+        rows = sorted(self._totals.items(), key=lambda item: -item[1][1])
+        for (method, caller), (count, elapsed) in rows[:top]:
+            lines.append(f"{count / ticks:10.1f}  {count / entity_ticks:12.3f}"
+                         f"  {elapsed / ticks * 1000000:8.1f}  {method} <- "
+                         f"{caller}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="summarise a fortnight 8 "
+                                                 "tick profile")
+    parser.add_argument("path")
+    parser.add_argument("--ticks", type=int, default=1,
+                        help="ticks the profile covers, for per tick times")
+    parser.add_argument("--top", type=int, default=TickProfiler._TOP_FUNCTIONS)
+    arguments = parser.parse_args()
+    print(TickProfiler.summarise(pstats.Stats(arguments.path),
+                                 arguments.ticks, arguments.top))
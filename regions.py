@@ -0,0 +1,341 @@
+"""
+Region partitioned enemy simulation for fortnight 8.
+
+A RegionSwarm is an enemy swarm whose columns live in shared memory. The
+map is cut into vertical strips, one per worker process, and each enemy row
+belongs to the strip its centre is in. Every tick each worker points, moves
+and checks arrivals for its own rows, and looks for ground items under them.
+It only tests the items that reach into its strip, plus a halo of half an
+enemy and the furthest x step of the tick, so enemies standing or stepping
+over a border still see items on the other side.
+Rows that walked over a border are handed to the strip they are now in once
+every worker is done. The main process keeps the game rules and the canvas,
+and only writes moved positions back to the enemies.
+
+Run this file to time headless matches with and without region workers.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import math
+import multiprocessing
+import random
+import time
+import weakref
+from multiprocessing import shared_memory
+import numpy
+from game import *
+from headless import HeadlessCanvas, HeadlessRoot, HeadlessVariable
+
+
+class RegionSwarm(EnemySwarm):
+    """An enemy swarm stepped by worker processes, one per map strip."""
+
+    COLUMNS = EnemySwarm.COLUMNS + (("owner", numpy.int64, 1),
+                                    ("next_owner", numpy.int64, 1))
+    _INITIAL_ITEMS = 256
+
+    def __init__(self, speed, arrival_margin, workers,
+                 map_width=None):
+        """Initiate self variables and start the workers.
+
+        :param speed: speed enemies walk towards a destination at
+        :param arrival_margin: distance from a destination that counts as
+            having arrived
+        :param workers: number of worker processes, and map strips
+        :param map_width: width of the map, the canvas width by default
+        """
+        self._regions = workers
+        self._map_width = GameController.CANVAS_WIDTH if map_width is None \
+            else map_width
+        self._blocks = {}  # column name -> shared memory block
+        # frees the blocks of a swarm that was never closed, at the latest
+        # when the interpreter exits
+        self._finalizer = weakref.finalize(self, RegionSwarm._unlink,
+                                           self._blocks)
+        self._items = None
+        self._layout_changed = True
+        self._handoffs = 0
+        self._region_rows = [0] * workers
+        super().__init__(speed, arrival_margin)
+        self._share_items(numpy.zeros((0, 4)))
+        self._connections = []
+        self._workers = []
+        for region in range(workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=RegionSwarm._work,
+                args=(worker_connection, region, workers, self._map_width,
+                      speed, arrival_margin),
+                name=f"region {region}", daemon=True)
+            worker.start()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+    def _allocate(self, name, dtype, shape):
+        """Return a new zeroed column in its own shared memory block.
+
+        :param name:
+        :param dtype:
+        :param shape:
+        :return:
+        """
+        dtype = numpy.dtype(dtype)
+        block = shared_memory.SharedMemory(
+            create=True, size=max(int(numpy.prod(shape)) * dtype.itemsize, 1))
+        self._blocks[name] = block
+        column = numpy.ndarray(shape, dtype, buffer=block.buf)
+        column.fill(0)
+        return column
+
+    def _grow(self, capacity):
+        """Make room for more rows, in new shared memory blocks.
+
+        The workers attach to the new blocks on the next step.
+        :param capacity:
+        :return:
+        """
+        old_blocks = [self._blocks[name] for name, dtype, width
+                      in self.COLUMNS if name in self._blocks]
+        super()._grow(capacity)
+        RegionSwarm._release(old_blocks, unlink=True)
+        self._layout_changed = True
+
+    def _share_items(self, items):
+        """Copy the ground item boxes into shared memory for the workers.
+
+        :param items:
+        :return:
+        """
+        if self._items is None or len(items) > len(self._items):
+            old_block = self._blocks.get("items")
+            self._items = None
+            self._items = self._allocate("items", float, (max(
+                len(items) * 2, RegionSwarm._INITIAL_ITEMS), 4))
+            if old_block is not None:
+                RegionSwarm._release((old_block,), unlink=True)
+            self._layout_changed = True
+        self._items[:len(items)] = items
+
+    def _get_layout(self):
+        """Return the block name, type and shape of every shared column.
+
+        :return:
+        """
+        columns = self.get_columns()
+        columns["items"] = self._items
+        return {name: (self._blocks[name].name, column.dtype.str,
+                       column.shape) for name, column in columns.items()}
+
+    def add(self, enemy):
+        """Give an enemy a row, owned by the region its centre is in.
+
+        :param enemy:
+        :return: the row
+        """
+        row = super().add(enemy)
+        region = int(RegionSwarm.find_regions(
+            self._positions[row:row + 1, 0] + self._offsets[row:row + 1, 0],
+            self._regions, self._map_width)[0])
+        self._owner[row] = region
+        self._next_owner[row] = region
+        return row
+
+    def step(self, item_boxes=()):
+        """Step every region in its worker, then hand over the rows that
+        crossed into another region.
+
+        :param item_boxes: arrays of the (left, top, right, bottom) boxes of
+            the items on the ground
+        :return:
+        """
+        items = EnemySwarm.join_boxes(item_boxes)
+        self._share_items(items)
+        message = (self._get_layout() if self._layout_changed else None,
+                   len(items))
+        self._layout_changed = False
+        for connection in self._connections:
+            connection.send(message)
+        self._region_rows = [connection.recv()
+                             for connection in self._connections]
+        rows = numpy.flatnonzero(self._active)
+        self._handoffs += int(numpy.count_nonzero(
+            self._owner[rows] != self._next_owner[rows]))
+        self._owner[rows] = self._next_owner[rows]
+        self._write_back()
+
+    def get_stats(self):
+        """Return the rows stepped by each region last tick, and the number
+        of rows handed to another region so far.
+
+        :return:
+        """
+        return {"region_rows": list(self._region_rows),
+                "handoffs": self._handoffs}
+
+    def close(self):
+        """Stop the workers and free the shared memory.
+
+        :return:
+        """
+        for connection in self._connections:
+            connection.send(None)
+        for worker in self._workers:
+            worker.join()
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+        self._workers = []
+        # the columns are views of the blocks, so they go first
+        for name, dtype, width in self.COLUMNS:
+            setattr(self, "_" + name, None)
+        self._items = None
+        RegionSwarm._release(self._blocks.values(), unlink=True)
+        self._blocks.clear()
+        self._finalizer.detach()
+
+    @staticmethod
+    def _release(blocks, unlink=False):
+        """Close shared memory blocks, and unlink them if they are owned.
+
+        :param blocks:
+        :param unlink:
+        :return:
+        """
+        for block in blocks:
+            block.close()
+            if unlink:
+                block.unlink()
+
+    @staticmethod
+    def _unlink(blocks):
+        """Unlink shared memory blocks that may still have views open.
+
+        :param blocks: column name -> shared memory block
+        :return:
+        """
+        for block in blocks.values():
+            block.unlink()
+
+    @staticmethod
+    def find_regions(centres, regions, map_width):
+        """Return the region of each x centre.
+
+        Centres off the map belong to the region at that edge.
+        :param centres:
+        :param regions:
+        :param map_width:
+        :return:
+        """
+        return numpy.clip((centres * regions // map_width).astype(
+            numpy.int64), 0, regions - 1)
+
+    @staticmethod
+    def _work(connection, region, regions, map_width, speed, margin):
+        """Step the rows of one region each time a message arrives, in the
+        worker.
+
+        A message is the layout of the columns when it has changed, or
+        None, and the number of ground items. None on its own stops the
+        worker.
+        :param connection:
+        :param region:
+        :param regions:
+        :param map_width:
+        :param speed:
+        :param margin:
+        :return:
+        """
+        left = region * map_width / regions if region > 0 else -math.inf
+        right = (region + 1) * map_width / regions \
+            if region < regions - 1 else math.inf
+        blocks = []
+        columns = {}
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            layout, item_count = message
+            if layout is not None:  # attach to the blocks of the new layout
+                columns = {}
+                RegionSwarm._release(blocks)
+                blocks = []
+                for name, (block_name, dtype, shape) in layout.items():
+                    block = shared_memory.SharedMemory(name=block_name)
+                    blocks.append(block)
+                    columns[name] = numpy.ndarray(shape, dtype,
+                                                  buffer=block.buf)
+            rows = numpy.flatnonzero(columns["active"] &
+                                     (columns["owner"] == region))
+            items = columns["items"][:item_count]
+            if len(rows) and len(items):
+                # new headings first, so the halo covers this tick's step
+                EnemySwarm.point_rows(
+                    columns, rows[columns["heading_pending"][rows]], speed)
+                # only items reaching into the region and its halo, half an
+                # enemy plus the furthest x step, as items are looked for
+                # after moving
+                halo = columns["offsets"][rows, 0].max() + \
+                    numpy.abs(columns["speeds"][rows, 0]).max()
+                items = items[(items[:, 2] >= left - halo) &
+                              (items[:, 0] <= right + halo)]
+            EnemySwarm.step_rows(columns, rows, items, speed, margin)
+            columns["next_owner"][rows] = RegionSwarm.find_regions(
+                columns["positions"][rows, 0] + columns["offsets"][rows, 0],
+                regions, map_width)
+            connection.send(len(rows))
+        columns = {}
+        RegionSwarm._release(blocks)
+        connection.close()
+
+
+def _time_match(enemies, ticks, seed, workers):
+    """Time a headless spectated match, with region workers if any.
+
+    :param enemies:
+    :param ticks:
+    :param seed:
+    :param workers:
+    :return: milliseconds per tick and the swarm stats, if any
+    """
+    saved_enemies = GameController._NUMBER_ENEMIES
+    GameController._NUMBER_ENEMIES = enemies
+    try:
+        random.seed(seed)
+        swarm = Enemy.create_swarm(RegionSwarm, workers=workers) \
+            if workers else None
+        game = GameController(HeadlessRoot(),
+                              HeadlessCanvas(GameController.CANVAS_WIDTH,
+                                             GameController.CANVAS_HEIGHT),
+                              HeadlessVariable(), "regions", None,
+                              spectate=True, swarm=swarm)
+        game.get_player().set_health(0)
+        start = time.perf_counter()
+        played = 0
+        for played in range(1, ticks + 1):
+            if not game.check_game_condition()[0]:
+                break
+            game.handle_tick(render=False)
+        elapsed = time.perf_counter() - start
+        stats = swarm.get_stats() if swarm is not None else None
+        game.end_game()
+    finally:
+        GameController._NUMBER_ENEMIES = saved_enemies
+    return elapsed / played * 1000, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="time fortnight 8 matches "
+                                                 "stepped by region workers")
+    parser.add_argument("--enemies", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4],
+                        help="worker counts to try, 0 steps in process")
+    arguments = parser.parse_args()
+    for worker_count in arguments.workers:
+        tick_ms, swarm_stats = _time_match(arguments.enemies, arguments.ticks,
+                                           arguments.seed, worker_count)
+        print(f"{worker_count} workers: {tick_ms:.2f} ms/tick"
+              + (f", {swarm_stats}" if swarm_stats is not None else ""))
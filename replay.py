@@ -0,0 +1,509 @@
+"""
+Spectator replays for fortnight 8.
+
+A replay file stores a full keyframe of the world every N ticks and a small
+delta of the world view for every tick in between. The file ends with an
+index of every chunk, so a reader can memory map it and jump to any tick by
+decoding the nearest keyframe and applying at most N - 1 deltas.
+
+Run this file with a replay path to open the viewer.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import bisect
+import mmap
+import struct
+from tkinter import *
+from game import *
+from world_state import WorldState
+from world_view import WorldView
+
+
+class ReplayError(Exception):
+    """Raised when a replay file can not be read."""
+
+
+class ReplayFormat:
+    """Binary layout of replay files."""
+
+    MAGIC = b"FN8R"
+    INDEX_MAGIC = b"FN8X"
+    VERSION = 1
+    # magic, version, flags, keyframe interval
+    FILE_HEADER = struct.Struct("<4sHHI")
+    # tick, chunk type, payload length
+    CHUNK_HEADER = struct.Struct("<IBI")
+    # world state length, followed by the state then a full view
+    KEYFRAME_HEADER = struct.Struct("<I")
+    # tick, chunk type, chunk offset
+    INDEX_ENTRY = struct.Struct("<IBQ")
+    # index offset, index entry count, index magic
+    TRAILER = struct.Struct("<QI4s")
+    KEYFRAME = 1
+    DELTA = 2
+
+
+class ReplayWriter:
+    """Records a running match to a replay file, one chunk per tick."""
+
+    DEFAULT_KEYFRAME_INTERVAL = 300
+
+    def __init__(self, path, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL,
+                 include_states=True):
+        """Open the replay file and write its header.
+
+        :param path:
+        :param keyframe_interval:
+        :param include_states: store a WorldState with each keyframe so the
+            match can be resumed from it, not just watched
+        """
+        self._file = open(path, "wb")
+        self._keyframe_interval = keyframe_interval
+        self._include_states = include_states
+        self._file.write(ReplayFormat.FILE_HEADER.pack(
+            ReplayFormat.MAGIC, ReplayFormat.VERSION, 0, keyframe_interval))
+        self._index = []
+        self._previous_view = None
+        self._last_keyframe_tick = None
+        self._last_tick = None
+
+    def record(self, game):
+        """Record the current tick of a game.
+
+        Writes a keyframe if the keyframe interval has passed, otherwise a
+        delta against the previously recorded tick. Keyframes of a spectated
+        match are written without a state, as it has no player to capture.
+        :param game:
+        :return:
+        """
+        tick = game.get_tick()
+        if tick == self._last_tick:  # the tick has already been recorded
+            return
+        view = game.build_world_view()
+        zone = game.get_zone_view()
+        if self._last_keyframe_tick is None or \
+                tick - self._last_keyframe_tick >= self._keyframe_interval:
+            state = game.capture_state().to_bytes() if \
+                self._include_states and not game.is_spectating() else b""
+            payload = (ReplayFormat.KEYFRAME_HEADER.pack(len(state)) + state +
+                       WorldView.encode_delta(zone, view, {}))
+            chunk_type = ReplayFormat.KEYFRAME
+            self._last_keyframe_tick = tick
+        else:
+            payload = WorldView.encode_delta(zone, view, self._previous_view)
+            chunk_type = ReplayFormat.DELTA
+        self._index.append((tick, chunk_type, self._file.tell()))
+        self._file.write(ReplayFormat.CHUNK_HEADER.pack(tick, chunk_type,
+                                                        len(payload)))
+        self._file.write(payload)
+        self._previous_view = view
+        self._last_tick = tick
+
+    def close(self):
+        """Write the chunk index and trailer, then close the file.
+
+        :return:
+        """
+        index_offset = self._file.tell()
+        self._file.write(b"".join(ReplayFormat.INDEX_ENTRY.pack(*entry)
+                                  for entry in self._index))
+        self._file.write(ReplayFormat.TRAILER.pack(
+            index_offset, len(self._index), ReplayFormat.INDEX_MAGIC))
+        self._file.close()
+
+
+class ReplayReader:
+    """Memory maps a replay file and rebuilds the view of any tick."""
+
+    def __init__(self, path):
+        """Map the file and load its chunk index.
+
+        Files that were not closed properly have no index, so the chunks are
+        scanned instead.
+        :param path:
+        """
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can not be mapped
+            self._file.close()
+            raise ReplayError("replay file is empty")
+        if len(self._data) < ReplayFormat.FILE_HEADER.size:
+            raise ReplayError("replay file is truncated")
+        magic, version, flags, self._keyframe_interval = \
+            ReplayFormat.FILE_HEADER.unpack_from(self._data)
+        if magic != ReplayFormat.MAGIC:
+            raise ReplayError("not a replay file")
+        if version != ReplayFormat.VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        entries = self._read_index()
+        if entries is None:
+            entries = self._scan_chunks()
+        self._ticks = [entry[0] for entry in entries]
+        self._types = [entry[1] for entry in entries]
+        self._offsets = [entry[2] for entry in entries]
+        self._keyframes = [position for position, chunk_type in
+                           enumerate(self._types)
+                           if chunk_type == ReplayFormat.KEYFRAME]
+        # the last decoded frame, so playing forward only applies one delta
+        self._cached_position = None
+        self._cached_frame = None
+
+    def _read_index(self):
+        """Read the index written by ReplayWriter.close, or return None.
+
+        :return:
+        """
+        if len(self._data) < ReplayFormat.FILE_HEADER.size + \
+                ReplayFormat.TRAILER.size:
+            return None
+        index_offset, count, magic = ReplayFormat.TRAILER.unpack_from(
+            self._data, len(self._data) - ReplayFormat.TRAILER.size)
+        if magic != ReplayFormat.INDEX_MAGIC:
+            return None
+        end = index_offset + count * ReplayFormat.INDEX_ENTRY.size
+        return list(ReplayFormat.INDEX_ENTRY.iter_unpack(
+            self._data[index_offset:end]))
+
+    def _scan_chunks(self):
+        """Build the index by walking every chunk from the start.
+
+        :return:
+        """
+        entries = []
+        offset = ReplayFormat.FILE_HEADER.size
+        header_size = ReplayFormat.CHUNK_HEADER.size
+        while offset + header_size <= len(self._data):
+            tick, chunk_type, length = ReplayFormat.CHUNK_HEADER.unpack_from(
+                self._data, offset)
+            if offset + header_size + length > len(self._data):
+                break  # the last chunk was cut off
+            entries.append((tick, chunk_type, offset))
+            offset += header_size + length
+        return entries
+
+    def get_first_tick(self):
+        """Return the first recorded tick.
+
+        :return:
+        """
+        return self._ticks[0] if self._ticks else 0
+
+    def get_last_tick(self):
+        """Return the last recorded tick.
+
+        :return:
+        """
+        return self._ticks[-1] if self._ticks else 0
+
+    def get_keyframe_interval(self):
+        """Return the keyframe interval the replay was written with.
+
+        :return:
+        """
+        return self._keyframe_interval
+
+    def _payload(self, position):
+        """Return a zero copy view of the payload of a chunk.
+
+        :param position:
+        :return:
+        """
+        offset = self._offsets[position]
+        tick, chunk_type, length = ReplayFormat.CHUNK_HEADER.unpack_from(
+            self._data, offset)
+        start = offset + ReplayFormat.CHUNK_HEADER.size
+        return memoryview(self._data)[start:start + length]
+
+    def _position_of(self, tick):
+        """Return the index position of the last chunk at or before a tick.
+
+        :param tick:
+        :return:
+        """
+        if not self._ticks:
+            raise ReplayError("replay has no ticks")
+        return max(0, bisect.bisect_right(self._ticks, tick) - 1)
+
+    def get_frame(self, tick):
+        """Return the tick, zone and world view shown at a tick.
+
+        Decodes the nearest keyframe at or before the tick and applies the
+        deltas after it. If the last decoded frame lies between the keyframe
+        and the tick, decoding continues from there instead.
+        :param tick:
+        :return:
+        """
+        position = self._position_of(tick)
+        keyframe = self._keyframes[bisect.bisect_right(self._keyframes,
+                                                       position) - 1]
+        if self._cached_position is not None and \
+                keyframe <= self._cached_position <= position:
+            start = self._cached_position
+            zone, view = self._cached_frame
+        else:
+            payload = self._payload(keyframe)
+            state_length, = ReplayFormat.KEYFRAME_HEADER.unpack_from(payload)
+            zone, view, offset = WorldView.decode_delta(
+                payload, ReplayFormat.KEYFRAME_HEADER.size + state_length, {})
+            start = keyframe
+        for delta_position in range(start + 1, position + 1):
+            zone, view, offset = WorldView.decode_delta(
+                self._payload(delta_position), 0, view)
+        self._cached_position = position
+        self._cached_frame = (zone, view)
+        return self._ticks[position], zone, view
+
+    def get_state(self, tick):
+        """Return the WorldState of the nearest keyframe at or before a tick.
+
+        Returns None if the replay was written without states.
+        :param tick:
+        :return:
+        """
+        position = self._position_of(tick)
+        keyframe = self._keyframes[bisect.bisect_right(self._keyframes,
+                                                       position) - 1]
+        payload = self._payload(keyframe)
+        state_length, = ReplayFormat.KEYFRAME_HEADER.unpack_from(payload)
+        if not state_length:
+            return None
+        start = ReplayFormat.KEYFRAME_HEADER.size
+        return WorldState.from_bytes(payload[start:start + state_length])
+
+    def close(self):
+        """Unmap and close the file.
+
+        :return:
+        """
+        self._data.close()
+        self._file.close()
+
+
+class ReplayViewer:
+    """Draws replay frames on a canvas with the game's sprites."""
+
+    def __init__(self, canvas, reader=None):
+        """Initiate self variables and the zone canvas object.
+
+        :param canvas:
+        :param reader: replay reader, or None if frames are passed to
+            show_frame directly
+        """
+        self._canvas = canvas
+        self._reader = reader
+        self._canvas.config(width=GameController.CAMERA_WIDTH,
+                            height=GameController.CAMERA_HEIGHT,
+                            scrollregion=(0, 0, GameController.CANVAS_WIDTH,
+                                          GameController.CANVAS_HEIGHT))
+        self._zone = self._canvas.create_oval(0, 0, 0, 0,
+                                              fill=Zone._ZONE_COLOUR)
+        # record id -> [image item, health text item, record]
+        self._items = {}
+        self._tick = reader.get_first_tick() if reader is not None else 0
+        self._follow_id = None
+
+    def get_tick(self):
+        """Return the tick currently shown.
+
+        :return:
+        """
+        return self._tick
+
+    def follow(self, record_id):
+        """Follow a record id with the camera, or the player when None.
+
+        :param record_id:
+        :return:
+        """
+        self._follow_id = record_id
+
+    def show_tick(self, tick):
+        """Show the frame of a tick.
+
+        Only canvas items whose record changed since the frame shown last
+        are touched, so scrubbing costs one delta sync.
+        :param tick:
+        :return:
+        """
+        self.show_frame(*self._reader.get_frame(tick))
+
+    def show_frame(self, tick, zone, view):
+        """Show a frame of a tick from its zone and world view.
+
+        :param tick:
+        :param zone: zone view (centre x, centre y, radius)
+        :param view:
+        :return:
+        """
+        self._tick = tick
+        self._canvas.coords(self._zone, zone[0] - zone[2], zone[1] - zone[2],
+                            zone[0] + zone[2], zone[1] + zone[2])
+        for record_id in [record_id for record_id in self._items
+                          if record_id not in view]:
+            self._delete_record(record_id)
+        for record_id, record in view.items():
+            items = self._items.get(record_id)
+            if items is None:
+                self._create_record(record_id, record)
+            elif items[2] != record:
+                self._update_record(items, record)
+        self._centre_camera(view)
+
+    def _create_record(self, record_id, record):
+        """Create the canvas items for a new record.
+
+        :param record_id:
+        :param record:
+        :return:
+        """
+        kind, x_position, y_position, health, variant = record
+        image_path, width, height = GameController.get_view_sprite(
+            kind, variant)
+        image_item = self._canvas.create_image(
+            x_position, y_position, anchor="nw",
+            image=SpriteImageCache.get_image(self._canvas, image_path, width,
+                                             height))
+        text_item = None
+        if kind in (WorldView.KIND_ENEMY, WorldView.KIND_PLAYER):
+            # health text sits one sprite height above the sprite centre
+            text_item = self._canvas.create_text(x_position + width / 2,
+                                                 y_position - height / 2,
+                                                 text=f"{health}")
+        self._items[record_id] = [image_item, text_item, record]
+
+    def _update_record(self, items, record):
+        """Update the canvas items of a changed record.
+
+        :param items:
+        :param record:
+        :return:
+        """
+        kind, x_position, y_position, health, variant = record
+        old_kind, old_x, old_y, old_health, old_variant = items[2]
+        image_path, width, height = GameController.get_view_sprite(
+            kind, variant)
+        if (kind, variant) != (old_kind, old_variant):
+            self._canvas.itemconfigure(
+                items[0], image=SpriteImageCache.get_image(
+                    self._canvas, image_path, width, height))
+        if (x_position, y_position) != (old_x, old_y):
+            self._canvas.coords(items[0], x_position, y_position)
+            if items[1] is not None:
+                self._canvas.coords(items[1], x_position + width / 2,
+                                    y_position - height / 2)
+        if health != old_health and items[1] is not None:
+            self._canvas.itemconfigure(items[1], text=f"{health}")
+        items[2] = record
+
+    def _delete_record(self, record_id):
+        """Delete the canvas items of a record that is no longer shown.
+
+        :param record_id:
+        :return:
+        """
+        image_item, text_item, record = self._items.pop(record_id)
+        self._canvas.delete(image_item)
+        if text_item is not None:
+            self._canvas.delete(text_item)
+
+    def _centre_camera(self, view):
+        """Centre the view on the followed record, if it is shown.
+
+        :param view:
+        :return:
+        """
+        record = view.get(self._follow_id) if self._follow_id is not None \
+            else next((record for record in view.values()
+                       if record[0] == WorldView.KIND_PLAYER), None)
+        if record is None:
+            return
+        image_path, width, height = GameController.get_view_sprite(
+            record[0], record[4])
+        centre_x = record[1] + width / 2 - GameController.CAMERA_WIDTH / 2
+        centre_y = record[2] + height / 2 - GameController.CAMERA_HEIGHT / 2
+        self._canvas.xview_moveto(centre_x / GameController.CANVAS_WIDTH)
+        self._canvas.yview_moveto(centre_y / GameController.CANVAS_HEIGHT)
+
+    def clear(self):
+        """Delete every canvas item made by the viewer.
+
+        :return:
+        """
+        for record_id in list(self._items):
+            self._delete_record(record_id)
+        self._canvas.delete(self._zone)
+
+
+class ReplayWindow:
+    """A Tk window with a scrub bar for watching a replay file."""
+
+    _TICK_SPEED = 17
+
+    def __init__(self, path):
+        """Set up the window and start showing the replay.
+
+        :param path:
+        """
+        self._reader = ReplayReader(path)
+        self._root = Tk()
+        self._root.title(f"replay - {path}")
+        self._canvas = Canvas(self._root)
+        self._canvas.pack()
+        self._viewer = ReplayViewer(self._canvas, self._reader)
+        self._playing = False
+        self._scrub_bar = Scale(self._root, orient=HORIZONTAL,
+                                length=GameController.CAMERA_WIDTH,
+                                from_=self._reader.get_first_tick(),
+                                to=self._reader.get_last_tick(),
+                                command=self._scrubbed)
+        self._scrub_bar.pack()
+        self._play_button = Button(self._root, text="play",
+                                   command=self._toggle_playing)
+        self._play_button.pack()
+        self._viewer.show_tick(self._reader.get_first_tick())
+        self._root.mainloop()
+        self._reader.close()
+
+    def _scrubbed(self, value):
+        """Jump to the tick chosen on the scrub bar.
+
+        :param value:
+        :return:
+        """
+        if int(value) != self._viewer.get_tick():
+            self._viewer.show_tick(int(value))
+
+    def _toggle_playing(self):
+        """Start or pause playback.
+
+        :return:
+        """
+        self._playing = not self._playing
+        self._play_button.config(text="pause" if self._playing else "play")
+        if self._playing:
+            self._play_tick()
+
+    def _play_tick(self):
+        """Show the next tick and schedule the one after.
+
+        :return:
+        """
+        if not self._playing:
+            return
+        if self._viewer.get_tick() >= self._reader.get_last_tick():
+            self._toggle_playing()
+            return
+        self._viewer.show_tick(self._viewer.get_tick() + 1)
+        self._scrub_bar.set(self._viewer.get_tick())
+        self._root.after(ReplayWindow._TICK_SPEED, self._play_tick)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="watch a fortnight 8 replay")
+    parser.add_argument("path")
+    arguments = parser.parse_args()
+    ReplayWindow(arguments.path)
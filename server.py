@@ -0,0 +1,919 @@
+"""
+Authoritative local game server for fortnight 8.
+
+Runs the game world without a window and lets several players join over
+TCP. Clients send their key and mouse input as messages, and each client is
+sent only the entities inside its own camera area, as binary snapshots that
+are delta compressed against the last snapshot the client acknowledged.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import selectors
+import socket
+import struct
+import time
+from game import *
+from headless import HeadlessCanvas, HeadlessRoot, HeadlessVariable
+from metrics import MetricsServer, TickMetrics
+from replay import ReplayWriter
+from telemetry import EventRingBuffer, TelemetryEvent, TelemetryWriter
+from world_view import WorldView
+
+
+class Protocol:
+    """Message framing and binary layouts shared by server and client."""
+
+    # every message starts with the payload length and message type
+    HEADER = struct.Struct("<IB")
+    # client -> server messages
+    KEY_PRESS = 1
+    KEY_RELEASE = 2
+    MOUSE_MOVE = 3
+    MOUSE_DOWN = 4
+    MOUSE_UP = 5
+    DROP_GUN = 6
+    ACK = 7
+    # server -> client messages
+    WELCOME = 16
+    SNAPSHOT = 17
+    GAME_OVER = 18
+    # payload layouts
+    MOUSE = struct.Struct("<hh")
+    TICK = struct.Struct("<I")
+    WELCOME_LAYOUT = struct.Struct("<I")
+    GAME_OVER_LAYOUT = struct.Struct("<B")
+    # tick, baseline tick, then a world view delta
+    SNAPSHOT_HEADER = struct.Struct("<II")
+
+    @staticmethod
+    def pack(message_type, payload=b""):
+        """Frame a payload as a message.
+
+        :param message_type:
+        :param payload:
+        :return:
+        """
+        return Protocol.HEADER.pack(len(payload), message_type) + payload
+
+    @staticmethod
+    def unpack_messages(buffer):
+        """Split complete messages off the front of a receive buffer.
+
+        Returns a list of (type, payload) tuples and the unused remainder.
+        :param buffer:
+        :return:
+        """
+        messages = []
+        offset = 0
+        header_size = Protocol.HEADER.size
+        while len(buffer) - offset >= header_size:
+            length, message_type = Protocol.HEADER.unpack_from(buffer, offset)
+            if len(buffer) - offset - header_size < length:
+                break  # wait for the rest of the message
+            start = offset + header_size
+            messages.append((message_type, bytes(buffer[start:start+length])))
+            offset = start + length
+        return messages, buffer[offset:]
+
+    @staticmethod
+    def encode_snapshot(tick, baseline_tick, zone, view, baseline):
+        """Encode a view as a snapshot delta against a baseline view.
+
+        :param tick:
+        :param baseline_tick:
+        :param zone:
+        :param view:
+        :param baseline:
+        :return:
+        """
+        return (Protocol.SNAPSHOT_HEADER.pack(tick, baseline_tick) +
+                WorldView.encode_delta(zone, view, baseline))
+
+    @staticmethod
+    def decode_snapshot(payload, baseline):
+        """Decode a snapshot payload on top of its baseline view.
+
+        Returns the tick, baseline tick, zone tuple and the rebuilt view.
+        :param payload:
+        :param baseline:
+        :return:
+        """
+        tick, baseline_tick = Protocol.SNAPSHOT_HEADER.unpack_from(payload, 0)
+        zone, view, offset = WorldView.decode_delta(
+            payload, Protocol.SNAPSHOT_HEADER.size, baseline)
+        return tick, baseline_tick, zone, view
+
+
+class ServerGameController(GameController):
+    """A windowless game world driven by remote players instead of binds."""
+
+    _SPAWN_MARGIN = 200
+
+    def __init__(self, telemetry=None, ai_budget=None):
+        """Initiate the headless world.
+
+        Builds the normal game world on a headless canvas, then removes the
+        local player and battle bus, as every player joins remotely.
+        :param telemetry:
+        :param ai_budget: milliseconds of enemy decisions per tick, or None
+        """
+        super().__init__(HeadlessRoot(),
+                         HeadlessCanvas(GameController.CANVAS_WIDTH,
+                                        GameController.CANVAS_HEIGHT),
+                         HeadlessVariable(), "server", None, telemetry,
+                         ai_budget=ai_budget)
+        self._delete_battle_bus()
+        self._player.delete_canvas_object()
+        self._player.cleanup()
+        self._alive_counter.enemy_killed()  # the host player is not playing
+        self._remote_players = {}
+        self._remote_shoot = {}
+        self._remote_mouse_targets = {}
+        self._remote_camera_centres = {}
+        self._dead_remote_players = []
+        self._had_remote_players = False
+
+    def add_remote_player(self):
+        """Spawn a player for a newly connected client.
+
+        Returns the player id, which is also used to route its input.
+        :return:
+        """
+        margin = ServerGameController._SPAWN_MARGIN
+        player = Player(self._canvas,
+                        random.randint(margin,
+                                       GameController.CANVAS_WIDTH - margin),
+                        random.randint(margin,
+                                       GameController.CANVAS_HEIGHT - margin))
+        player_id = player.get_id()
+        self._remote_players[player_id] = player
+        self._emit_event(TelemetryEvent.SPAWN, player_id,
+                         value=WorldView.KIND_PLAYER)
+        self._remote_shoot[player_id] = False
+        self._remote_mouse_targets[player_id] = player.coordinates()
+        self._remote_camera_centres[player_id] = player.coordinates()
+        self._alive_counter.player_joined()
+        self._had_remote_players = True
+        return player_id
+
+    def get_remote_player(self, player_id):
+        """Return the remote player instance with an id, or None if dead.
+
+        :param player_id:
+        :return:
+        """
+        return self._remote_players.get(player_id)
+
+    def remove_remote_player(self, player_id):
+        """Remove the player of a disconnected client.
+
+        :param player_id:
+        :return:
+        """
+        player = self._remote_players.get(player_id)
+        if player is not None:
+            self._kill_remote_player(player)
+        self._remote_shoot.pop(player_id, None)
+        self._remote_mouse_targets.pop(player_id, None)
+        self._remote_camera_centres.pop(player_id, None)
+
+    def pop_dead_remote_players(self):
+        """Return and clear the ids of remote players that died.
+
+        :return:
+        """
+        dead_players = self._dead_remote_players
+        self._dead_remote_players = []
+        return dead_players
+
+    def apply_input(self, player_id, message_type, payload):
+        """Apply an input message to a remote player.
+
+        Mirrors the key, mouse and drop binds of the local game.
+        :param player_id:
+        :param message_type:
+        :param payload:
+        :return:
+        """
+        player = self._remote_players.get(player_id)
+        if player is None:  # dead players can not act
+            return
+        if message_type in (Protocol.KEY_PRESS, Protocol.KEY_RELEASE):
+            keysym = payload.decode("utf-8", "replace")
+            speed = Player.DEFAULT_SPEED if \
+                message_type == Protocol.KEY_PRESS else 0
+            if keysym == GameController._UP_BIND:
+                player.set_y_speed(-speed)
+            if keysym == GameController._DOWN_BIND:
+                player.set_y_speed(speed)
+            if keysym == GameController._LEFT_BIND:
+                player.set_x_speed(-speed)
+            if keysym == GameController._RIGHT_BIND:
+                player.set_x_speed(speed)
+        elif message_type == Protocol.MOUSE_MOVE:
+            mouse_x, mouse_y = Protocol.MOUSE.unpack(payload)
+            # mouse coordinates are relative to the client camera, which is
+            # always centred on the player
+            player_coordinates = player.coordinates()
+            self._remote_mouse_targets[player_id] = [
+                mouse_x - GameController.CAMERA_WIDTH/2 +
+                player_coordinates[0],
+                mouse_y - GameController.CAMERA_HEIGHT/2 +
+                player_coordinates[1]]
+        elif message_type == Protocol.MOUSE_DOWN:
+            self._remote_shoot[player_id] = True
+        elif message_type == Protocol.MOUSE_UP:
+            self._remote_shoot[player_id] = False
+        elif message_type == Protocol.DROP_GUN:
+            self._drop_weapon(player)
+
+    def _kill_remote_player(self, player):
+        """Remove a dead or disconnected remote player from the world.
+
+        :param player:
+        :return:
+        """
+        player_id = player.get_id()
+        self._emit_event(TelemetryEvent.KILL, player_id,
+                         self._get_entity_id(player.get_last_attacker()))
+        self._record_death(player)
+        # the gun stays on the map for others
+        self._drop_weapon(player, leaving=True)
+        player.delete_canvas_object()
+        player.cleanup()
+        self._remote_players.pop(player_id)
+        self._alive_counter.enemy_killed()
+        self._dead_remote_players.append(player_id)
+
+    def _centre_camera(self):
+        """Do nothing, every client has its own camera.
+
+        :return:
+        """
+
+    def _handle_player(self):
+        """Handle all remote players.
+
+        Runs the human player handler for each remote player, and removes
+        any that have died.
+        :return:
+        """
+        for player_id, player in list(self._remote_players.items()):
+            if player.get_health() > 0:
+                self._handle_human_player(
+                    player, self._remote_shoot[player_id],
+                    self._remote_mouse_targets[player_id])
+                self._remote_camera_centres[player_id] = player.coordinates()
+            else:
+                self._kill_remote_player(player)
+
+    def _get_attackers(self):
+        """Return a list of every enemy and remote player.
+
+        :return:
+        """
+        attackers = list(self._enemies.values())
+        attackers.extend(self._remote_players.values())
+        return attackers
+
+    def _get_attacker(self, attacker_id):
+        """Return the enemy or remote player with the given id.
+
+        :param attacker_id:
+        :return:
+        """
+        enemy = self._enemies.get(attacker_id)
+        if enemy is not None:
+            return enemy
+        return self._remote_players.get(attacker_id)
+
+    def _cleanup_players(self):
+        """Clean up the remaining remote players.
+
+        :return:
+        """
+        for player in self._remote_players.values():
+            player.delete_canvas_object()
+            player.cleanup()
+        self._remote_players.clear()
+
+    def get_winner(self):
+        """Return the id of the last remote player alive, if there is one.
+
+        :return:
+        """
+        if self._alive_counter.get_alive_count() == 1 and \
+                len(self._remote_players) == 1:
+            return next(iter(self._remote_players))
+        return None
+
+    def check_game_condition(self):
+        """Check whether the match should keep running.
+
+        The match ends when one attacker is left, or when every player that
+        joined has died.
+        :return:
+        """
+        if self._alive_counter.get_alive_count() <= 1 or \
+                (self._had_remote_players and not self._remote_players):
+            return False
+        return True
+
+    def end_game(self):
+        """Tear down the world.
+
+        :return:
+        """
+        winner = self.get_winner()
+        self._emit_event(TelemetryEvent.MATCH_END,
+                         TelemetryEvent.NO_ENTITY if winner is None
+                         else winner)
+        super().end_game()
+
+    def build_player_view(self, player_id):
+        """Build the interest set for one player.
+
+        Returns the world view of the camera area of the player. Only the
+        canvas grid cells under the camera are inspected, so the cost depends
+        on what is visible, not on how many entities exist.
+        :param player_id:
+        :return:
+        """
+        centre = self._remote_camera_centres.get(player_id)
+        if centre is None:
+            return {}
+        half_width = GameController.CAMERA_WIDTH / 2
+        half_height = GameController.CAMERA_HEIGHT / 2
+        return self.build_view(centre[0] - half_width, centre[1] - half_height,
+                               centre[0] + half_width, centre[1] + half_height)
+
+
+class RemoteClient:
+    """A connected client - its socket buffers and snapshot history."""
+
+    # how many unacknowledged snapshots are kept as possible baselines
+    _HISTORY_LENGTH = 64
+    # snapshots are skipped while this much output is still unsent
+    _MAX_PENDING_OUTPUT = 256 * 1024
+
+    def __init__(self, connection, player_id, network_id):
+        """Initiate self variables.
+
+        :param connection:
+        :param player_id:
+        :param network_id:
+        """
+        self._connection = connection
+        self._player_id = player_id
+        self._network_id = network_id
+        self._input_buffer = b""
+        self._output_buffer = bytearray()
+        self._sent_views = {}
+        self._acked_tick = 0
+        self._bytes_sent = 0
+
+    def get_connection(self):
+        """Return own socket.
+
+        :return:
+        """
+        return self._connection
+
+    def get_player_id(self):
+        """Return the id of the player this client controls.
+
+        :return:
+        """
+        return self._player_id
+
+    def get_bytes_sent(self):
+        """Return how many bytes have been sent to this client.
+
+        :return:
+        """
+        return self._bytes_sent
+
+    def receive(self, data):
+        """Buffer received data and return any complete messages.
+
+        :param data:
+        :return:
+        """
+        messages, self._input_buffer = Protocol.unpack_messages(
+            self._input_buffer + data)
+        return messages
+
+    def acknowledge(self, tick):
+        """Record that the client has received a snapshot.
+
+        Older snapshots can no longer be used as baselines, so they are
+        dropped from the history.
+        :param tick:
+        :return:
+        """
+        if tick not in self._sent_views or tick <= self._acked_tick:
+            return
+        self._acked_tick = tick
+        for sent_tick in [sent_tick for sent_tick in self._sent_views
+                          if sent_tick < tick]:
+            del self._sent_views[sent_tick]
+
+    def queue(self, message):
+        """Queue a framed message for sending.
+
+        :param message:
+        :return:
+        """
+        self._output_buffer += message
+
+    def queue_snapshot(self, tick, zone, view):
+        """Queue a snapshot delta compressed against the acknowledged view.
+
+        :param tick:
+        :param zone:
+        :param view:
+        :return:
+        """
+        if len(self._output_buffer) > RemoteClient._MAX_PENDING_OUTPUT:
+            return  # the client is behind, the next delta will catch it up
+        baseline = self._sent_views.get(self._acked_tick)
+        if baseline is None:  # nothing acknowledged yet, send everything
+            baseline_tick = 0
+            baseline = {}
+        else:
+            baseline_tick = self._acked_tick
+        self.queue(Protocol.pack(Protocol.SNAPSHOT, Protocol.encode_snapshot(
+            tick, baseline_tick, zone, view, baseline)))
+        self._sent_views[tick] = view
+        if len(self._sent_views) > RemoteClient._HISTORY_LENGTH:
+            # the client is not acknowledging, forget the oldest views
+            oldest_tick = next(iter(self._sent_views))
+            del self._sent_views[oldest_tick]
+            if oldest_tick == self._acked_tick:
+                self._acked_tick = 0
+
+    def flush(self):
+        """Send as much of the queued output as the socket will take.
+
+        :return:
+        """
+        if not self._output_buffer:
+            return
+        try:
+            sent = self._connection.send(self._output_buffer)
+        except BlockingIOError:
+            return
+        del self._output_buffer[:sent]
+        self._bytes_sent += sent
+
+    def has_pending_output(self):
+        """Return whether queued output is waiting to be sent.
+
+        :return:
+        """
+        return bool(self._output_buffer)
+
+
+class GameServer:
+    """Accepts clients over TCP and runs a ServerGameController."""
+
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 5050
+    _TICK_SPEED = 17  # milliseconds per tick, same as the menu
+    _RECEIVE_SIZE = 4096
+    _LISTEN_BACKLOG = 16
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 tick_speed=_TICK_SPEED, telemetry=None, metrics=None,
+                 ai_budget=None, replay_writer=None):
+        """Initiate self variables and start listening.
+
+        :param host:
+        :param port:
+        :param tick_speed:
+        :param telemetry: event ring buffer the match writes events to
+        :param metrics: TickMetrics that ticks are recorded to
+        :param ai_budget: milliseconds of enemy decisions per tick, or None
+        :param replay_writer: ReplayWriter every tick is recorded to, closed
+            with the server
+        """
+        self._game = ServerGameController(telemetry, ai_budget)
+        self._metrics = metrics
+        self._replay_writer = replay_writer
+        self._tick_interval = tick_speed / 1000
+        self._selector = selectors.DefaultSelector()
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, port))
+        self._listener.listen(GameServer._LISTEN_BACKLOG)
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._clients = {}
+        self._running = False
+
+    def get_address(self):
+        """Return the address the server is listening on.
+
+        :return:
+        """
+        return self._listener.getsockname()
+
+    def get_game(self):
+        """Return the server game controller.
+
+        :return:
+        """
+        return self._game
+
+    def get_clients(self):
+        """Return a list of the connected clients.
+
+        :return:
+        """
+        return list(self._clients.values())
+
+    def stop(self):
+        """Stop the run loop after the current tick.
+
+        :return:
+        """
+        self._running = False
+
+    def run(self, max_ticks=None):
+        """Run the server until the match ends or it is stopped.
+
+        Waits on the sockets between ticks, so input is applied as soon as
+        it arrives and ticks stay on schedule.
+        :param max_ticks:
+        :return:
+        """
+        self._running = True
+        next_tick = time.perf_counter()
+        while self._running:
+            timeout = max(0.0, next_tick - time.perf_counter())
+            for key, mask in self._selector.select(timeout):
+                if key.fileobj is self._listener:
+                    self._accept()
+                else:
+                    self._read(key.fileobj)
+            if time.perf_counter() >= next_tick:
+                next_tick += self._tick_interval
+                self._run_tick()
+                if max_ticks is not None and \
+                        self._game.get_tick() >= max_ticks:
+                    self._running = False
+        self.close()
+
+    def _run_tick(self):
+        """Simulate one tick then send every client its snapshot.
+
+        :return:
+        """
+        if not self._game.check_game_condition():
+            self._end_match()
+            return
+        tick_start = time.perf_counter()
+        self._game.handle_tick()
+        if self._metrics is not None:
+            self._metrics.record_tick(time.perf_counter() - tick_start,
+                                      self._game)
+        if self._replay_writer is not None:
+            self._replay_writer.record(self._game)
+        for player_id in self._game.pop_dead_remote_players():
+            client = self._clients.get(player_id)
+            if client is not None:
+                client.queue(Protocol.pack(
+                    Protocol.GAME_OVER, Protocol.GAME_OVER_LAYOUT.pack(0)))
+        tick = self._game.get_tick()
+        zone = self._game.get_zone_view()
+        for client in self._clients.values():
+            client.queue_snapshot(tick, zone, self._game.build_player_view(
+                client.get_player_id()))
+            client.flush()
+
+    def _end_match(self):
+        """Tell every client the match is over and stop running.
+
+        :return:
+        """
+        winner = self._game.get_winner()
+        for player_id, client in self._clients.items():
+            client.queue(Protocol.pack(
+                Protocol.GAME_OVER,
+                Protocol.GAME_OVER_LAYOUT.pack(int(player_id == winner))))
+            client.flush()
+        self._game.end_game()
+        self._running = False
+
+    def _accept(self):
+        """Accept a new client and spawn its player.
+
+        :return:
+        """
+        connection, address = self._listener.accept()
+        connection.setblocking(False)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        player_id = self._game.add_remote_player()
+        network_id = self._game.get_remote_player(
+            player_id).get_canvas_object()
+        client = RemoteClient(connection, player_id, network_id)
+        self._clients[player_id] = client
+        self._selector.register(connection, selectors.EVENT_READ, player_id)
+        client.queue(Protocol.pack(Protocol.WELCOME,
+                                   Protocol.WELCOME_LAYOUT.pack(network_id)))
+        client.flush()
+
+    def _read(self, connection):
+        """Read from a client and apply its messages.
+
+        :param connection:
+        :return:
+        """
+        player_id = self._selector.get_key(connection).data
+        client = self._clients[player_id]
+        try:
+            data = connection.recv(GameServer._RECEIVE_SIZE)
+        except BlockingIOError:
+            return
+        except ConnectionResetError:
+            data = b""
+        if not data:  # the client has disconnected
+            self._disconnect(client)
+            return
+        for message_type, payload in client.receive(data):
+            if message_type == Protocol.ACK:
+                client.acknowledge(Protocol.TICK.unpack(payload)[0])
+            else:
+                self._game.apply_input(player_id, message_type, payload)
+
+    def _disconnect(self, client):
+        """Forget a client and remove its player.
+
+        :param client:
+        :return:
+        """
+        player_id = client.get_player_id()
+        self._selector.unregister(client.get_connection())
+        client.get_connection().close()
+        del self._clients[player_id]
+        self._game.remove_remote_player(player_id)
+        self._game.pop_dead_remote_players()
+
+    def close(self):
+        """Close every socket, and finish the replay file if recording.
+
+        :return:
+        """
+        if self._replay_writer is not None:
+            self._replay_writer.close()
+            self._replay_writer = None
+        for client in list(self._clients.values()):
+            self._selector.unregister(client.get_connection())
+            client.get_connection().close()
+        self._clients.clear()
+        self._selector.unregister(self._listener)
+        self._listener.close()
+        self._selector.close()
+
+
+class GameClient:
+    """Connects to a GameServer, sends input and tracks the visible world."""
+
+    _RECEIVE_SIZE = 65536
+    _STATE_HISTORY_LENGTH = 64
+
+    def __init__(self, host=GameServer.DEFAULT_HOST,
+                 port=GameServer.DEFAULT_PORT):
+        """Connect to the server.
+
+        :param host:
+        :param port:
+        """
+        self._connection = socket.create_connection((host, port))
+        self._connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._input_buffer = b""
+        self._states = {}
+        self._tick = 0
+        self._zone = (0, 0, 0)
+        self._network_id = None
+        self._game_over = False
+        self._won = False
+        self._closed = False
+        self._bytes_received = 0
+
+    def _send(self, message_type, payload=b""):
+        """Send a message to the server.
+
+        :param message_type:
+        :param payload:
+        :return:
+        """
+        if self._closed:
+            return
+        try:
+            self._connection.sendall(Protocol.pack(message_type, payload))
+        except (BrokenPipeError, ConnectionResetError):
+            self._closed = True  # the server has gone, poll will report it
+
+    def key_press(self, keysym):
+        """Send a key press, like the local _key_pressed bind.
+
+        :param keysym:
+        :return:
+        """
+        self._send(Protocol.KEY_PRESS, keysym.encode("utf-8"))
+
+    def key_release(self, keysym):
+        """Send a key release, like the local _key_released bind.
+
+        :param keysym:
+        :return:
+        """
+        self._send(Protocol.KEY_RELEASE, keysym.encode("utf-8"))
+
+    def mouse_move(self, x_position, y_position):
+        """Send a mouse position relative to the camera.
+
+        :param x_position:
+        :param y_position:
+        :return:
+        """
+        self._send(Protocol.MOUSE_MOVE, Protocol.MOUSE.pack(
+            WorldView.clamp_short(x_position),
+            WorldView.clamp_short(y_position)))
+
+    def mouse_down(self):
+        """Start shooting.
+
+        :return:
+        """
+        self._send(Protocol.MOUSE_DOWN)
+
+    def mouse_up(self):
+        """Stop shooting.
+
+        :return:
+        """
+        self._send(Protocol.MOUSE_UP)
+
+    def drop_gun(self):
+        """Drop the held gun.
+
+        :return:
+        """
+        self._send(Protocol.DROP_GUN)
+
+    def poll(self, timeout=0.0):
+        """Receive and apply any messages from the server.
+
+        Each snapshot is rebuilt on top of its baseline and acknowledged.
+        Returns False once the connection has closed.
+        :param timeout:
+        :return:
+        """
+        if self._closed:
+            return False
+        self._connection.settimeout(timeout)
+        try:
+            data = self._connection.recv(GameClient._RECEIVE_SIZE)
+        except (socket.timeout, BlockingIOError):
+            return True
+        except ConnectionResetError:
+            data = b""
+        finally:  # sends, acks included, block until written
+            self._connection.settimeout(None)
+        if not data:
+            self._closed = True
+            return False
+        self._bytes_received += len(data)
+        messages, self._input_buffer = Protocol.unpack_messages(
+            self._input_buffer + data)
+        for message_type, payload in messages:
+            if message_type == Protocol.WELCOME:
+                self._network_id = Protocol.WELCOME_LAYOUT.unpack(payload)[0]
+            elif message_type == Protocol.SNAPSHOT:
+                self._apply_snapshot(payload)
+            elif message_type == Protocol.GAME_OVER:
+                self._game_over = True
+                self._won = bool(Protocol.GAME_OVER_LAYOUT.unpack(payload)[0])
+        return True
+
+    def _apply_snapshot(self, payload):
+        """Rebuild the visible world from a snapshot and acknowledge it.
+
+        :param payload:
+        :return:
+        """
+        baseline_tick = Protocol.SNAPSHOT_HEADER.unpack_from(payload, 0)[1]
+        baseline = self._states.get(baseline_tick, {}) if baseline_tick \
+            else {}
+        tick, baseline_tick, self._zone, view = Protocol.decode_snapshot(
+            payload, baseline)
+        self._states[tick] = view
+        self._tick = tick
+        # baselines older than the one just used will never be sent again
+        for old_tick in [old_tick for old_tick in self._states
+                         if old_tick < baseline_tick]:
+            del self._states[old_tick]
+        while len(self._states) > GameClient._STATE_HISTORY_LENGTH:
+            del self._states[next(iter(self._states))]
+        self._send(Protocol.ACK, Protocol.TICK.pack(tick))
+
+    def get_entities(self):
+        """Return the latest view, network id to entity record.
+
+        :return:
+        """
+        return self._states.get(self._tick, {})
+
+    def get_tick(self):
+        """Return the tick of the latest snapshot.
+
+        :return:
+        """
+        return self._tick
+
+    def get_zone(self):
+        """Return the latest zone centre x, centre y and radius.
+
+        :return:
+        """
+        return self._zone
+
+    def get_network_id(self):
+        """Return the network id of own player.
+
+        :return:
+        """
+        return self._network_id
+
+    def get_bytes_received(self):
+        """Return how many bytes have been received.
+
+        :return:
+        """
+        return self._bytes_received
+
+    def is_game_over(self):
+        """Return whether the server has ended the game for this client.
+
+        :return:
+        """
+        return self._game_over
+
+    def has_won(self):
+        """Return whether this client won.
+
+        :return:
+        """
+        return self._won
+
+    def close(self):
+        """Close the connection.
+
+        :return:
+        """
+        self._connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="run a fortnight 8 server")
+    parser.add_argument("--host", default=GameServer.DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=GameServer.DEFAULT_PORT)
+    parser.add_argument("--telemetry", metavar="DIRECTORY",
+                        help="write gameplay events to rotating files here")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve live metrics on this localhost port")
+    parser.add_argument("--ai-budget", type=float, metavar="MILLISECONDS",
+                        help="limit enemy decisions per tick to this time")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the match to this replay file")
+    arguments = parser.parse_args()
+    events = None
+    writer = None
+    if arguments.telemetry is not None:
+        events = EventRingBuffer()
+        writer = TelemetryWriter(events, arguments.telemetry)
+    tick_metrics = None
+    metrics_server = None
+    if arguments.metrics_port is not None:
+        tick_metrics = TickMetrics()
+        metrics_server = MetricsServer(tick_metrics, arguments.metrics_port)
+    # remote players are not part of a world state, so only the views are
+    # recorded
+    replay_writer = ReplayWriter(arguments.record, include_states=False) \
+        if arguments.record is not None else None
+    server = GameServer(arguments.host, arguments.port, telemetry=events,
+                        metrics=tick_metrics, ai_budget=arguments.ai_budget,
+                        replay_writer=replay_writer)
+    print(f"serving on {server.get_address()}")
+    try:
+        server.run()
+    finally:
+        if writer is not None:
+            writer.close()
+        if metrics_server is not None:
+            metrics_server.close()
+            tick_metrics.close()
@@ -0,0 +1,374 @@
+"""
+Soak test harness for fortnight 8.
+
+Plays many bot driven matches back to back in one process, reusing one
+canvas the way the menu does, and records memory and object counts after
+every match. Measurements that keep growing from match to match are
+flagged, as they point at references or canvas items that outlive their
+match. It can also check that restoring a captured match is repeatable.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import collections
+import gc
+import json
+import random
+import sys
+import tracemalloc
+import types
+from game import *
+from headless import HeadlessCanvas, HeadlessRoot, HeadlessVariable
+from metrics import TickMetrics
+
+
+class SoakBot:
+    """Plays as the local player by firing the same binds a person would."""
+
+    _MOVE_KEYS = (GameController._UP_BIND, GameController._DOWN_BIND,
+                  GameController._LEFT_BIND, GameController._RIGHT_BIND)
+    _LATEST_JUMP_TICK = 150
+    _TURN_TICKS = 30  # ticks between changes of direction
+    _DROP_CHANCE = 0.002  # chance per tick of dropping the held gun
+
+    def __init__(self, root, game, rng):
+        """Initiate self variables.
+
+        :param root: the headless root the game bound its input to
+        :param game:
+        :param rng:
+        """
+        self._root = root
+        self._game = game
+        self._rng = rng
+        self._jump_tick = rng.randint(1, SoakBot._LATEST_JUMP_TICK)
+        self._held_keys = []
+
+    def _fire(self, sequence, **event_fields):
+        """Fire a bind as if Tk had received the event.
+
+        :param sequence:
+        :param event_fields:
+        :return:
+        """
+        callback = self._root.get_bind(sequence)
+        if callback is not None:
+            callback(types.SimpleNamespace(**event_fields))
+
+    def play(self, tick):
+        """Send this tick's input.
+
+        :param tick:
+        :return:
+        """
+        if tick < self._jump_tick:
+            return
+        if tick == self._jump_tick:
+            self._fire(GameController._JUMP_BIND)
+            self._fire("<ButtonPress-1>", x=0, y=0)
+        if tick % SoakBot._TURN_TICKS == 0:
+            for key in self._held_keys:
+                self._fire("<KeyRelease>", keysym=key)
+            self._held_keys = self._rng.sample(SoakBot._MOVE_KEYS,
+                                               self._rng.randint(0, 2))
+            for key in self._held_keys:
+                self._fire("<KeyPress>", keysym=key)
+        self._aim()
+        if self._rng.random() < SoakBot._DROP_CHANCE:
+            self._fire(GameController._DROP_GUN_BIND)
+
+    def _aim(self):
+        """Point the mouse at the nearest enemy.
+
+        :return:
+        """
+        player = self._game.get_player()
+        enemies = self._game.get_enemies()
+        if player is None or not enemies:
+            return
+        player_x, player_y = player.coordinates()
+        target_x, target_y = min(
+            (enemy.coordinates() for enemy in enemies),
+            key=lambda position: (position[0] - player_x) ** 2 +
+            (position[1] - player_y) ** 2)
+        # mouse events are relative to the camera, centred on the player
+        self._fire("<Motion>",
+                   x=target_x - player_x + GameController.CAMERA_WIDTH / 2,
+                   y=target_y - player_y + GameController.CAMERA_HEIGHT / 2)
+
+
+class SoakRun:
+    """Runs the matches and keeps one measurement record per match."""
+
+    DEFAULT_MATCHES = 200
+    DEFAULT_MAX_TICKS = 3000
+    _TOP_ALLOCATORS = 10
+    _TOP_CLASSES = 15
+    # matches skipped before looking for growth, caches fill up early on
+    _WARM_UP_FRACTION = 0.1
+    # growth over the run needed before a measurement is flagged
+    _MEMORY_GROWTH_BYTES = 4 * 1024 * 1024
+    _MEMORY_GROWTH_FRACTION = 0.1
+    _COUNT_GROWTH_PER_MATCH = 0.5
+
+    def __init__(self, matches=DEFAULT_MATCHES, max_ticks=DEFAULT_MAX_TICKS,
+                 seed=0, canvas=None, tracemalloc_every=10):
+        """Initiate self variables.
+
+        :param matches:
+        :param max_ticks: ticks after which a match is ended early
+        :param seed:
+        :param canvas: canvas reused by every match, headless by default
+        :param tracemalloc_every: matches between allocation snapshots
+        """
+        self._matches = matches
+        self._max_ticks = max_ticks
+        self._rng = random.Random(seed)
+        self._canvas = canvas if canvas is not None else \
+            HeadlessCanvas(GameController.CANVAS_WIDTH,
+                           GameController.CANVAS_HEIGHT)
+        self._tracemalloc_every = tracemalloc_every
+        # records only hold numbers and are kept apart from the object
+        # counts, so the collector does not track them and they do not show
+        # up as growth themselves
+        self._records = []
+        self._object_counts = []
+        self._allocators = []
+        self._baseline_snapshot = None
+
+    def run(self, progress=None):
+        """Play every match and return the report.
+
+        :param progress: called with each match record, if given
+        :return:
+        """
+        tracemalloc.start()
+        try:
+            for match in range(self._matches):
+                record = self._play_match(match)
+                self._records.append(record)
+                if progress is not None:
+                    progress(record)
+        finally:
+            tracemalloc.stop()
+        return self.build_report()
+
+    def _play_match(self, match):
+        """Play one match, tear it down and measure what is left.
+
+        :param match:
+        :return:
+        """
+        random.seed(self._rng.getrandbits(32))
+        root = HeadlessRoot()
+        game = GameController(root, self._canvas, HeadlessVariable(),
+                              "soak", None)
+        bot = SoakBot(root, game, self._rng)
+        tick = 0
+        while tick < self._max_ticks:
+            running = game.check_game_condition()[0]
+            if not running:  # the game tears itself down when it ends
+                break
+            bot.play(tick)
+            game.handle_tick()
+            tick += 1
+        else:
+            game.end_game()
+        # items the game left behind, before the menu style clear
+        leftover_items = len(self._canvas.find_all())
+        self._canvas.delete("all")
+        del bot, game, root
+        gc.collect()
+        record = {"match": match, "ticks": tick,
+                  "leftover_canvas_items": leftover_items,
+                  "live_entities": len(CanvasSprite.ENTITIES),
+                  "resident_memory_bytes": TickMetrics.get_resident_memory(),
+                  "traced_memory_bytes": tracemalloc.get_traced_memory()[0]}
+        self._object_counts.append(SoakRun._count_objects())
+        if match % self._tracemalloc_every == 0:
+            self._snapshot_allocations(match)
+        return record
+
+    @staticmethod
+    def _count_objects():
+        """Count the objects tracked by the garbage collector per class.
+
+        :return:
+        """
+        return dict(collections.Counter(type(tracked).__name__
+                                        for tracked in gc.get_objects()))
+
+    def _snapshot_allocations(self, match):
+        """Record the allocation sites that grew the most since match 0.
+
+        :param match:
+        :return:
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        if self._baseline_snapshot is None:
+            self._baseline_snapshot = snapshot
+            return
+        top = snapshot.compare_to(self._baseline_snapshot, "lineno")[
+            :SoakRun._TOP_ALLOCATORS]
+        self._allocators.append({
+            "match": match,
+            "top": [{"site": str(difference.traceback),
+                     "size_diff": difference.size_diff,
+                     "count_diff": difference.count_diff}
+                    for difference in top]})
+
+    @staticmethod
+    def _slope(values):
+        """Return the least squares slope of values against their index.
+
+        :param values:
+        :return:
+        """
+        count = len(values)
+        if count < 2:
+            return 0.0
+        mean_x = (count - 1) / 2
+        mean_y = sum(values) / count
+        covariance = sum((index - mean_x) * (value - mean_y)
+                         for index, value in enumerate(values))
+        variance = sum((index - mean_x) ** 2 for index in range(count))
+        return covariance / variance
+
+    def _find_growth(self):
+        """Return every measurement that grew steadily after the warm up.
+
+        :return:
+        """
+        warm_up = int(len(self._records) * SoakRun._WARM_UP_FRACTION)
+        records = self._records[warm_up:]
+        object_counts = self._object_counts[warm_up:]
+        growing = []
+        if len(records) < 2:
+            return growing
+        span = len(records) - 1
+        for name in ("resident_memory_bytes", "traced_memory_bytes"):
+            values = [record[name] for record in records]
+            growth = SoakRun._slope(values) * span
+            if growth > max(SoakRun._MEMORY_GROWTH_BYTES,
+                            values[0] * SoakRun._MEMORY_GROWTH_FRACTION):
+                growing.append({"measurement": name, "growth": growth})
+        counts = {"leftover_canvas_items":
+                  [record["leftover_canvas_items"] for record in records],
+                  "live_entities":
+                  [record["live_entities"] for record in records]}
+        for class_name in object_counts[-1]:
+            counts[f"objects.{class_name}"] = \
+                [match_counts.get(class_name, 0)
+                 for match_counts in object_counts]
+        for name, values in counts.items():
+            slope = SoakRun._slope(values)
+            if slope >= SoakRun._COUNT_GROWTH_PER_MATCH:
+                growing.append({"measurement": name, "growth": slope * span,
+                                "per_match": slope})
+        growing.sort(key=lambda entry: -entry["growth"])
+        return growing
+
+    def build_report(self):
+        """Return the report of the matches played so far.
+
+        :return:
+        """
+        last_objects = self._object_counts[-1] if self._object_counts \
+            else {}
+        return {"matches": len(self._records),
+                "records": self._records,
+                "top_classes": sorted(last_objects.items(),
+                                      key=lambda item: -item[1])[
+                               :SoakRun._TOP_CLASSES],
+                "allocators": self._allocators,
+                "growing": self._find_growth()}
+
+
+def check_restore(capture_tick, ticks, seed=0):
+    """Check that two restores of one captured match play out the same.
+
+    Plays a bot driven match up to the capture tick and captures it. The
+    capture is then restored twice into the same game and each is played on
+    with the same bot input, capturing the world after every tick.
+    :param capture_tick:
+    :param ticks: ticks played after each restore
+    :param seed:
+    :return: the first tick the restored matches differ on, or None
+    """
+    random.seed(seed)
+    root = HeadlessRoot()
+    game = GameController(root, HeadlessCanvas(GameController.CANVAS_WIDTH,
+                                               GameController.CANVAS_HEIGHT),
+                          HeadlessVariable(), "restore", None)
+    bot = SoakBot(root, game, random.Random(seed))
+    for tick in range(capture_tick):
+        bot.play(tick)
+        game.handle_tick()
+    state = game.capture_state().to_bytes()
+    runs = []
+    for _ in range(2):
+        game.restore_state(WorldState.from_bytes(state))
+        bot = SoakBot(root, game, random.Random(seed))
+        run = []
+        for tick in range(capture_tick, capture_tick + ticks):
+            if game.get_player().get_health() <= 0:
+                break
+            bot.play(tick)
+            game.handle_tick()
+            run.append(game.capture_state().to_bytes())
+        runs.append(run)
+    game.end_game()
+    for played, (first, second) in enumerate(zip(*runs)):
+        if first != second:
+            return capture_tick + played + 1
+    if len(runs[0]) != len(runs[1]):
+        return capture_tick + min(len(run) for run in runs) + 1
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="soak test fortnight 8 with "
+                                                 "bot driven matches")
+    parser.add_argument("--matches", type=int,
+                        default=SoakRun.DEFAULT_MATCHES)
+    parser.add_argument("--max-ticks", type=int,
+                        default=SoakRun.DEFAULT_MAX_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc-every", type=int, default=10)
+    parser.add_argument("--tk", action="store_true",
+                        help="draw on a real (hidden) Tk canvas")
+    parser.add_argument("--report", help="write the json report here")
+    parser.add_argument("--check-restore", type=int, nargs=2,
+                        metavar=("CAPTURE_TICK", "TICKS"),
+                        help="check that two restores of a match captured "
+                             "at a tick stay identical, instead of soaking")
+    arguments = parser.parse_args()
+    if arguments.check_restore is not None:
+        differing_tick = check_restore(*arguments.check_restore,
+                                       arguments.seed)
+        if differing_tick is not None:
+            print(f"restored matches differ at tick {differing_tick}")
+            sys.exit(1)
+        print("restored matches are identical")
+        sys.exit(0)
+    soak_canvas = None
+    if arguments.tk:
+        tk_root = Tk()
+        tk_root.withdraw()
+        soak_canvas = Canvas(tk_root)
+    soak = SoakRun(arguments.matches, arguments.max_ticks, arguments.seed,
+                   soak_canvas, arguments.tracemalloc_every)
+    report = soak.run(lambda match_record: print(
+        f"match {match_record['match']}: {match_record['ticks']} ticks, "
+        f"rss {match_record['resident_memory_bytes'] // 1024} KiB, "
+        f"{match_record['leftover_canvas_items']} canvas items left, "
+        f"{match_record['live_entities']} live entities"))
+    if arguments.report is not None:
+        with open(arguments.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    for growing_entry in report["growing"]:
+        print(f"GROWING {growing_entry['measurement']}: "
+              f"+{growing_entry['growth']:.0f} over the run")
+    sys.exit(1 if report["growing"] else 0)
@@ -0,0 +1,267 @@
+"""
+Gameplay event telemetry for fortnight 8.
+
+The game appends fixed size event records to an in-memory ring buffer while
+it ticks, and a background thread drains the buffer into small rotating
+binary files. Nothing on the tick path formats text or touches a file.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import os
+import struct
+import threading
+import time
+
+
+class TelemetryError(Exception):
+    """Raised when a telemetry file can not be read."""
+
+
+class TelemetryEvent:
+    """Event kinds and the binary record layout."""
+
+    SPAWN = 1
+    PICKUP = 2
+    HEAL = 3
+    DAMAGE = 4
+    KILL = 5
+    ZONE_DAMAGE = 6
+    MATCH_END = 7
+    # written by the writer, the value is how many events the ring buffer
+    # dropped since the last of these
+    EVENTS_DROPPED = 8
+    NAMES = {SPAWN: "spawn", PICKUP: "pickup", HEAL: "heal",
+             DAMAGE: "damage", KILL: "kill", ZONE_DAMAGE: "zone_damage",
+             MATCH_END: "match_end", EVENTS_DROPPED: "events_dropped"}
+    # used for entity fields that have no entity
+    NO_ENTITY = -1
+    # tick, kind, subject entity, other entity, value
+    RECORD = struct.Struct("<IBqqf")
+
+
+class EventRingBuffer:
+    """A fixed size buffer of event records for one writer and one reader.
+
+    The game thread only calls emit and the writer thread only calls drain.
+    Each side moves its own counter, so no lock is needed. If the reader
+    falls a whole buffer behind, new events are counted as dropped instead
+    of overwriting ones that have not been written out yet.
+    """
+
+    DEFAULT_CAPACITY = 65536
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """Initiate self variables.
+
+        :param capacity: number of records the buffer holds
+        """
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * TelemetryEvent.RECORD.size)
+        self._written = 0
+        self._read = 0
+        self._dropped = 0
+
+    def emit(self, tick, kind, subject, other=TelemetryEvent.NO_ENTITY,
+             value=0.0):
+        """Append an event record.
+
+        :param tick:
+        :param kind:
+        :param subject:
+        :param other:
+        :param value:
+        :return:
+        """
+        written = self._written
+        if written - self._read >= self._capacity:  # the reader is behind
+            self._dropped += 1
+            return
+        TelemetryEvent.RECORD.pack_into(
+            self._buffer,
+            (written % self._capacity) * TelemetryEvent.RECORD.size,
+            tick, kind, subject, other, value)
+        self._written = written + 1
+
+    def drain(self):
+        """Return every record emitted since the last drain as bytes.
+
+        :return:
+        """
+        written = self._written
+        read = self._read
+        if written == read:
+            return b""
+        record_size = TelemetryEvent.RECORD.size
+        start = (read % self._capacity) * record_size
+        end = (written % self._capacity) * record_size
+        if start < end:
+            data = bytes(self._buffer[start:end])
+        else:  # the new records wrap around the end of the buffer
+            data = bytes(self._buffer[start:]) + bytes(self._buffer[:end])
+        self._read = written
+        return data
+
+    def get_dropped(self):
+        """Return how many events were dropped because the buffer was full.
+
+        :return:
+        """
+        return self._dropped
+
+
+class TelemetryWriter:
+    """Drains a ring buffer into rotating telemetry files on a thread.
+
+    Events the buffer dropped while full are written as an events dropped
+    record after the records drained with them, so gaps show in the files.
+    """
+
+    MAGIC = b"FN8T"
+    VERSION = 1
+    # magic, version, record size
+    _HEADER = struct.Struct("<4sHH")
+    _FILE_EXTENSION = ".fn8t"
+    DEFAULT_MAX_FILE_BYTES = 4 * 1024 * 1024
+    DEFAULT_MAX_FILES = 16
+    _FLUSH_INTERVAL = 0.5  # seconds between drains
+
+    def __init__(self, events, directory,
+                 max_file_bytes=DEFAULT_MAX_FILE_BYTES,
+                 max_files=DEFAULT_MAX_FILES):
+        """Initiate self variables and start the writer thread.
+
+        :param events: the ring buffer to drain
+        :param directory:
+        :param max_file_bytes: size after which a new file is started
+        :param max_files: number of files kept, older files are deleted
+        """
+        self._events = events
+        self._directory = directory
+        self._max_file_bytes = max_file_bytes
+        self._max_files = max_files
+        os.makedirs(directory, exist_ok=True)
+        # files of one session share a prefix and sort by creation
+        self._prefix = time.strftime("events-%Y%m%d-%H%M%S-") + \
+            str(os.getpid())
+        self._file_number = 0
+        self._file = None
+        self._file_bytes = 0
+        self._paths = []
+        self._dropped = 0  # dropped events already written as a record
+        self._last_tick = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name="telemetry writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Drain the buffer until stopped.
+
+        :return:
+        """
+        while not self._stop.wait(TelemetryWriter._FLUSH_INTERVAL):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Write everything waiting in the buffer.
+
+        Only called from the writer thread, or after it has stopped.
+        :return:
+        """
+        data = self._events.drain()
+        dropped = self._events.get_dropped()
+        if data:
+            self._last_tick = TelemetryEvent.RECORD.unpack_from(
+                data, len(data) - TelemetryEvent.RECORD.size)[0]
+        if dropped != self._dropped:
+            data += TelemetryEvent.RECORD.pack(
+                self._last_tick, TelemetryEvent.EVENTS_DROPPED,
+                TelemetryEvent.NO_ENTITY, TelemetryEvent.NO_ENTITY,
+                dropped - self._dropped)
+            self._dropped = dropped
+        if not data:
+            return
+        if self._file is None or self._file_bytes >= self._max_file_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._file_bytes += len(data)
+
+    def _rotate(self):
+        """Close the current file, start a new one and trim old files.
+
+        :return:
+        """
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self._directory,
+                            f"{self._prefix}-{self._file_number:04d}"
+                            f"{TelemetryWriter._FILE_EXTENSION}")
+        self._file_number += 1
+        self._file = open(path, "wb")
+        self._file.write(TelemetryWriter._HEADER.pack(
+            TelemetryWriter.MAGIC, TelemetryWriter.VERSION,
+            TelemetryEvent.RECORD.size))
+        self._file_bytes = TelemetryWriter._HEADER.size
+        self._paths.append(path)
+        while len(self._paths) > self._max_files:
+            try:
+                os.remove(self._paths.pop(0))
+            except OSError:
+                pass
+
+    def get_paths(self):
+        """Return the paths of the files still kept, oldest first.
+
+        :return:
+        """
+        return list(self._paths)
+
+    def close(self):
+        """Stop the writer thread after a final flush and close the file.
+
+        :return:
+        """
+        self._stop.set()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def read_events(path):
+        """Return the event tuples stored in a telemetry file.
+
+        :param path:
+        :return:
+        """
+        with open(path, "rb") as event_file:
+            data = event_file.read()
+        if len(data) < TelemetryWriter._HEADER.size:
+            raise TelemetryError("telemetry file is truncated")
+        magic, version, record_size = \
+            TelemetryWriter._HEADER.unpack_from(data)
+        if magic != TelemetryWriter.MAGIC:
+            raise TelemetryError("not a telemetry file")
+        if version != TelemetryWriter.VERSION or \
+                record_size != TelemetryEvent.RECORD.size:
+            raise TelemetryError(f"unsupported telemetry version {version}")
+        body = data[TelemetryWriter._HEADER.size:]
+        # a file cut off mid write loses only its last partial record
+        body = body[:len(body) - len(body) % record_size]
+        return list(TelemetryEvent.RECORD.iter_unpack(body))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="print fortnight 8 "
+                                                 "telemetry files")
+    parser.add_argument("paths", nargs="+")
+    arguments = parser.parse_args()
+    for event_path in arguments.paths:
+        for event_tick, event_kind, event_subject, event_other, event_value \
+                in TelemetryWriter.read_events(event_path):
+            print(event_tick, TelemetryEvent.NAMES.get(event_kind, event_kind),
+                  event_subject, event_other, round(event_value, 3))
@@ -0,0 +1,262 @@
+"""
+Match to video export for fortnight 8.
+
+The simulation hands a small snapshot of the camera window (the world view
+of the items inside it, the zone and the camera corner) to a bounded queue
+after every Nth tick. A worker process draws each snapshot with the
+framebuffer renderer and encodes it, so the simulation never waits on
+Pillow. Frames are written as a numbered image sequence, or as one animated
+gif or webp. Animated files are built in memory, so they stop after a set
+number of frames.
+
+Run this file to play a bot driven headless match into a video.
+
+Last modified: 19/10/2026
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+from game import *
+from framebuffer import FramebufferRenderer
+from headless import HeadlessCanvas, HeadlessRoot, HeadlessVariable
+from replay import ReplayViewer
+from soak import SoakBot
+
+
+class VideoExportError(Exception):
+    """Raised when the encoder process has failed."""
+
+
+class VideoExporter:
+    """Captures a match tick by tick and encodes it in a worker process."""
+
+    DEFAULT_QUEUE_SIZE = 64
+    # files with these extensions are written as one animated image
+    ANIMATED_EXTENSIONS = (".gif", ".webp")
+    # animated files hold every frame until they are written, so frames
+    # after this many are not captured
+    MAX_ANIMATED_FRAMES = 1000
+    # seconds a full queue is waited on before checking the worker is alive
+    _PUT_TIMEOUT = 1.0
+    _FRAME_NAME = "frame_{:06d}.png"
+    # milliseconds a tick lasts when played in the menu
+    _TICK_MILLISECONDS = 17
+
+    def __init__(self, path, decimation=1, queue_size=DEFAULT_QUEUE_SIZE,
+                 scale=1.0, wait_when_full=False):
+        """Initiate self variables and start the worker process.
+
+        :param path: an animated file, or a directory for an image sequence
+        :param decimation: ticks per captured frame
+        :param queue_size: snapshots that can wait for the worker
+        :param scale: size of the frames relative to the camera
+        :param wait_when_full: wait for the worker instead of dropping a
+            frame when the queue is full
+        """
+        self._decimation = decimation
+        self._wait_when_full = wait_when_full
+        self._follow = None
+        self._camera_corner = None
+        self._captured = 0
+        self._dropped = 0
+        self._over_limit = 0
+        self._frame_limit = VideoExporter.MAX_ANIMATED_FRAMES if \
+            os.path.splitext(path)[1].lower() in \
+            VideoExporter.ANIMATED_EXTENSIONS else None
+        self._snapshots = multiprocessing.Queue(queue_size)
+        self._worker = multiprocessing.Process(
+            target=VideoExporter._encode,
+            args=(self._snapshots, path, scale,
+                  VideoExporter._TICK_MILLISECONDS * decimation),
+            name="video encoder", daemon=True)
+        self._worker.start()
+
+    def follow(self, sprite):
+        """Follow a sprite (the player or any Enemy) with the camera.
+
+        Passing None follows the game's camera, which is the player or the
+        enemy being spectated. If the followed sprite is deleted the camera
+        goes back to the game's camera.
+        :param sprite:
+        :return:
+        """
+        self._follow = sprite
+
+    def capture(self, game):
+        """Capture a tick of a game, if it falls on the decimation.
+
+        Call after each handle_tick. Raises VideoExportError if the worker
+        has failed.
+        :param game:
+        :return:
+        """
+        tick = game.get_tick()
+        if tick % self._decimation != 0:
+            return
+        self._check_worker()
+        if self._frame_limit is not None and \
+                self._captured >= self._frame_limit:
+            self._over_limit += 1
+            return
+        followed = self._follow
+        if followed is None or not followed.exists_on_canvas():
+            followed = game.get_camera_target()
+        if followed is not None and followed.exists_on_canvas():
+            self._camera_corner = GameController.get_camera_corner(
+                *followed.coordinates())
+        if self._camera_corner is None:
+            return
+        left, top = self._camera_corner
+        snapshot = (tick, left, top, game.get_zone_view(),
+                    game.build_view(left, top,
+                                    left + GameController.CAMERA_WIDTH,
+                                    top + GameController.CAMERA_HEIGHT))
+        if self._wait_when_full:
+            self._put(snapshot)
+            self._captured += 1
+            return
+        try:
+            self._snapshots.put(snapshot, block=False)
+            self._captured += 1
+        except queue.Full:  # the worker is behind, skip this frame
+            self._dropped += 1
+
+    def _put(self, item):
+        """Put an item on the queue, waiting for room while the worker runs.
+
+        :param item:
+        :return:
+        """
+        while True:
+            try:
+                self._snapshots.put(item, timeout=VideoExporter._PUT_TIMEOUT)
+                return
+            except queue.Full:
+                self._check_worker()
+
+    def _check_worker(self):
+        """Raise VideoExportError if the worker has stopped.
+
+        Whatever is left in the queue is abandoned, so exiting does not wait
+        on a queue nobody reads.
+        :return:
+        """
+        if self._worker.is_alive():
+            return
+        self._snapshots.cancel_join_thread()
+        raise VideoExportError(f"the video encoder stopped with exit code "
+                               f"{self._worker.exitcode}")
+
+    def get_stats(self):
+        """Return the number of frames captured, dropped because the worker
+        was behind, and left out past the animated frame limit.
+
+        :return:
+        """
+        return {"captured": self._captured, "dropped": self._dropped,
+                "over_limit": self._over_limit}
+
+    def close(self):
+        """Wait for the worker to encode every captured frame.
+
+        Raises VideoExportError if the worker failed.
+        :return:
+        """
+        self._put(None)
+        self._worker.join()
+        self._snapshots.close()
+        if self._worker.exitcode != 0:
+            raise VideoExportError(f"the video encoder failed with exit code "
+                                   f"{self._worker.exitcode}")
+
+    @staticmethod
+    def _encode(snapshots, path, scale, frame_milliseconds):
+        """Draw and encode snapshots until None arrives, in the worker.
+
+        The world view is applied to a headless canvas by a replay viewer,
+        so only the records that changed are touched, and the framebuffer
+        renderer draws the camera window from it.
+        :param snapshots:
+        :param path:
+        :param scale:
+        :param frame_milliseconds:
+        :return:
+        """
+        canvas = HeadlessCanvas(GameController.CANVAS_WIDTH,
+                                GameController.CANVAS_HEIGHT)
+        viewer = ReplayViewer(canvas)
+        renderer = FramebufferRenderer()
+        animated = os.path.splitext(path)[1].lower() in \
+            VideoExporter.ANIMATED_EXTENSIONS
+        if not animated:
+            os.makedirs(path, exist_ok=True)
+        frames = []
+        frame_number = 0
+        while True:
+            snapshot = snapshots.get()
+            if snapshot is None:
+                break
+            tick, left, top, zone, view = snapshot
+            viewer.show_frame(tick, zone, view)
+            renderer.render(canvas, left, top)
+            frame = renderer.get_frame()
+            if scale != 1.0:
+                frame = frame.resize((round(frame.width * scale),
+                                      round(frame.height * scale)))
+            if animated:
+                # palette frames keep long gifs to a sane size in memory
+                frames.append(frame.quantize() if path.lower().endswith(
+                    ".gif") else frame)
+            else:
+                frame.save(os.path.join(
+                    path, VideoExporter._FRAME_NAME.format(frame_number)))
+            frame_number += 1
+        if animated and frames:
+            frames[0].save(path, save_all=True, append_images=frames[1:],
+                           duration=frame_milliseconds, loop=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="export a bot driven "
+                                                 "fortnight 8 match as video")
+    parser.add_argument("path", help="a .gif or .webp file, or a directory "
+                                     "for png frames")
+    parser.add_argument("--decimation", type=int, default=2)
+    parser.add_argument("--max-ticks", type=int, default=1800)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=0.5)
+    parser.add_argument("--follow-enemy", type=int,
+                        help="follow the enemy with this spawn index")
+    parser.add_argument("--queue-size", type=int,
+                        default=VideoExporter.DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--wait", action="store_true",
+                        help="never drop frames, wait for the encoder")
+    arguments = parser.parse_args()
+    random.seed(arguments.seed)
+    video_root = HeadlessRoot()
+    video_game = GameController(video_root,
+                                HeadlessCanvas(GameController.CANVAS_WIDTH,
+                                               GameController.CANVAS_HEIGHT),
+                                HeadlessVariable(), "video", None)
+    bot = SoakBot(video_root, video_game, random.Random(arguments.seed))
+    exporter = VideoExporter(arguments.path, arguments.decimation,
+                             arguments.queue_size, arguments.scale,
+                             arguments.wait)
+    if arguments.follow_enemy is not None:
+        exporter.follow(video_game.get_enemies()[arguments.follow_enemy])
+    for video_tick in range(arguments.max_ticks):
+        if not video_game.check_game_condition()[0]:
+            break
+        bot.play(video_tick)
+        video_game.handle_tick()
+        exporter.capture(video_game)
+    else:
+        video_game.end_game()
+    exporter.close()
+    print(f"{exporter.get_stats()['captured']} frames captured, "
+          f"{exporter.get_stats()['dropped']} dropped, "
+          f"{exporter.get_stats()['over_limit']} past the animated frame "
+          f"limit")
@@ -0,0 +1,199 @@
+"""
+Compact binary world state for fortnight 8.
+
+Holds every piece of match state as flat record lists and converts them to
+and from a versioned binary format. Entities refer to each other by their
+index in the attacker list (the player is always index 0), with -1 meaning
+no reference.
+
+Last modified: 19/10/2026
+"""
+
+import struct
+import zlib
+
+
+class WorldStateError(Exception):
+    """Raised when a world state blob can not be read."""
+
+
+class WorldState:
+    """A snapshot of a whole match as flat, index linked records."""
+
+    MAGIC = b"FN8W"
+    VERSION = 3
+    NO_INDEX = -1
+    # magic, version, flags, body length
+    _HEADER = struct.Struct("<4sHHI")
+    _COMPRESSED_FLAG = 1
+    # tick, attackers, guns, bullets, heals
+    _COUNTS = struct.Struct("<5I")
+    # rng version, 625 state words, has gauss, gauss next
+    _RNG = struct.Struct("<I625IBd")
+    # zone seed, alive count, score, player shoot, mouse target x/y,
+    # bus alive, bus x/y, bus x/y speed, bus has passenger
+    _WORLD = struct.Struct("<IIiB2dB4dB")
+    # x, y, x speed, y speed, health, destination x/y, last attacker, gun,
+    # target
+    ATTACKER = struct.Struct("<7d3i")
+    # x, y, gun type, rarity, seconds since last shot, owner, owned tag
+    GUN = struct.Struct("<2dBBdiB")
+    # x, y, x speed, y speed, damage, owner, ticks left to live
+    BULLET = struct.Struct("<5dii")
+    # x, y, consumable type
+    HEAL = struct.Struct("<2dB")
+
+    def __init__(self, tick, rng_state, world, attackers, guns, bullets,
+                 heals):
+        """Initiate self variables.
+
+        :param tick:
+        :param rng_state:
+        :param world:
+        :param attackers:
+        :param guns:
+        :param bullets:
+        :param heals:
+        """
+        self.tick = tick
+        self.rng_state = rng_state
+        self.world = world
+        self.attackers = attackers
+        self.guns = guns
+        self.bullets = bullets
+        self.heals = heals
+
+    def get_entity_count(self):
+        """Return how many entities the state holds.
+
+        :return:
+        """
+        return (len(self.attackers) + len(self.guns) + len(self.bullets) +
+                len(self.heals))
+
+    @staticmethod
+    def _pack_rng(rng_state):
+        """Pack a random.getstate() tuple.
+
+        :param rng_state:
+        :return:
+        """
+        version, words, gauss_next = rng_state
+        return WorldState._RNG.pack(version, *words, gauss_next is not None,
+                                    gauss_next or 0.0)
+
+    @staticmethod
+    def _unpack_rng(body, offset):
+        """Unpack a random.getstate() tuple.
+
+        :param body:
+        :param offset:
+        :return:
+        """
+        values = WorldState._RNG.unpack_from(body, offset)
+        gauss_next = values[-1] if values[-2] else None
+        return values[0], tuple(values[1:-2]), gauss_next
+
+    @staticmethod
+    def _pack_records(layout, records):
+        """Pack a list of record tuples back to back.
+
+        :param layout:
+        :param records:
+        :return:
+        """
+        return b"".join([layout.pack(*record) for record in records])
+
+    @staticmethod
+    def _unpack_records(layout, body, offset, count):
+        """Unpack count records starting at offset.
+
+        :param layout:
+        :param body:
+        :param offset:
+        :param count:
+        :return:
+        """
+        end = offset + layout.size * count
+        if end > len(body):
+            raise WorldStateError("world state is truncated")
+        return list(layout.iter_unpack(body[offset:end])), end
+
+    def to_bytes(self, compress=True):
+        """Serialise the state.
+
+        :param compress:
+        :return:
+        """
+        body = b"".join([
+            WorldState._COUNTS.pack(self.tick, len(self.attackers),
+                                    len(self.guns), len(self.bullets),
+                                    len(self.heals)),
+            WorldState._pack_rng(self.rng_state),
+            WorldState._WORLD.pack(*self.world),
+            WorldState._pack_records(WorldState.ATTACKER, self.attackers),
+            WorldState._pack_records(WorldState.GUN, self.guns),
+            WorldState._pack_records(WorldState.BULLET, self.bullets),
+            WorldState._pack_records(WorldState.HEAL, self.heals)])
+        flags = 0
+        if compress:
+            body = zlib.compress(body, 1)
+            flags |= WorldState._COMPRESSED_FLAG
+        return WorldState._HEADER.pack(WorldState.MAGIC, WorldState.VERSION,
+                                       flags, len(body)) + body
+
+    @staticmethod
+    def from_bytes(data):
+        """Read a state written by to_bytes.
+
+        :param data:
+        :return:
+        """
+        if len(data) < WorldState._HEADER.size:
+            raise WorldStateError("world state is truncated")
+        magic, version, flags, length = WorldState._HEADER.unpack_from(data)
+        if magic != WorldState.MAGIC:
+            raise WorldStateError("not a world state")
+        if version != WorldState.VERSION:
+            raise WorldStateError(f"unsupported world state version "
+                                  f"{version}")
+        body = bytes(data[WorldState._HEADER.size:
+                          WorldState._HEADER.size + length])
+        if flags & WorldState._COMPRESSED_FLAG:
+            body = zlib.decompress(body)
+        tick, attacker_count, gun_count, bullet_count, heal_count = \
+            WorldState._COUNTS.unpack_from(body)
+        offset = WorldState._COUNTS.size
+        rng_state = WorldState._unpack_rng(body, offset)
+        offset += WorldState._RNG.size
+        world = WorldState._WORLD.unpack_from(body, offset)
+        offset += WorldState._WORLD.size
+        attackers, offset = WorldState._unpack_records(
+            WorldState.ATTACKER, body, offset, attacker_count)
+        guns, offset = WorldState._unpack_records(
+            WorldState.GUN, body, offset, gun_count)
+        bullets, offset = WorldState._unpack_records(
+            WorldState.BULLET, body, offset, bullet_count)
+        heals, offset = WorldState._unpack_records(
+            WorldState.HEAL, body, offset, heal_count)
+        return WorldState(tick, rng_state, world, attackers, guns, bullets,
+                          heals)
+
+    def save(self, path):
+        """Write the state to a file.
+
+        :param path:
+        :return:
+        """
+        with open(path, "wb") as state_file:
+            state_file.write(self.to_bytes())
+
+    @staticmethod
+    def load(path):
+        """Read a state from a file.
+
+        :param path:
+        :return:
+        """
+        with open(path, "rb") as state_file:
+            return WorldState.from_bytes(state_file.read())
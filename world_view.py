@@ -0,0 +1,100 @@
+"""
+Visual entity records for fortnight 8.
+
+A world view is a dict of canvas item id to a small record describing what
+is drawn there (kind, position, health, variant). Views are what clients and
+replays display, and are sent as deltas against an earlier view.
+
+Last modified: 19/10/2026
+"""
+
+import struct
+
+
+class WorldView:
+    """Binary layout and delta coding of world views."""
+
+    # zone centre x/y, zone radius, changed count, removed count
+    DELTA_HEADER = struct.Struct("<hhHHH")
+    # item id, kind, x, y, health, variant
+    ENTITY = struct.Struct("<IBhhhB")
+    REMOVED = struct.Struct("<I")
+    # entity kinds
+    KIND_ENEMY = 1
+    KIND_PLAYER = 2
+    KIND_GUN = 3
+    KIND_BULLET = 4
+    KIND_HEAL = 5
+    # variant bit set on guns that have an owner
+    OWNED_VARIANT = 0x80
+    # guns store their type and rarity as type * RARITY_COUNT + rarity
+    RARITY_COUNT = 4
+
+    @staticmethod
+    def clamp_short(value):
+        """Clamp a number into the signed 16 bit range.
+
+        :param value:
+        :return:
+        """
+        return max(-32768, min(32767, int(value)))
+
+    @staticmethod
+    def clamp_zone(centre, radius):
+        """Convert a zone centre and radius into the delta header range.
+
+        :param centre:
+        :param radius:
+        :return:
+        """
+        return (WorldView.clamp_short(centre[0]),
+                WorldView.clamp_short(centre[1]),
+                max(0, min(65535, int(radius))))
+
+    @staticmethod
+    def encode_delta(zone, view, baseline):
+        """Encode a view as a delta against a baseline view.
+
+        Only entities that are new or differ from the baseline are written,
+        followed by the ids of baseline entities that are no longer present.
+        An empty baseline gives a full view.
+        :param zone:
+        :param view:
+        :param baseline:
+        :return:
+        """
+        changed = [(item, record) for item, record in view.items()
+                   if baseline.get(item) != record]
+        removed = [item for item in baseline if item not in view]
+        parts = [WorldView.DELTA_HEADER.pack(*zone, len(changed),
+                                             len(removed))]
+        entity_layout = WorldView.ENTITY
+        for item, record in changed:
+            parts.append(entity_layout.pack(item, *record))
+        for item in removed:
+            parts.append(WorldView.REMOVED.pack(item))
+        return b"".join(parts)
+
+    @staticmethod
+    def decode_delta(data, offset, baseline):
+        """Decode a delta on top of its baseline view.
+
+        Returns the zone tuple, the rebuilt view and the offset after the
+        delta. The baseline is not modified.
+        :param data:
+        :param offset:
+        :param baseline:
+        :return:
+        """
+        zone_x, zone_y, zone_radius, changed_count, removed_count = \
+            WorldView.DELTA_HEADER.unpack_from(data, offset)
+        view = dict(baseline)
+        offset += WorldView.DELTA_HEADER.size
+        end = offset + changed_count * WorldView.ENTITY.size
+        for item, *record in WorldView.ENTITY.iter_unpack(data[offset:end]):
+            view[item] = tuple(record)
+        offset = end
+        end = offset + removed_count * WorldView.REMOVED.size
+        for item, in WorldView.REMOVED.iter_unpack(data[offset:end]):
+            view.pop(item, None)
+        return (zone_x, zone_y, zone_radius), view, end